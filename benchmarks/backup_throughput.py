@@ -0,0 +1,84 @@
+"""
+Backup throughput on a synthetic photo library.
+
+Generates N incompressible "photos" (random bytes, like JPEG data) plus a few text
+files, then times BackupService.create_backup with the per-file compression policy
+and with every member deflated (the previous behaviour).
+
+    PYTHONPATH=src python benchmarks/backup_throughput.py --photos 200 --size-kb 2048
+"""
+import argparse
+import os
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from pilgrim.database import Base
+from pilgrim.models.photo import Photo
+from pilgrim.models.travel_diary import TravelDiary
+from pilgrim.service.backup_service import BackupService
+from pilgrim.utils import DirectoryManager
+
+
+def build_library(root: Path, photos: int, size_kb: int):
+    config_dir = root / "config"
+    diaries_root = config_dir / "diaries"
+    images_dir = diaries_root / "synthetic" / "data" / "images"
+    images_dir.mkdir(parents=True)
+    db_path = config_dir / "database.db"
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    diary = TravelDiary(name="Synthetic", directory_name="synthetic")
+    session.add(diary)
+    session.commit()
+
+    for index in range(photos):
+        photo_path = images_dir / f"IMG_{index:05d}.jpg"
+        photo_path.write_bytes(os.urandom(size_kb * 1024))
+        session.add(Photo(filepath=str(photo_path), name=photo_path.stem, photo_hash=f"{index:096x}",
+                          fk_travel_diary_id=diary.id))
+    (diaries_root / "synthetic" / "data" / "notes.txt").write_text("travel notes\n" * 20000)
+    session.commit()
+    return session, config_dir, diaries_root, db_path
+
+
+def run_backup(session, config_dir, diaries_root, db_path, deflate_everything: bool) -> float:
+    with patch.object(DirectoryManager, "get_database_path", return_value=db_path), \
+            patch.object(DirectoryManager, "get_config_directory", return_value=config_dir), \
+            patch.object(DirectoryManager, "get_diaries_root", return_value=diaries_root):
+        policy = (lambda _path: zipfile.ZIP_DEFLATED) if deflate_everything else BackupService.compression_for
+        with patch.object(BackupService, "compression_for", side_effect=policy):
+            start = time.perf_counter()
+            success, result = BackupService(session).create_backup()
+            elapsed = time.perf_counter() - start
+    if not success:
+        raise RuntimeError(result)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--photos", type=int, default=100)
+    parser.add_argument("--size-kb", type=int, default=2048)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        session, config_dir, diaries_root, db_path = build_library(Path(tmp), args.photos, args.size_kb)
+        library_mb = args.photos * args.size_kb / 1024
+        print(f"Synthetic library: {args.photos} photos, {library_mb:.0f} MB")
+        for label, deflate_everything in (("deflate everything", True), ("per-file policy", False)):
+            elapsed = run_backup(session, config_dir, diaries_root, db_path, deflate_everything)
+            archive_mb = (config_dir / "backup.zip").stat().st_size / (1024 * 1024)
+            print(f"{label:>20}: {elapsed:6.2f} s  {library_mb / elapsed:7.1f} MB/s  archive {archive_mb:.0f} MB")
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
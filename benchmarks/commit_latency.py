@@ -0,0 +1,103 @@
+"""
+Commit latency with and without the SQLite performance profile.
+
+Opens the same kind of database twice through Database, once with no pragmas (the
+previous bare engine) and once with the default profile (WAL, synchronous=NORMAL,
+mmap, cache), and times the two paths that commit most often: saving an entry
+(EntryService.update, one commit per save) and adding photos one at a time
+(PhotoService.create: hash, copy and one commit per photo).
+
+    PYTHONPATH=src python benchmarks/commit_latency.py --saves 300 --photos 100
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from pilgrim.database import Database
+from pilgrim.models.entry import Entry
+from pilgrim.models.travel_diary import TravelDiary
+from pilgrim.service.entry_service import EntryService
+from pilgrim.service.photo_service import PhotoService
+from pilgrim.utils import DirectoryManager
+from pilgrim.utils.sqlite_profile import DEFAULT_SQLITE_PRAGMAS
+
+PROFILES = (("no pragmas", {}), ("tuned profile", DEFAULT_SQLITE_PRAGMAS))
+
+
+def open_database(root: Path, pragmas: dict) -> Database:
+    config = SimpleNamespace(database_url=str(root / "database.db"), sqlite_pragmas=dict(pragmas),
+                             sqlite_optimize_interval=0)
+    database = Database(config)
+    database.create()
+    return database
+
+
+def time_entry_saves(database: Database, saves: int) -> list:
+    session = database.session()
+    diary = TravelDiary(name="Benchmark", directory_name="benchmark")
+    session.add(diary)
+    session.commit()
+    service = EntryService(session)
+    entry = service.create(diary.id, "Dia 1", "", datetime(2025, 1, 1), [])
+    text = ""
+    timings = []
+    for index in range(saves):
+        text += f"Frase número {index} sobre a viagem. "
+        edited = Entry(entry.title, text, entry.date, diary.id, id=entry.id, photos=[])
+        start = time.perf_counter()
+        service.update(entry, edited)
+        timings.append(time.perf_counter() - start)
+    session.close()
+    return timings
+
+
+def time_photo_adds(database: Database, root: Path, photos: int, size_kb: int) -> list:
+    sources = root / "camera"
+    sources.mkdir()
+    for index in range(photos):
+        (sources / f"IMG_{index:05d}.jpg").write_bytes(os.urandom(size_kb * 1024))
+    session = database.session()
+    diary = session.query(TravelDiary).first()
+    service = PhotoService(session)
+    timings = []
+    with patch.object(DirectoryManager, "get_diaries_root", return_value=root / "diaries"):
+        for source in sorted(sources.iterdir()):
+            start = time.perf_counter()
+            service.create(source, source.stem, diary.id)
+            timings.append(time.perf_counter() - start)
+    session.close()
+    return timings
+
+
+def describe(timings: list) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return f"median {statistics.median(ordered) * 1000:6.2f} ms  p95 {p95 * 1000:6.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--saves", type=int, default=300)
+    parser.add_argument("--photos", type=int, default=100)
+    parser.add_argument("--size-kb", type=int, default=256)
+    args = parser.parse_args()
+
+    for label, pragmas in PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            database = open_database(root, pragmas)
+            saves = time_entry_saves(database, args.saves)
+            adds = time_photo_adds(database, root, args.photos, args.size_kb)
+            database.engine.dispose()
+        print(f"{label:>14}: entry save  {describe(saves)}")
+        print(f"{'':>14}  photo add   {describe(adds)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Search latency on a synthetic diary collection.
+
+Fills a database with N entries of random Portuguese-like text spread over a few
+diaries, then times SearchService.search for common, rare and prefix queries,
+across all diaries and scoped to one.
+
+    PYTHONPATH=src python benchmarks/search_latency.py --entries 100000
+"""
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from pilgrim.database import Base
+from pilgrim.models.entry import Entry
+from pilgrim.models.travel_diary import TravelDiary
+from pilgrim.service.search_service import SearchService
+
+WORDS = ("viagem praia cidade museu igreja comida vinho mercado rio ponte castelo serra "
+         "estrada comboio autocarro hotel jantar almoço manhã noite chuva sol vento mar "
+         "montanha aldeia festa música amigos caminho").split()
+DIARIES = 10
+
+
+def build_collection(db_path: Path, entries: int):
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([TravelDiary(name=f"Diary {i}", directory_name=f"diary_{i}") for i in range(DIARIES)])
+    session.commit()
+
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    rows = [{
+        "title": " ".join(rng.choices(WORDS, k=3)),
+        "text": " ".join(rng.choices(WORDS, k=rng.randint(50, 300))) + (" quimera" if index % 1000 == 0 else ""),
+        "date": start + timedelta(hours=index),
+        "fk_travel_diary_id": index % DIARIES + 1,
+    } for index in range(entries)]
+    session.execute(insert(Entry), rows)
+    session.commit()
+    return session
+
+
+def time_query(service: SearchService, query: str, diary_id, repeat: int) -> float:
+    service.search(query, diary_id)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = service.search(query, diary_id)
+    elapsed = (time.perf_counter() - start) / repeat
+    return elapsed * 1000, len(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        session = build_collection(Path(tmp) / "search.db", args.entries)
+        print(f"Indexed {args.entries} entries in {time.perf_counter() - start:.1f} s")
+        service = SearchService(session)
+        for label, query in (("rare word", "quimera"), ("two words", "vinho castelo"),
+                             ("prefix", "merc"), ("common word", "praia")):
+            for scope, diary_id in (("all diaries", None), ("one diary", 1)):
+                ms, found = time_query(service, query, diary_id, args.repeat)
+                print(f"{label:>12} / {scope:<11}: {ms:7.2f} ms  ({found} results)")
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,15 +12,20 @@ class Application:
         session = self.database.session()
         session_manager = ServiceManager()
         session_manager.set_session(session)
+        session_manager.set_session_factory(self.database.session)
+        session_manager.set_config_manager(self.config_manager)
         self.ui = UIApp(session_manager, self.config_manager)
 
     def run(self):
         print(f"URL do banco: {self.config_manager.database_url}")
         self.database.create()
         self.ui.run()
+        self.database.optimize()
 
     def get_service_manager(self):
         session = self.database.session()
         session_manager = ServiceManager()
         session_manager.set_session(session)
+        session_manager.set_session_factory(self.database.session)
+        session_manager.set_config_manager(self.config_manager)
         return session_manager
@@ -1,13 +1,25 @@
-from sqlalchemy import create_engine
+import sqlite3
+import time
+from threading import Lock
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 import os
 
+from pilgrim.migrations import migrate
 from pilgrim.utils import ConfigManager
+from pilgrim.utils.sqlite_profile import (DEFAULT_OPTIMIZE_INTERVAL, DEFAULT_SQLITE_PRAGMAS, apply_pragmas,
+                                          validate_pragmas)
 
 Base = declarative_base()
 
-
+# Connections shared by the UI session, per-operation sessions and background threads.
+# Checked out most-recently-used first, so the busy ones keep a warm page cache.
+POOL_SIZE = 5
+POOL_MAX_OVERFLOW = 10
+POOL_TIMEOUT = 30
 
 class Database:
 
@@ -23,14 +35,53 @@ class Database:
             f"sqlite:///{self.db_path}",
             echo=False,
             connect_args={"check_same_thread": False},
+            poolclass=QueuePool,
+            pool_size=POOL_SIZE,
+            max_overflow=POOL_MAX_OVERFLOW,
+            pool_timeout=POOL_TIMEOUT,
+            pool_use_lifo=True,
         )
         self._session_maker = sessionmaker(bind=self.engine, autoflush=False, autocommit=False)
 
+        pragmas = getattr(config_manager, "sqlite_pragmas", None)
+        self.pragmas = validate_pragmas(pragmas if isinstance(pragmas, dict) else DEFAULT_SQLITE_PRAGMAS)
+        optimize_interval = getattr(config_manager, "sqlite_optimize_interval", None)
+        self.optimize_interval = optimize_interval if isinstance(optimize_interval, int) else DEFAULT_OPTIMIZE_INTERVAL
+        self._optimize_lock = Lock()
+        self._last_optimize = time.monotonic()
+        event.listen(self.engine, "connect", self._apply_pragmas)
+        event.listen(self.engine, "checkin", self._optimize_now_and_then)
+
+    def _apply_pragmas(self, dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, self.pragmas)
+
+    def _optimize_now_and_then(self, dbapi_connection, connection_record):
+        """Runs PRAGMA optimize on a connection going back to the pool, at most once per optimize_interval."""
+        if not self.optimize_interval or dbapi_connection is None:
+            return
+        now = time.monotonic()
+        with self._optimize_lock:
+            if now - self._last_optimize < self.optimize_interval:
+                return
+            self._last_optimize = now
+        try:
+            dbapi_connection.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass  # Only statistics; the next run catches up
+
+    def optimize(self):
+        """Refreshes the query planner statistics that need it, e.g. before the app closes."""
+        with self.engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA optimize")
+
     def create(self):
+        """Creates the missing tables and migrates an existing database to the current schema."""
         Base.metadata.create_all(self.engine)
+        migrate(self.engine, Base.metadata)
 
-    def session(self):
-        return self._session_maker()
+    def session(self, **options):
+        """Returns a new session; options override the defaults (e.g. expire_on_commit=False)."""
+        return self._session_maker(**options)
 
     def get_db(self):
         return self._session_maker()
@@ -0,0 +1,80 @@
+import os
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import MetaData, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[Connection, MetaData], None]
+
+
+def _add_missing_columns(conn: Connection, metadata: MetaData):
+    """create_all() never alters existing tables, so add columns introduced after a database was created."""
+    inspector = inspect(conn)
+    for table in metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable and not column.primary_key:
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+
+
+def _create_indexes(*names: str) -> Callable[[Connection, MetaData], None]:
+    """A migration creating the named indexes, as the models declare them, where they are missing."""
+    def apply(conn: Connection, metadata: MetaData):
+        indexes = {index.name: index for table in metadata.tables.values() for index in table.indexes}
+        for name in names:
+            indexes[name].create(conn, checkfirst=True)
+    return apply
+
+
+def _backfill_photo_sizes(conn: Connection, metadata: MetaData):
+    """Photos added before file_size was recorded get the size of their file, where it still exists."""
+    sizes = []
+    for photo_id, filepath in conn.execute(text("SELECT id, filepath FROM photos WHERE file_size IS NULL")):
+        try:
+            sizes.append({"id": photo_id, "size": os.path.getsize(filepath)})
+        except (OSError, TypeError):
+            continue
+    if sizes:
+        conn.execute(text("UPDATE photos SET file_size = :size WHERE id = :id"), sizes)
+
+
+# Applied in order to databases whose PRAGMA user_version is older. A fresh database
+# already has every table and index from create_all(), so each migration must also be
+# harmless when its change is already there.
+MIGRATIONS = (
+    Migration(1, "Add the columns introduced before schema versioning", _add_missing_columns),
+    Migration(2, "Index the foreign keys: entries and photos by diary, photo links both ways",
+              _create_indexes("idx_entry_diary_date", "idx_photo_hash_diary", "idx_photo_diary",
+                              "idx_photo_entry_entry", "idx_photo_entry_photo")),
+    Migration(3, "Record the file size of photos added before it was stored", _backfill_photo_sizes),
+)
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(engine: Engine, metadata: MetaData) -> List[int]:
+    """
+    Brings the database schema up to LATEST_VERSION, one migration per transaction,
+    recording each one in PRAGMA user_version. Returns the versions applied.
+    """
+    applied = []
+    for migration in MIGRATIONS:
+        with engine.begin() as conn:
+            if schema_version(conn) >= migration.version:
+                continue
+            migration.apply(conn, metadata)
+            conn.exec_driver_sql(f"PRAGMA user_version = {migration.version}")
+        applied.append(migration.version)
+    if applied:
+        # Gives the planner statistics for the new indexes
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA optimize")
+    return applied
@@ -1,9 +1,12 @@
 from typing import Any, List
 
+from pilgrim.models.entry_search import drop_search_index, ensure_search_index
 from pilgrim.models.photo import Photo
 from pilgrim.models.photo_in_entry import photo_entry_association
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from pilgrim.models.photo_reference import remove_photo_references, sync_many_photo_references
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, event, inspect
+from sqlalchemy.orm import Session, object_session, relationship
+from sqlalchemy.sql.schema import Index
 
 from pilgrim.database import Base
 
@@ -21,6 +24,9 @@ class Entry(Base):
         back_populates="entries")
     fk_travel_diary_id = Column(Integer, ForeignKey("travel_diaries.id"), nullable=False)
     travel_diary = relationship("TravelDiary", back_populates="entries")
+    __table_args__ = (
+        Index('idx_entry_diary_date', 'fk_travel_diary_id', 'date'),
+    )
 
     def __init__(self, title: str, text: str, date: Any, travel_diary_id: int, photos: List[Photo] = None, **kw: Any):
         super().__init__(**kw)
@@ -31,3 +37,59 @@ class Entry(Base):
         if photos is not None:
             self.photos = photos
 
+
+# Reference changes are collected while a flush writes the entries and then written
+# together, so flushing many entries costs a few statements rather than a few per entry
+_PENDING_REFERENCES = "pilgrim.pending_photo_references"
+_REMOVED = object()
+
+
+def _pending_references(target) -> dict:
+    return object_session(target).info.setdefault(_PENDING_REFERENCES, {})
+
+
+@event.listens_for(Entry, "after_insert")
+def _index_new_entry_references(mapper, connection, target):
+    _pending_references(target)[target.id] = target.text
+
+
+@event.listens_for(Entry, "after_update")
+def _index_changed_entry_references(mapper, connection, target):
+    if inspect(target).attrs.text.history.has_changes():
+        _pending_references(target)[target.id] = target.text
+
+
+@event.listens_for(Entry, "after_delete")
+def _remove_entry_references(mapper, connection, target):
+    _pending_references(target)[target.id] = _REMOVED
+
+
+@event.listens_for(Session, "before_flush")
+def _reset_pending_references(session, flush_context, instances):
+    # Left over only if an earlier flush failed midway
+    session.info.pop(_PENDING_REFERENCES, None)
+
+
+@event.listens_for(Session, "after_flush")
+def _write_pending_references(session, flush_context):
+    pending = session.info.pop(_PENDING_REFERENCES, None)
+    if not pending:
+        return
+    connection = session.connection()
+    removed = [entry_id for entry_id, text in pending.items() if text is _REMOVED]
+    if removed:
+        remove_photo_references(connection, removed)
+    changed = {entry_id: text for entry_id, text in pending.items() if text is not _REMOVED}
+    if changed:
+        sync_many_photo_references(connection, changed)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_index(target, connection, **kw):
+    # Runs on every create_all(), so databases created before the index existed get it too
+    ensure_search_index(connection.exec_driver_sql)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    drop_search_index(connection.exec_driver_sql)
@@ -0,0 +1,60 @@
+from typing import Any, Callable
+
+# Full-text index over entries.title and entries.text. It is an external-content
+# FTS5 table: the text lives only in "entries", the index stores just the terms,
+# and the triggers below keep it in step with every INSERT/UPDATE/DELETE.
+SEARCH_TABLE = "entries_fts"
+SEARCH_TRIGGERS = ("entries_fts_insert", "entries_fts_delete", "entries_fts_update")
+
+# remove_diacritics 2: "sao" finds "São", "coracao" finds "coração"
+_CREATE_TABLE = (
+    f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+    "title, text, content='entries', content_rowid='id', prefix='2 3 4', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+
+_CREATE_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS entries_fts_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO {SEARCH_TABLE}(rowid, title, text) VALUES (new.id, new.title, new.text);
+END""",
+    f"""CREATE TRIGGER IF NOT EXISTS entries_fts_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+END""",
+    f"""CREATE TRIGGER IF NOT EXISTS entries_fts_update AFTER UPDATE OF title, text ON entries BEGIN
+    INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, title, text) VALUES ('delete', old.id, old.title, old.text);
+    INSERT INTO {SEARCH_TABLE}(rowid, title, text) VALUES (new.id, new.title, new.text);
+END""",
+)
+
+Execute = Callable[[str], Any]
+
+
+def fts5_available(execute: Execute) -> bool:
+    return bool(execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+
+
+def search_index_exists(execute: Execute) -> bool:
+    row = execute(f"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '{SEARCH_TABLE}'").fetchone()
+    return row is not None
+
+
+def ensure_search_index(execute: Execute) -> bool:
+    """
+    Creates the search index and its triggers if they are missing, indexing the
+    entries already in the database. execute runs one SQL string on the connection
+    (sqlite3's Connection.execute or SQLAlchemy's Connection.exec_driver_sql).
+    Returns True when the index was built now.
+    """
+    if search_index_exists(execute) or not fts5_available(execute):
+        return False
+    execute(_CREATE_TABLE)
+    for statement in _CREATE_TRIGGERS:
+        execute(statement)
+    execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def drop_search_index(execute: Execute):
+    for trigger in SEARCH_TRIGGERS:
+        execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
@@ -19,6 +19,7 @@ class Photo(Base):
     addition_date = Column(DateTime, default=datetime.now)
     caption = Column(String)
     photo_hash = Column(String,name='hash')
+    file_size = Column(Integer)
     entries = relationship(
         "Entry",
         secondary=photo_entry_association,
@@ -29,9 +30,11 @@ class Photo(Base):
     travel_diary = relationship("TravelDiary", back_populates="photos")
     __table_args__ = (
         Index('idx_photo_hash_diary', 'hash', 'fk_travel_diary_id'),
+        Index('idx_photo_diary', 'fk_travel_diary_id'),
     )
 
-    def __init__(self, filepath, name, photo_hash, addition_date=None, caption=None, entries=None, fk_travel_diary_id=None, **kw: Any):
+    def __init__(self, filepath, name, photo_hash, addition_date=None, caption=None, entries=None, fk_travel_diary_id=None,
+                 file_size=None, **kw: Any):
         super().__init__(**kw)
         # Convert Path to string if needed
         if isinstance(filepath, Path):
@@ -42,6 +45,7 @@ class Photo(Base):
         self.addition_date = addition_date if addition_date is not None else datetime.now()
         self.caption = caption
         self.photo_hash = photo_hash
+        self.file_size = file_size
         self.entries = entries if entries is not None else []
         if fk_travel_diary_id is not None:
             self.fk_travel_diary_id = fk_travel_diary_id
@@ -1,8 +1,12 @@
 from sqlalchemy import Table, Column, Integer, ForeignKey
+from sqlalchemy.sql.schema import Index
 
 from pilgrim.database import Base
 
 photo_entry_association = Table('photo_entry_association', Base.metadata,
 Column('id', Integer, primary_key=True, autoincrement=True),
     Column('fk_photo_id', Integer, ForeignKey('photos.id'),nullable=False),
-    Column('fk_entry_id', Integer, ForeignKey('entries.id'),nullable=False))
+    Column('fk_entry_id', Integer, ForeignKey('entries.id'),nullable=False),
+    # Entry.photos and Photo.entries each seek one of these and read the other id from it
+    Index('idx_photo_entry_entry', 'fk_entry_id', 'fk_photo_id'),
+    Index('idx_photo_entry_photo', 'fk_photo_id', 'fk_entry_id'))
@@ -0,0 +1,77 @@
+from typing import Dict, Iterable
+
+from sqlalchemy import Column, Integer, String, ForeignKey, event, select, delete, insert
+from sqlalchemy.sql.schema import Index
+
+from pilgrim.database import Base
+from pilgrim.utils.photo_references import find_references
+
+BACKFILL_BATCH_SIZE = 500
+# Entries (or rows) per statement when references are synced in bulk, well below
+# SQLite's limit on bound parameters
+SYNC_BATCH_SIZE = 500
+
+
+class PhotoReference(Base):
+    """
+    One [[photo::hash]] written in an entry's text, with its character offsets.
+    Derived from entries.text and kept in step with it by the Entry mapper events,
+    so "which entries reference this photo" never scans the texts.
+    """
+    __tablename__ = "photo_references"
+    id = Column(Integer, primary_key=True)
+    fk_entry_id = Column(Integer, ForeignKey("entries.id"), nullable=False)
+    photo_hash = Column(String, nullable=False)
+    start = Column(Integer, nullable=False)
+    end = Column(Integer, nullable=False)
+    __table_args__ = (
+        Index('idx_photo_reference_hash', 'photo_hash', 'fk_entry_id'),
+        Index('idx_photo_reference_entry', 'fk_entry_id'),
+    )
+
+
+def sync_photo_references(connection, entry_id: int, text: str | None):
+    """Brings an entry's indexed references in line with its text, touching only the rows that changed."""
+    sync_many_photo_references(connection, {entry_id: text})
+
+
+def sync_many_photo_references(connection, texts: Dict[int, str | None]):
+    """sync_photo_references for many entries at once, with one SELECT, DELETE and INSERT per batch."""
+    table = PhotoReference.__table__
+    entry_ids = list(texts)
+    for offset in range(0, len(entry_ids), SYNC_BATCH_SIZE):
+        batch = entry_ids[offset:offset + SYNC_BATCH_SIZE]
+        wanted = {entry_id: set(find_references(texts[entry_id])) for entry_id in batch}
+        existing = {
+            (row.fk_entry_id, row.photo_hash, row.start, row.end): row.id
+            for row in connection.execute(
+                select(table.c.id, table.c.fk_entry_id, table.c.photo_hash, table.c.start, table.c.end)
+                .where(table.c.fk_entry_id.in_(batch)))
+        }
+        stale = [row_id for key, row_id in existing.items() if key[1:] not in wanted[key[0]]]
+        for start in range(0, len(stale), SYNC_BATCH_SIZE):
+            connection.execute(delete(table).where(table.c.id.in_(stale[start:start + SYNC_BATCH_SIZE])))
+        added = [{"fk_entry_id": entry_id, "photo_hash": span.photo_hash, "start": span.start, "end": span.end}
+                 for entry_id, spans in wanted.items() for span in spans
+                 if (entry_id, *span) not in existing]
+        if added:
+            connection.execute(insert(table), added)
+
+
+def remove_photo_references(connection, entry_ids: Iterable[int]):
+    table = PhotoReference.__table__
+    entry_ids = list(entry_ids)
+    for offset in range(0, len(entry_ids), SYNC_BATCH_SIZE):
+        connection.execute(delete(table).where(table.c.fk_entry_id.in_(entry_ids[offset:offset + SYNC_BATCH_SIZE])))
+
+
+@event.listens_for(PhotoReference.__table__, "after_create")
+def _backfill_photo_references(target, connection, **kw):
+    """Indexes the references of entries written before the table existed."""
+    entries = target.metadata.tables["entries"]
+    result = connection.execute(select(entries.c.id, entries.c.text).where(entries.c.text.like("%[[photo::%")))
+    while rows := result.fetchmany(BACKFILL_BATCH_SIZE):
+        spans = [{"fk_entry_id": row.id, "photo_hash": span.photo_hash, "start": span.start, "end": span.end}
+                 for row in rows for span in find_references(row.text)]
+        if spans:
+            connection.execute(insert(target), spans)
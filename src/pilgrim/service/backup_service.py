@@ -1,34 +1,438 @@
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import Callable, Optional
 
+from sqlalchemy import create_engine
 
+from pilgrim.database import Base
+from pilgrim.migrations import migrate
+from pilgrim.models.entry_search import drop_search_index, ensure_search_index
+from pilgrim.models.photo import Photo
+from pilgrim.service.photo_service import PhotoService
 from pilgrim.utils.directory_manager import DirectoryManager
+from pilgrim.utils.filename_allocator import FilenameAllocator
+
+DUMP_NAME = "database.sql"
+MANIFEST_NAME = "manifest.json"
+FULL_BACKUP_NAME = "backup.zip"
+INCREMENTAL_BACKUP_PREFIX = "backup_incremental_"
+MANIFEST_VERSION = 2
+PREVIOUS_DATABASE_SUFFIX = ".before_restore"
+# Side files of a database in WAL mode; the log may hold commits not yet in the main file
+WAL_SUFFIXES = ("-wal", "-shm")
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+
+# progress(stage, done, total) of a restore, stage being "extracting" or "verifying"
+RestoreProgress = Callable[[str, int, int], None]
+
+# Formats that are already compressed: deflating them costs CPU for almost no size gain
+STORED_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.heif', '.avif',
+    '.cr2', '.cr3', '.nef', '.arw', '.orf', '.rw2', '.dng',
+    '.mp4', '.mov', '.zip', '.gz', '.xz', '.bz2', '.zst',
+}
 
 
 class BackupService:
     def __init__(self, session):
         self.session = session
 
-    def create_backup(self):
+    @staticmethod
+    def compression_for(file_path: Path) -> int:
+        """Picks the ZIP compression method for one archive member."""
+        if file_path.suffix.lower() in STORED_EXTENSIONS:
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
+
+    @staticmethod
+    def _snapshot_database(db_path: Path, snapshot_path: Path) -> Path:
+        """Copies the live database with SQLite's online backup API, giving a consistent snapshot."""
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(snapshot_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        return snapshot_path
+
+    @staticmethod
+    def _write_dump(zipf: zipfile.ZipFile, snapshot_path: Path):
+        """
+        Streams the SQL dump of the snapshot into the archive line by line. The search
+        index is left out: it is derived from the entries and rebuilt on restore.
+        """
+        conn = sqlite3.connect(snapshot_path)
+        try:
+            with conn:
+                drop_search_index(conn.execute)
+            member = zipf.open(DUMP_NAME, "w", force_zip64=True)
+            with io.TextIOWrapper(member, encoding="utf-8", newline="\n") as dump:
+                for line in conn.iterdump():
+                    dump.write(line)
+                    dump.write("\n")
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _file_roots() -> dict:
+        """Directories whose files go into a backup, keyed by their top-level folder in the archive."""
+        return {"diaries": DirectoryManager.get_diaries_root(), "blobs": DirectoryManager.get_blobs_root()}
+
+    def _photo_hashes_by_path(self) -> dict:
+        return {
+            os.path.normpath(filepath): photo_hash
+            for filepath, photo_hash in self.session.query(Photo.filepath, Photo.photo_hash)
+            if filepath and photo_hash
+        }
+
+    @staticmethod
+    def read_manifest(archive_path: Path) -> dict | None:
+        """Returns the manifest of a backup archive, or None for archives written before manifests existed."""
+        try:
+            with zipfile.ZipFile(archive_path, "r") as zipf:
+                return json.loads(zipf.read(MANIFEST_NAME))
+        except (KeyError, OSError, ValueError, zipfile.BadZipFile):
+            return None
+
+    @staticmethod
+    def list_backups(backup_dir: Path) -> list:
+        """Returns the full backup followed by the incremental ones, oldest first."""
+        backups = []
+        full_backup = backup_dir / FULL_BACKUP_NAME
+        if full_backup.exists():
+            backups.append(full_backup)
+        backups.extend(sorted(backup_dir.glob(f"{INCREMENTAL_BACKUP_PREFIX}*.zip")))
+        return backups
+
+    def _backed_up_photos(self, backup_dir: Path) -> dict:
+        """Maps every photo hash already stored in an existing backup to the archive and member holding its bytes."""
+        known = {}
+        for archive_path in self.list_backups(backup_dir):
+            manifest = self.read_manifest(archive_path)
+            if manifest is None:
+                continue
+            for photo_hash, photo in manifest.get("photos", {}).items():
+                holder = backup_dir / photo["archive"]
+                if holder.exists():
+                    known[photo_hash] = {"path": photo["path"], "archive": photo["archive"]}
+        return known
+
+    def create_backup(self, incremental: bool = False):
+        """
+        Writes the database dump and the diaries' files to a ZIP archive.
+        A full backup goes to backup.zip; an incremental one only stores photos whose
+        photo_hash is not already in an existing backup and records where the others are.
+        The manifest's "files" list names every photo of the snapshot with its hash, so
+        restore() can rebuild and verify all of them.
+        Returns (True, archive path) or (False, error message).
+        """
         db_path = DirectoryManager.get_database_path()
         if not db_path.exists():
             raise FileNotFoundError("No Database Found")
 
-        with self.session.connection() as conn:
-            raw_conn = conn.connection
-            dump = "\n".join(line for line in raw_conn.iterdump())
+        backup_dir = DirectoryManager.get_config_directory()
+        file_roots = self._file_roots()
+
+        if incremental:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            filename = backup_dir / f"{INCREMENTAL_BACKUP_PREFIX}{timestamp}.zip"
+            backed_up_photos = self._backed_up_photos(backup_dir)
+        else:
+            filename = backup_dir / FULL_BACKUP_NAME
+            backed_up_photos = {}
 
-        filename = DirectoryManager.get_config_directory() / "backup.zip"
-        diaries_root_path = DirectoryManager.get_diaries_root()
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "type": "incremental" if incremental else "full",
+            "created_at": datetime.now().isoformat(),
+            "diaries_root": str(file_roots["diaries"]),
+            "blobs_root": str(file_roots["blobs"]),
+            "photos": {},
+            "files": [],
+        }
 
         try:
-            with zipfile.ZipFile(filename, "w",zipfile.ZIP_DEFLATED) as zipf:
-                zipf.writestr("database.sql", dump)
-                if diaries_root_path.exists():
-                    for file_path in diaries_root_path.rglob('*'):
-                        if file_path.is_file():
-                            arcname = file_path.relative_to(diaries_root_path.parent)
-                            zipf.write(file_path, arcname=arcname)
-                return True, filename
+            photo_hashes = self._photo_hashes_by_path()
+            with tempfile.TemporaryDirectory(dir=backup_dir) as tmp_dir:
+                snapshot_path = self._snapshot_database(db_path, Path(tmp_dir) / "snapshot.db")
+                partial_path = Path(tmp_dir) / filename.name
+
+                with zipfile.ZipFile(partial_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+                    self._write_dump(zipf, snapshot_path)
+                    for root_name, root_path in file_roots.items():
+                        if not root_path.exists():
+                            continue
+                        for file_path in root_path.rglob('*'):
+                            if not file_path.is_file():
+                                continue
+                            arcname = f"{root_name}/{file_path.relative_to(root_path).as_posix()}"
+                            photo_hash = photo_hashes.get(os.path.normpath(file_path))
+                            if photo_hash:
+                                manifest["files"].append({"path": arcname, "hash": photo_hash})
+                            if photo_hash in backed_up_photos:
+                                manifest["photos"][photo_hash] = backed_up_photos[photo_hash]
+                                continue
+                            zipf.write(file_path, arcname=arcname, compress_type=self.compression_for(file_path))
+                            if photo_hash and photo_hash not in manifest["photos"]:
+                                manifest["photos"][photo_hash] = {"path": arcname, "archive": filename.name}
+                    zipf.writestr(MANIFEST_NAME, json.dumps(manifest, indent=1))
+
+                # Only replace an existing archive once the new one is complete
+                os.replace(partial_path, filename)
+            return True, filename
         except Exception as e:
             return False, str(e)
 
+    @staticmethod
+    def _iter_statements(dump):
+        """Yields the complete SQL statements of a dump, which may span several lines."""
+        buffer = []
+        for line in dump:
+            buffer.append(line)
+            statement = "".join(buffer)
+            if sqlite3.complete_statement(statement):
+                yield statement
+                buffer = []
+
+    def _rebuild_database(self, zipf: zipfile.ZipFile, db_path: Path):
+        """
+        Replays the archived dump into a new database in one transaction, creating
+        the indexes only after every row is inserted.
+        """
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        try:
+            # The file is thrown away if anything fails, so durability is not needed while loading
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            deferred = []
+            conn.execute("BEGIN")
+            with io.TextIOWrapper(zipf.open(DUMP_NAME), encoding="utf-8", newline="\n") as dump:
+                for statement in self._iter_statements(dump):
+                    keyword = statement.lstrip().upper()
+                    if keyword.startswith(("BEGIN", "COMMIT")):
+                        continue
+                    if keyword.startswith(("CREATE INDEX", "CREATE UNIQUE INDEX")):
+                        deferred.append(statement)
+                        continue
+                    conn.execute(statement)
+            for statement in deferred:
+                conn.execute(statement)
+            ensure_search_index(conn.execute)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _upgrade_database(db_path: Path):
+        """
+        Brings a restored database to the current schema, as Database.create does: the
+        dump carries no PRAGMA user_version, and older archives lack newer tables and columns.
+        """
+        engine = create_engine(f"sqlite:///{db_path}")
+        try:
+            Base.metadata.create_all(engine)
+            migrate(engine, Base.metadata)
+        finally:
+            engine.dispose()
+
+    @staticmethod
+    def _relocate_photo_paths(db_path: Path, old_root: str, new_root: Path):
+        """Points the photos' file paths under old_root at new_root, the matching directory on this machine."""
+        old_root = os.path.join(old_root, "")
+        new_root = os.path.join(str(new_root), "")
+        if old_root == new_root:
+            return
+        conn = sqlite3.connect(db_path)
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE photos SET filepath = ? || substr(filepath, ?) WHERE substr(filepath, 1, ?) = ?",
+                    (new_root, len(old_root) + 1, len(old_root), old_root),
+                )
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _staging_path(staging_dir: Path, arcname: str) -> Path:
+        """Maps an archive member under diaries/ or blobs/ to its place in the staging directory."""
+        parts = PurePosixPath(arcname).parts
+        target = staging_dir.joinpath(*parts).resolve()
+        if len(parts) < 2 or parts[0] not in ("diaries", "blobs") or staging_dir.resolve() not in target.parents:
+            raise ValueError(f"Unsafe path in backup: {arcname}")
+        return target
+
+    def _restore_jobs(self, archive_path: Path, members: list, manifest: dict | None) -> list:
+        """
+        Lists (archive, member, target path) copies: every file stored in the archive, plus the
+        photos an incremental backup only references in an older archive.
+        """
+        jobs = [(archive_path, member, member) for member in members]
+        if manifest is None:
+            return jobs
+        stored = set(members)
+        for photo in manifest.get("files", []):
+            if photo["path"] in stored:
+                continue
+            holder = manifest["photos"][photo["hash"]]
+            jobs.append((archive_path.parent / holder["archive"], holder["path"], photo["path"]))
+        return jobs
+
+    def _extract_parallel(self, jobs: list, staging_dir: Path, max_workers: int | None,
+                          progress: Optional[RestoreProgress] = None):
+        """Streams the archive members to the staging directory; each worker reads through its own ZipFile."""
+        local = threading.local()
+        opened = []
+        opened_lock = threading.Lock()
+
+        def archive_for(path: Path) -> zipfile.ZipFile:
+            archives = getattr(local, "archives", None)
+            if archives is None:
+                archives = local.archives = {}
+            if path not in archives:
+                archives[path] = zipfile.ZipFile(path, "r")
+                with opened_lock:
+                    opened.append(archives[path])
+            return archives[path]
+
+        def extract(job):
+            archive_path, member, arcname = job
+            target = self._staging_path(staging_dir, arcname)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with archive_for(archive_path).open(member) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst, EXTRACT_CHUNK_SIZE)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = [pool.submit(extract, job) for job in jobs]
+                for done, future in enumerate(as_completed(futures), start=1):
+                    future.result()
+                    if progress:
+                        progress("extracting", done, len(jobs))
+        finally:
+            for zipf in opened:
+                zipf.close()
+
+    def _verify_photos(self, staging_dir: Path, manifest: dict | None, max_workers: int | None,
+                       progress: Optional[RestoreProgress] = None) -> tuple:
+        """Hashes the restored photos in a thread pool and returns (verified count, mismatched paths)."""
+        if manifest is None:
+            return 0, []
+        files = manifest.get("files", [])
+
+        def matches(photo) -> bool:
+            return PhotoService.hash_file(self._staging_path(staging_dir, photo["path"])) == photo["hash"]
+
+        results = [False] * len(files)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(matches, photo): index for index, photo in enumerate(files)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                if progress:
+                    progress("verifying", done, len(files))
+        mismatched = [photo["path"] for photo, ok in zip(files, results) if not ok]
+        return len(files), mismatched
+
+    def _release_database(self):
+        """Closes the session and its pooled connections so the database file can be swapped."""
+        self.session.close()
+        self.session.get_bind().dispose()
+
+    @staticmethod
+    def _set_aside(db_path: Path, target: Path):
+        """Moves a database together with its WAL files, so a stale log is never applied to the restored one."""
+        os.replace(db_path, target)
+        for suffix in WAL_SUFFIXES:
+            side_file = db_path.with_name(db_path.name + suffix)
+            if side_file.exists():
+                os.replace(side_file, target.with_name(target.name + suffix))
+
+    @classmethod
+    def _keep_previous_database(cls, db_path: Path):
+        """
+        Sets the current database aside as <name>.before_restore. A copy left there by an
+        earlier restore is kept too, renamed after the time it was made.
+        """
+        previous = db_path.with_name(db_path.name + PREVIOUS_DATABASE_SUFFIX)
+        if previous.exists():
+            stamp = datetime.fromtimestamp(previous.stat().st_mtime).strftime("%Y%m%d_%H%M%S")
+            older = previous.with_name(f"{previous.name}_{stamp}")
+            counter = 1
+            while older.exists():
+                older = previous.with_name(f"{previous.name}_{stamp}_{counter}")
+                counter += 1
+            cls._set_aside(previous, older)
+        cls._set_aside(db_path, previous)
+
+    @staticmethod
+    def _install_files(staging_dir: Path, file_roots: dict):
+        for root_name, root_path in file_roots.items():
+            staged_root = staging_dir / root_name
+            for file_path in staged_root.rglob('*'):
+                if not file_path.is_file():
+                    continue
+                target = root_path / file_path.relative_to(staged_root)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(file_path, target)
+
+    def restore(self, archive_path: Path, max_workers: int | None = None,
+                progress: Optional[RestoreProgress] = None):
+        """
+        Restores the database and the diaries' files from a backup archive.
+        Everything is extracted and verified in a staging directory first, and the restored
+        database is migrated to the current schema; the current database is kept next to
+        the restored one with the .before_restore suffix (older such copies get a
+        timestamp). progress(stage, done, total) follows the extraction and the verification.
+        Returns (True, {"files": n, "verified": n}) or (False, error message).
+        """
+        archive_path = Path(archive_path)
+        if not archive_path.exists():
+            raise FileNotFoundError("No Backup Found")
+
+        db_path = DirectoryManager.get_database_path()
+        config_dir = DirectoryManager.get_config_directory()
+        file_roots = self._file_roots()
+        manifest = self.read_manifest(archive_path)
+
+        try:
+            with tempfile.TemporaryDirectory(dir=config_dir) as tmp_dir:
+                staging_dir = Path(tmp_dir) / "files"
+                staging_dir.mkdir()
+                restored_db = Path(tmp_dir) / "restored.db"
+
+                with zipfile.ZipFile(archive_path, "r") as zipf:
+                    members = [info.filename for info in zipf.infolist()
+                               if not info.is_dir() and info.filename not in (DUMP_NAME, MANIFEST_NAME)]
+                    self._rebuild_database(zipf, restored_db)
+
+                jobs = self._restore_jobs(archive_path, members, manifest)
+                self._extract_parallel(jobs, staging_dir, max_workers, progress)
+                verified, mismatched = self._verify_photos(staging_dir, manifest, max_workers, progress)
+                if mismatched:
+                    return False, f"{len(mismatched)} photo(s) do not match their hash: {', '.join(mismatched)}"
+
+                for root_name, root_path in file_roots.items():
+                    if manifest is not None and manifest.get(f"{root_name}_root"):
+                        self._relocate_photo_paths(restored_db, manifest[f"{root_name}_root"], root_path)
+
+                self._release_database()
+                self._install_files(staging_dir, file_roots)
+                # After the files are in place, so migrations reading them (photo sizes) find them
+                self._upgrade_database(restored_db)
+                if db_path.exists():
+                    self._keep_previous_database(db_path)
+                os.replace(restored_db, db_path)
+            DirectoryManager.invalidate()
+            FilenameAllocator.invalidate()
+            return True, {"files": len(jobs), "verified": verified}
+        except Exception as e:
+            return False, str(e)
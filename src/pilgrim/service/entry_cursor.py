@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from pilgrim.models.entry import Entry
+
+
+class EntrySummary:
+    """Lightweight row used to navigate a diary without loading entry texts."""
+    __slots__ = ("id", "title", "date")
+
+    def __init__(self, entry_id: int, title: str, date: datetime):
+        self.id = entry_id
+        self.title = title
+        self.date = date
+
+    def sort_key(self):
+        return self.date, self.id
+
+
+class EntryCursor:
+    """
+    Keeps the ids, titles and dates of a diary's entries in navigation order and
+    loads full entries on demand, holding at most cache_size of them in an LRU.
+    """
+
+    def __init__(self, entry_service, travel_diary_id: int, cache_size: int = 8):
+        self.entry_service = entry_service
+        self.travel_diary_id = travel_diary_id
+        self.cache_size = cache_size
+        self._summaries: List[EntrySummary] = []
+        self._cache: "OrderedDict[int, Entry]" = OrderedDict()
+
+    def load(self):
+        """(Re)loads the summaries for the diary and drops every cached entry."""
+        rows = self.entry_service.read_summaries_by_diary(self.travel_diary_id)
+        self._summaries = [EntrySummary(row.id, row.title, row.date) for row in rows]
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._summaries)
+
+    def summary(self, index: int) -> EntrySummary:
+        return self._summaries[index]
+
+    def index_of(self, entry_id: int) -> Optional[int]:
+        for index, summary in enumerate(self._summaries):
+            if summary.id == entry_id:
+                return index
+        return None
+
+    def max_id(self) -> Optional[int]:
+        return max((summary.id for summary in self._summaries), default=None)
+
+    def _remember(self, entry: Entry):
+        self._cache[entry.id] = entry
+        self._cache.move_to_end(entry.id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get(self, index: int) -> Optional[Entry]:
+        """Returns the full entry at index, loading it if it is not cached."""
+        entry_id = self._summaries[index].id
+        entry = self._cache.get(entry_id)
+        if entry is None:
+            entry = self.entry_service.read_by_id(entry_id)
+            if entry is None:
+                return None
+        self._remember(entry)
+        return entry
+
+    def neighbour_indexes(self, index: int, radius: int = 1) -> Iterable[int]:
+        start = max(index - radius, 0)
+        stop = min(index + radius + 1, len(self._summaries))
+        return (i for i in range(start, stop) if i != index)
+
+    def missing_neighbours(self, index: int, radius: int = 1) -> List[int]:
+        """Ids of the entries around index that are not cached yet."""
+        return [self._summaries[i].id for i in self.neighbour_indexes(index, radius)
+                if self._summaries[i].id not in self._cache]
+
+    def store(self, entries: Iterable[Entry]):
+        """
+        Caches entries loaded elsewhere, e.g. by a background prefetch. Entries already
+        cached, or no longer in the diary, are left out.
+        """
+        known = {summary.id for summary in self._summaries}
+        for entry in entries:
+            if entry.id in known and entry.id not in self._cache:
+                self._remember(entry)
+
+    def prefetch(self, index: int, radius: int = 1):
+        """Loads the entries around index that are not cached yet with a single query."""
+        missing = self.missing_neighbours(index, radius)
+        if missing:
+            self.store(self.entry_service.read_by_ids(missing))
+
+    def add(self, entry: Entry) -> int:
+        """Inserts a newly created entry in navigation order and returns its index."""
+        summary = EntrySummary(entry.id, entry.title, entry.date)
+        index = len(self._summaries)
+        while index > 0 and self._summaries[index - 1].sort_key() > summary.sort_key():
+            index -= 1
+        self._summaries.insert(index, summary)
+        self._remember(entry)
+        return index
+
+    def set_title(self, index: int, title: str):
+        self._summaries[index].title = title
+
+    def cached_ids(self) -> List[int]:
+        return list(self._cache.keys())
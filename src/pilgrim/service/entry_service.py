@@ -1,10 +1,16 @@
-import re
 from datetime import datetime
-from typing import List
+from itertools import groupby
+from operator import attrgetter
+from typing import Dict, List, Set
+
+from sqlalchemy import bindparam, func, inspect, select, update
+from sqlalchemy.orm.util import identity_key
 
 from pilgrim.models.entry import Entry
 from pilgrim.models.travel_diary import TravelDiary
 from pilgrim.models.photo import Photo  # ✨ Importe o modelo Photo
+from pilgrim.models.photo_reference import PhotoReference, sync_many_photo_references, sync_photo_references
+from pilgrim.utils.photo_references import HASH_PREFIX_LENGTH, blank_spans, find_references
 
 
 class EntryService:
@@ -35,6 +41,33 @@ class EntryService:
         entries = self.session.query(Entry).all()
         return entries
 
+    def _diary_query(self, travel_diary_id: int):
+        return (self.session.query(Entry)
+                .filter(Entry.fk_travel_diary_id == travel_diary_id)
+                .order_by(Entry.date, Entry.id))
+
+    def read_by_diary(self, travel_diary_id: int, offset: int = 0, limit: int | None = None) -> List[Entry]:
+        """Returns one page of a diary's entries, ordered by date (uses idx_entry_diary_date)."""
+        query = self._diary_query(travel_diary_id).offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def read_summaries_by_diary(self, travel_diary_id: int):
+        """Returns (id, title, date) rows for a diary without loading the entry texts."""
+        return (self.session.query(Entry.id, Entry.title, Entry.date)
+                .filter(Entry.fk_travel_diary_id == travel_diary_id)
+                .order_by(Entry.date, Entry.id)
+                .all())
+
+    def read_by_ids(self, entry_ids: List[int]) -> List[Entry]:
+        if not entry_ids:
+            return []
+        return self.session.query(Entry).filter(Entry.id.in_(entry_ids)).all()
+
+    def count_by_diary(self, travel_diary_id: int) -> int:
+        return self.session.query(Entry).filter(Entry.fk_travel_diary_id == travel_diary_id).count()
+
     def update(self, entry_src: Entry, entry_dst: Entry) -> Entry | None:
         original: Entry = self.read_by_id(entry_src.id)
         if original:
@@ -48,6 +81,22 @@ class EntryService:
             return original
         return None
 
+    def write_draft_text(self, entry_id: int, expected_text: str | None, text: str) -> bool:
+        """
+        Stores autosaved text in an entry, but only if its text is still expected_text,
+        so a draft never overwrites a save made in the meantime. Photo links are left
+        for the explicit save, which validates them.
+        """
+        table = Entry.__table__
+        result = self.session.execute(
+            update(table)
+            .where(table.c.id == entry_id, table.c.text.is_not_distinct_from(expected_text))
+            .values(text=text))
+        if result.rowcount:
+            sync_photo_references(self.session.connection(), entry_id, text)
+        self.session.commit()
+        return bool(result.rowcount)
+
     def delete(self, entry_src: Entry) -> Entry | None:
         excluded = self.read_by_id(entry_src.id)
         if excluded is not None:
@@ -57,9 +106,46 @@ class EntryService:
         return None
 
 
+    def find_entries_referencing(self, photo: Photo) -> List[Entry]:
+        """Returns the entries of the photo's diary whose text references it (an index lookup)."""
+        return (self.session.query(Entry)
+                .join(PhotoReference, PhotoReference.fk_entry_id == Entry.id)
+                .filter(PhotoReference.photo_hash == photo.photo_hash[:HASH_PREFIX_LENGTH],
+                        Entry.fk_travel_diary_id == photo.fk_travel_diary_id)
+                .distinct()
+                .order_by(Entry.date, Entry.id)
+                .all())
+
+    @staticmethod
+    def _blanked_text(text: str, photo_hashes: Set[str], rows: List, reparse: bool = False) -> str:
+        """
+        text with its references to photo_hashes blanked at the offsets in the index rows.
+        If the offsets no longer line up (or reparse is set), the text is parsed instead.
+        """
+        spans = [(row.start, row.end) for row in rows
+                 if text[row.start:row.end] == f"[[photo::{row.photo_hash}]]"]
+        if reparse or len(spans) != len(rows):
+            spans = [(span.start, span.end) for span in find_references(text) if span.photo_hash in photo_hashes]
+        return blank_spans(text, spans) if spans else text
+
+    def _blank_references(self, entry: Entry, photo_hashes: Set[str], rows: List | None = None):
+        """
+        Blanks the entry's references to photo_hashes at the offsets recorded in the
+        reference index (rows, if the caller already read them). If the text was changed
+        since the index was last written, the text is parsed instead.
+        """
+        if not entry.text or not photo_hashes:
+            return
+        if rows is None:
+            rows = (self.session.query(PhotoReference.photo_hash, PhotoReference.start, PhotoReference.end)
+                    .filter(PhotoReference.fk_entry_id == entry.id, PhotoReference.photo_hash.in_(photo_hashes))
+                    .all())
+        text = self._blanked_text(entry.text, photo_hashes, rows, inspect(entry).attrs.text.history.has_changes())
+        if text != entry.text:
+            entry.text = text
+
     def delete_references_for_specific_photo(self, entry: Entry, photo_hash: str) -> Entry:
-        regex = r"\[\[photo::" + re.escape(photo_hash) + r"\]\]"
-        entry.text = re.sub(regex, lambda match: ' ' * len(match.group(0)), entry.text)
+        self._blank_references(entry, {photo_hash})
 
         self.session.commit()
         self.session.refresh(entry)
@@ -69,10 +155,72 @@ class EntryService:
     def delete_all_photo_references(self, entry: Entry, commit=True) -> Entry:
         if not entry.photos:
             return entry
-        photo_hashes = {photo.photo_hash[:8] for photo in entry.photos}
-        regex = r"\[\[photo::(" + "|".join(re.escape(h) for h in photo_hashes) + r")\]\]"
-        entry.text = re.sub(regex, lambda match: ' ' * len(match.group(0)), entry.text)
+        self._blank_references(entry, {photo.photo_hash[:HASH_PREFIX_LENGTH] for photo in entry.photos})
         if commit:
             self.session.commit()
             self.session.refresh(entry)
         return entry
+
+    def delete_references_to_photos(self, photos: List[Photo], commit=True) -> List[Entry]:
+        """
+        Blanks every reference to the given photos in the texts of their diaries,
+        finding the entries through the reference index. Returns the entries changed.
+        Runs two queries per diary, however many entries are involved.
+        """
+        hashes_by_diary: Dict[int, Set[str]] = {}
+        for photo in photos:
+            hashes_by_diary.setdefault(photo.fk_travel_diary_id, set()).add(photo.photo_hash[:HASH_PREFIX_LENGTH])
+        changed = []
+        for travel_diary_id, photo_hashes in hashes_by_diary.items():
+            rows_by_entry: Dict[int, list] = {}
+            for row in (self.session.query(PhotoReference.fk_entry_id, PhotoReference.photo_hash,
+                                           PhotoReference.start, PhotoReference.end)
+                        .join(Entry, PhotoReference.fk_entry_id == Entry.id)
+                        .filter(PhotoReference.photo_hash.in_(photo_hashes),
+                                Entry.fk_travel_diary_id == travel_diary_id)):
+                rows_by_entry.setdefault(row.fk_entry_id, []).append(row)
+            entries = self.read_by_ids(list(rows_by_entry))
+            for entry in entries:
+                self._blank_references(entry, photo_hashes, rows_by_entry[entry.id])
+                changed.append(entry)
+        if commit and changed:
+            self.session.commit()
+        return changed
+
+    def delete_diary_photo_references(self, travel_diary_id: int, commit=True) -> int:
+        """
+        Blanks every reference to a photo of the diary in its entries' texts, e.g. before
+        all its photos are deleted. Set-based: the entries are found through the reference
+        index, only their ids and texts are read, and the new texts go out in one
+        executemany UPDATE. Returns the number of entries changed.
+        """
+        diary_hashes = (select(func.substr(Photo.photo_hash, 1, HASH_PREFIX_LENGTH))
+                        .where(Photo.fk_travel_diary_id == travel_diary_id))
+        rows = self.session.execute(
+            select(Entry.id, Entry.text, PhotoReference.photo_hash, PhotoReference.start, PhotoReference.end)
+            .join(PhotoReference, PhotoReference.fk_entry_id == Entry.id)
+            .where(Entry.fk_travel_diary_id == travel_diary_id, PhotoReference.photo_hash.in_(diary_hashes))
+            .order_by(Entry.id))
+        texts = {}
+        changed = {}
+        for entry_id, entry_rows in groupby(rows, key=attrgetter("id")):
+            entry_rows = list(entry_rows)
+            text = entry_rows[0].text
+            texts[entry_id] = self._blanked_text(text, {row.photo_hash for row in entry_rows}, entry_rows)
+            if texts[entry_id] != text:
+                changed[entry_id] = texts[entry_id]
+        if changed:
+            table = Entry.__table__
+            self.session.execute(
+                update(table).where(table.c.id == bindparam("entry_id")).values(text=bindparam("entry_text")),
+                [{"entry_id": entry_id, "entry_text": text} for entry_id, text in changed.items()])
+        if texts:
+            # The UPDATE bypasses the mapper events that keep the reference index in step
+            sync_many_photo_references(self.session.connection(), texts)
+        for entry_id in changed:
+            entry = self.session.identity_map.get(identity_key(Entry, entry_id))
+            if entry is not None:
+                self.session.expire(entry, ["text"])
+        if commit:
+            self.session.commit()
+        return len(changed)
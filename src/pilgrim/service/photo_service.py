@@ -1,27 +1,43 @@
-import hashlib
+import asyncio
 import os
-import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_
 
 from pilgrim.models.photo import Photo
 from pilgrim.models.travel_diary import TravelDiary
-from pilgrim.utils import DirectoryManager
+from pilgrim.utils import DirectoryManager, FileHasher
+from pilgrim.utils.blob_store import DEFAULT_STORAGE_MODE, BlobStore
+from pilgrim.utils.file_ingestion import DEFAULT_INGESTION_MODE, ingest_file
+from pilgrim.utils.filename_allocator import FilenameAllocator
+
+# Keeps the bound parameters of a single prefix lookup well below SQLite's limit
+PREFIX_QUERY_CHUNK_SIZE = 200
+
+# Extensions picked up when importing a whole directory tree
+IMPORT_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.heic', '.heif', '.avif', '.tif', '.tiff'}
+
+# progress(stage, done, total), stage being "hashing" or "copying"
+ImportProgress = Callable[[str, int, int], None]
+# progress(stage, done, total) of remove_files, stage being "removing"
+RemovalProgress = ImportProgress
 
 
 class PhotoService:
     def __init__(self, session):
         self.session = session
+        self.ingestion_mode = DEFAULT_INGESTION_MODE
+        self.storage_mode = DEFAULT_STORAGE_MODE
+        # Optional ThumbnailCache; new photos get their preview generated in the background
+        self.thumbnail_cache = None
 
     @staticmethod
     def hash_file(filepath: Path) -> str:
-        """Calculate the hash of a file using SHA3-384."""
-        hash_func = hashlib.new('sha3_384')
-        with open(filepath, 'rb') as f:
-            while chunk := f.read(8192):
-                hash_func.update(chunk)
-        return hash_func.hexdigest()
+        """Calculate the hash of a file using SHA3-384 (cached by FileHasher)."""
+        return FileHasher.hash_file(filepath)
 
     def _ensure_images_directory(self, travel_diary: TravelDiary) -> Path:
         """
@@ -29,12 +45,7 @@ class PhotoService:
         Returns the path to the images directory.
         """
         images_dir = DirectoryManager.get_diary_images_directory(travel_diary.directory_name)
-
-        if not images_dir.exists():
-            images_dir.mkdir(parents=True)
-            os.chmod(images_dir, 0o700)  # Ensure correct permissions
-
-        return images_dir
+        return DirectoryManager.ensure_directory(images_dir, parents=True)
 
     def _copy_photo_to_diary(self, source_path: Path, travel_diary: TravelDiary) -> Path:
         """
@@ -42,28 +53,96 @@ class PhotoService:
         Returns the path to the copied file.
         """
         images_dir = self._ensure_images_directory(travel_diary)
+        # If a file with the same name exists, a number is added (foto_1.jpg, foto_2.jpg, ...)
+        dest_path = FilenameAllocator.allocate(images_dir, Path(source_path).name)
+        self._copy_file(source_path, dest_path)
+        return dest_path
 
-        # Get original filename and extension
-        original_name = Path(source_path).name
+    def _copy_file(self, source_path: Path, dest_path: Path) -> str | None:
+        """Places the file with the configured ingestion mode; returns its hash if that mode computed it."""
+        return ingest_file(source_path, dest_path, self.ingestion_mode)
 
-        # Create destination path
-        dest_path = images_dir / original_name
+    def _find_blob(self, photo_hash: str) -> Path | None:
+        """Returns the blob already holding these bytes (possibly for another diary), if any."""
+        blobs_root = str(DirectoryManager.get_blobs_root())
+        for (filepath,) in (self.session.query(Photo.filepath)
+                            .filter(Photo.photo_hash == photo_hash, Photo.filepath.startswith(blobs_root))):
+            if Path(filepath).exists():
+                return Path(filepath)
+        return None
 
-        # If file with same name exists, add a number
-        counter = 1
-        while dest_path.exists():
-            name_parts = original_name.rsplit('.', 1)
-            if len(name_parts) > 1:
-                dest_path = images_dir / f"{name_parts[0]}_{counter}.{name_parts[1]}"
-            else:
-                dest_path = images_dir / f"{original_name}_{counter}"
-            counter += 1
+    def _store_blob(self, source_path: Path, photo_hash: str) -> Path:
+        return self._find_blob(photo_hash) or BlobStore.put(source_path, photo_hash, self.ingestion_mode)
 
-        # Copy the file
-        shutil.copy2(source_path, dest_path)
-        os.chmod(dest_path, 0o600)  # Read/write for owner only
+    def _store_photo(self, source_path: Path, photo_hash: str, travel_diary: TravelDiary) -> Path:
+        """Puts a new photo in the configured storage and returns where it ended up."""
+        if self.storage_mode == "blobs":
+            return self._store_blob(source_path, photo_hash)
+        return self._copy_photo_to_diary(source_path, travel_diary)
 
-        return dest_path
+    def blob_references(self, blob_path) -> int:
+        """Number of photos (across all diaries) pointing at a blob."""
+        return self.session.query(func.count(Photo.id)).filter(Photo.filepath == str(blob_path)).scalar()
+
+    def _unused_blobs(self, filepaths: Iterable) -> set:
+        blobs = {str(filepath) for filepath in filepaths if filepath and BlobStore.contains(str(filepath))}
+        if not blobs:
+            return set()
+        # One query for all of them: the blobs some photo still points at
+        in_use = {filepath for (filepath,) in
+                  self.session.query(Photo.filepath).filter(Photo.filepath.in_(blobs)).distinct()}
+        return blobs - in_use
+
+    def release_blobs(self, filepaths: Iterable) -> int:
+        """
+        Unlinks the blobs among filepaths that no photo references anymore. Call it after
+        the deleting transaction is committed. Returns how many blobs were removed.
+        """
+        unused = self._unused_blobs(filepaths)
+        for filepath in unused:
+            Path(filepath).unlink(missing_ok=True)
+        return len(unused)
+
+    def remove_files(self, filepaths: Iterable, progress: Optional[RemovalProgress] = None,
+                     max_workers: int | None = None) -> int:
+        """
+        Removes the files of photos deleted in bulk: the diaries' own copies, and the blobs
+        no photo uses anymore. Call it after the deleting transaction is committed. The
+        unlinks run on a thread pool. Returns how many files were removed.
+        """
+        filepaths = {str(filepath) for filepath in filepaths if filepath}
+        diaries_root = str(DirectoryManager.get_diaries_root())
+        doomed = [Path(filepath) for filepath in filepaths
+                  if diaries_root in filepath and not BlobStore.contains(filepath)]
+        doomed.extend(Path(filepath) for filepath in self._unused_blobs(filepaths))
+        if not doomed:
+            return 0
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            removed = self._run_stage(pool, self._unlink, doomed, "removing", progress)
+        return sum(1 for result in removed if result)
+
+    @staticmethod
+    def _unlink(path: Path) -> bool:
+        path.unlink()
+        return True
+
+    def _schedule_thumbnails(self, photos: Iterable[Photo]):
+        if self.thumbnail_cache is None:
+            return
+        for photo in photos:
+            self.thumbnail_cache.schedule(Path(photo.filepath), photo.photo_hash)
+
+    def _remove_diary_copy(self, file_path: Path):
+        """Deletes a photo file owned by a diary; blobs are left to release_blobs()."""
+        if file_path.exists() and str(DirectoryManager.get_diaries_root()) in str(file_path):
+            file_path.unlink()
+
+    @staticmethod
+    def _file_size(filepath: Path) -> int | None:
+        try:
+            return os.path.getsize(filepath)
+        except OSError:
+            return None
 
     def check_photo_by_hash(self, photohash:str, traveldiaryid:int):
         photo = (self.session.query(Photo).filter(Photo.photo_hash == photohash,Photo.fk_travel_diary_id == traveldiaryid)
@@ -78,9 +157,10 @@ class PhotoService:
         if self.check_photo_by_hash(photo_hash, travel_diary_id):
             return None
 
-        # Copy photo to diary's images directory
-        copied_path = self._copy_photo_to_diary(filepath, travel_diary)
-        
+        # Copy photo to diary's images directory (or the shared blob store)
+        copied_path = self._store_photo(filepath, photo_hash, travel_diary)
+        FileHasher.remember(copied_path, photo_hash)
+
         # Convert addition_date string to datetime if needed
         if isinstance(addition_date, str):
             try:
@@ -95,37 +175,275 @@ class PhotoService:
             caption=caption, 
             fk_travel_diary_id=travel_diary_id,
             addition_date=addition_date,
-            photo_hash=photo_hash
+            photo_hash=photo_hash,
+            file_size=self._file_size(copied_path)
         )
         self.session.add(new_photo)
         self.session.commit()
         self.session.refresh(new_photo)
+        self._schedule_thumbnails([new_photo])
 
         return new_photo
 
+    @staticmethod
+    def collect_photo_paths(root: Path) -> List[Path]:
+        """Lists the image files below root, in a stable order."""
+        found = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if Path(filename).suffix.lower() in IMPORT_EXTENSIONS:
+                    found.append(Path(dirpath) / filename)
+        return found
+
+    def _existing_hashes(self, travel_diary_id: int) -> set:
+        return {photo_hash for (photo_hash,) in
+                self.session.query(Photo.photo_hash).filter(Photo.fk_travel_diary_id == travel_diary_id)}
+
+    @staticmethod
+    def _run_stage(pool: ThreadPoolExecutor, func, items: list, stage: str,
+                   progress: Optional[ImportProgress]) -> list:
+        """Runs func over items on the pool, reporting progress as they finish; failures give None."""
+        results = [None] * len(items)
+        futures = {pool.submit(func, item): index for index, item in enumerate(items)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                results[futures[future]] = future.result()
+            except OSError:
+                pass
+            if progress:
+                progress(stage, done, len(items))
+        return results
+
+    @staticmethod
+    def _reserve_destinations(images_dir: Path, sources: List[Path]) -> List[Tuple[Path, Path]]:
+        """Hands out destination names before copying so concurrent copies never collide."""
+        return [(source, FilenameAllocator.allocate(images_dir, source.name)) for source in sources]
+
+    def _known_blobs(self) -> Dict[str, Path]:
+        blobs_root = str(DirectoryManager.get_blobs_root())
+        rows = self.session.query(Photo.photo_hash, Photo.filepath).filter(Photo.filepath.startswith(blobs_root))
+        return {photo_hash: Path(filepath) for photo_hash, filepath in rows if Path(filepath).exists()}
+
+    def _import_targets(self, travel_diary: TravelDiary) -> tuple:
+        """What the file stage of an import needs from the database, read on the session's thread."""
+        known_blobs = self._known_blobs() if self.storage_mode == "blobs" else None
+        return self._ensure_images_directory(travel_diary), self._existing_hashes(travel_diary.id), known_blobs
+
+    def _stage_import_files(self, filepaths: List[Path], images_dir: Path, existing_hashes: set,
+                            known_blobs: Optional[Dict[str, Path]] = None,
+                            progress: Optional[ImportProgress] = None,
+                            max_workers: int | None = None) -> Tuple[list, List[Path]]:
+        """
+        Hashes the files and copies the new ones into the diary (or the blob store, when
+        known_blobs is given) concurrently. Touches no database state, so it can run away
+        from the session's thread.
+        Returns ([(source, copied path, hash)], skipped paths).
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            if self.ingestion_mode == "hash_copy" and known_blobs is None:
+                return self._stage_single_pass(pool, filepaths, images_dir, existing_hashes, progress)
+
+            hashes = self._run_stage(pool, FileHasher.hash_file, filepaths, "hashing", progress)
+
+            skipped = []
+            to_copy = {}
+            seen = set(existing_hashes)
+            for source, photo_hash in zip(filepaths, hashes):
+                if photo_hash is None or photo_hash in seen:
+                    skipped.append(source)
+                    continue
+                seen.add(photo_hash)
+                to_copy[source] = photo_hash
+
+            if known_blobs is not None:
+                def store(source):
+                    photo_hash = to_copy[source]
+                    blob_path = known_blobs.get(photo_hash) or BlobStore.put(source, photo_hash, self.ingestion_mode)
+                    FileHasher.remember(blob_path, photo_hash)
+                    return source, blob_path, photo_hash
+
+                stored = self._run_stage(pool, store, list(to_copy), "copying", progress)
+                skipped.extend(source for source, result in zip(to_copy, stored) if result is None)
+                return [result for result in stored if result is not None], skipped
+
+            jobs = self._reserve_destinations(images_dir, list(to_copy))
+
+            def copy(job):
+                source, dest_path = job
+                self._copy_file(source, dest_path)
+                FileHasher.remember(dest_path, to_copy[source])
+                return source, dest_path, to_copy[source]
+
+            copied = self._run_stage(pool, copy, jobs, "copying", progress)
+
+        staged = []
+        for (source, _), result in zip(jobs, copied):
+            if result is None:
+                skipped.append(source)
+            else:
+                staged.append(result)
+        return staged, skipped
+
+    def _stage_single_pass(self, pool: ThreadPoolExecutor, filepaths: List[Path], images_dir: Path,
+                           existing_hashes: set, progress: Optional[ImportProgress]) -> Tuple[list, List[Path]]:
+        """hash_copy mode: each file is read once, hashed while copied; duplicate copies are removed afterwards."""
+        jobs = self._reserve_destinations(images_dir, filepaths)
+        hashes = self._run_stage(pool, lambda job: self._copy_file(*job), jobs, "copying", progress)
+
+        staged = []
+        skipped = []
+        seen = set(existing_hashes)
+        for (source, dest_path), photo_hash in zip(jobs, hashes):
+            if photo_hash is None or photo_hash in seen:
+                dest_path.unlink(missing_ok=True)
+                skipped.append(source)
+                continue
+            seen.add(photo_hash)
+            staged.append((source, dest_path, photo_hash))
+        return staged, skipped
+
+    def _insert_imported(self, travel_diary_id: int, staged: list) -> List[Photo]:
+        """Adds all the staged photos in a single transaction; the copies are removed if it fails."""
+        new_photos = [
+            Photo(
+                filepath=str(dest_path),
+                name=source.stem,
+                fk_travel_diary_id=travel_diary_id,
+                photo_hash=photo_hash,
+                file_size=self._file_size(dest_path),
+            )
+            for source, dest_path, photo_hash in staged
+        ]
+        try:
+            self.session.add_all(new_photos)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            blob_paths = []
+            for _, dest_path, _ in staged:
+                if BlobStore.contains(dest_path):
+                    blob_paths.append(dest_path)
+                else:
+                    dest_path.unlink(missing_ok=True)
+            # Blobs may be shared with other diaries; only the unreferenced ones go
+            self.release_blobs(blob_paths)
+            raise
+        self._schedule_thumbnails(new_photos)
+        return new_photos
+
+    def import_many(self, filepaths: Iterable[Path], travel_diary_id: int,
+                    progress: Optional[ImportProgress] = None,
+                    max_workers: int | None = None) -> Tuple[List[Photo], List[Path]] | None:
+        """
+        Imports many photos at once: hashing and copying run on a thread pool, files whose
+        hash is already in the diary (or earlier in the batch) are skipped, and every row
+        is inserted with one commit.
+        Returns (new photos, skipped paths), or None if the diary does not exist.
+        """
+        travel_diary = self.session.query(TravelDiary).filter(TravelDiary.id == travel_diary_id).first()
+        if not travel_diary:
+            return None
+        filepaths = [Path(filepath) for filepath in filepaths]
+        staged, skipped = self._stage_import_files(
+            filepaths, *self._import_targets(travel_diary), progress, max_workers
+        )
+        return self._insert_imported(travel_diary_id, staged), skipped
+
+    async def import_many_async(self, filepaths: Iterable[Path], travel_diary_id: int,
+                                progress: Optional[ImportProgress] = None,
+                                max_workers: int | None = None) -> Tuple[List[Photo], List[Path]] | None:
+        """
+        Same as import_many, but the file work runs in a worker thread and progress is
+        delivered on the event loop, so the UI stays responsive.
+        """
+        travel_diary = self.session.query(TravelDiary).filter(TravelDiary.id == travel_diary_id).first()
+        if not travel_diary:
+            return None
+        loop = asyncio.get_running_loop()
+
+        def report(stage: str, done: int, total: int):
+            loop.call_soon_threadsafe(progress, stage, done, total)
+
+        filepaths = [Path(filepath) for filepath in filepaths]
+        staged, skipped = await loop.run_in_executor(
+            None, self._stage_import_files, filepaths, *self._import_targets(travel_diary),
+            report if progress else None, max_workers
+        )
+        return self._insert_imported(travel_diary_id, staged), skipped
+
     def read_by_id(self, photo_id:int) -> Photo:
         return self.session.query(Photo).get(photo_id)
 
     def read_all(self) -> List[Photo]:
         return self.session.query(Photo).all()
 
+    def read_by_ids(self, photo_ids: List[int]) -> List[Photo]:
+        if not photo_ids:
+            return []
+        return self.session.query(Photo).filter(Photo.id.in_(photo_ids)).all()
+
+    def read_by_diary(self, travel_diary_id: int) -> List[Photo]:
+        return (self.session.query(Photo)
+                .filter(Photo.fk_travel_diary_id == travel_diary_id)
+                .order_by(Photo.id)
+                .all())
+
+    @staticmethod
+    def _prefix_upper_bound(prefix: str) -> str:
+        """Smallest string greater than every string starting with prefix."""
+        return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+    def find_by_hash_prefix(self, travel_diary_id: int, prefixes: Iterable[str]) -> Dict[str, List[Photo]]:
+        """
+        Resolves hash prefixes (as used in [[photo::xxxxxxxx]] references) to the
+        diary's photos. Each prefix becomes a range on idx_photo_hash_diary, so the
+        whole set is resolved with one query per chunk of prefixes.
+        Returns a dict mapping every requested prefix to its matching photos.
+        """
+        unique_prefixes = sorted({prefix for prefix in prefixes if prefix})
+        matches: Dict[str, List[Photo]] = {prefix: [] for prefix in unique_prefixes}
+
+        for start in range(0, len(unique_prefixes), PREFIX_QUERY_CHUNK_SIZE):
+            chunk = unique_prefixes[start:start + PREFIX_QUERY_CHUNK_SIZE]
+            ranges = [
+                and_(Photo.photo_hash >= prefix, Photo.photo_hash < self._prefix_upper_bound(prefix))
+                for prefix in chunk
+            ]
+            photos = (self.session.query(Photo)
+                      .filter(Photo.fk_travel_diary_id == travel_diary_id, or_(*ranges))
+                      .order_by(Photo.id)
+                      .all())
+            chunk_prefixes = set(chunk)
+            prefix_lengths = {len(prefix) for prefix in chunk}
+            for photo in photos:
+                for length in prefix_lengths:
+                    key = photo.photo_hash[:length]
+                    if key in chunk_prefixes:
+                        matches[key].append(photo)
+        return matches
+
     def update(self, photo_src: Photo, photo_dst: Photo) -> Photo | None:
         original: Photo = self.read_by_id(photo_src.id)
         if original:
+            released_path = None
             # If filepath changed, need to copy new file
             if str(photo_dst.filepath) != str(original.filepath):
                 travel_diary = self.session.query(TravelDiary).filter(
                     TravelDiary.id == original.fk_travel_diary_id).first()
                 if travel_diary:
-                    # Copy new photo
-                    new_path = self._copy_photo_to_diary(Path(photo_dst.filepath), travel_diary)
+                    # Hash the source once (usually cached by now) and let the copy inherit it
+                    source_path = Path(photo_dst.filepath)
+                    new_hash = self.hash_file(source_path)
+                    new_path = self._store_photo(source_path, new_hash, travel_diary)
+                    FileHasher.remember(new_path, new_hash)
                     # Delete old photo if it exists in our images directory
                     old_path = Path(original.filepath)
-                    if old_path.exists() and str(DirectoryManager.get_diaries_root()) in str(old_path):
-                        old_path.unlink()
+                    self._remove_diary_copy(old_path)
+                    released_path = old_path
                     original.filepath = str(new_path)
-                    # Update hash based on the new copied file
-                    original.photo_hash = self.hash_file(new_path)
+                    original.file_size = self._file_size(new_path)
+                    original.photo_hash = new_hash
             
             original.name = photo_dst.name
             original.addition_date = photo_dst.addition_date
@@ -138,6 +456,9 @@ class PhotoService:
 
             self.session.commit()
             self.session.refresh(original)
+            self.release_blobs([released_path])
+            if released_path is not None:
+                self._schedule_thumbnails([original])
             return original
         return None
 
@@ -153,17 +474,18 @@ class PhotoService:
                 fk_travel_diary_id=excluded.fk_travel_diary_id,
                 id=excluded.id,
                 photo_hash=excluded.photo_hash,
+                file_size=excluded.file_size,
                 entries=excluded.entries,
             )
 
             # Delete the physical file if it exists in our images directory
-            file_path = Path(excluded.filepath)
-            if file_path.exists() and str(DirectoryManager.get_diaries_root()) in str(file_path):
-                file_path.unlink()
-            
+            self._remove_diary_copy(Path(excluded.filepath))
+
             self.session.delete(excluded)
             if commit:
                 self.session.commit()
-            
+                # A shared blob goes away only with its last photo; without commit the caller releases it
+                self.release_blobs([deleted_photo.filepath])
+
             return deleted_photo
         return None
@@ -0,0 +1,129 @@
+import re
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import DateTime, Integer, String, or_, text
+
+from pilgrim.models.entry import Entry
+from pilgrim.models.entry_search import SEARCH_TABLE, search_index_exists
+
+# Control characters never typed in an entry; the UI turns them into highlighting
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+SNIPPET_ELLIPSIS = "…"
+SNIPPET_TOKENS = 16
+# bm25 weights of the (title, text) columns: a match in the title counts more
+TITLE_WEIGHT = 5.0
+TEXT_WEIGHT = 1.0
+# bm25 has to score every match before the best ones are known. Past this many
+# matches (words found in most entries) results are listed in the reverse order the
+# entries were written instead, which FTS5 answers by walking its index backwards
+# and stopping at the limit.
+RANKED_MATCH_LIMIT = 5000
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchResult(NamedTuple):
+    entry_id: int
+    travel_diary_id: int
+    title: str
+    date: datetime
+    snippet: str
+
+
+class SearchService:
+    def __init__(self, session):
+        self.session = session
+        self._has_index = None
+
+    @staticmethod
+    def build_query(query: str) -> Optional[str]:
+        """
+        Turns what the user typed into an FTS5 query: every word must appear, and the
+        last one may be a prefix, so results show up while the word is being typed.
+        Words are quoted, so FTS5 operators and punctuation are taken literally.
+        """
+        terms = _TERM_PATTERN.findall(query)
+        if not terms:
+            return None
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def has_index(self) -> bool:
+        if self._has_index is None:
+            self._has_index = search_index_exists(self.session.connection().exec_driver_sql)
+        return self._has_index
+
+    def search(self, query: str, travel_diary_id: int | None = None, limit: int = 50) -> List[SearchResult]:
+        """
+        Returns the entries matching query, best matches first, optionally only those
+        of one diary. Each result carries a snippet of the text around the match, with
+        the matched words between HIGHLIGHT_START and HIGHLIGHT_END.
+        """
+        match = self.build_query(query)
+        if match is None:
+            return []
+        if not self.has_index():
+            return self._search_without_index(_TERM_PATTERN.findall(query), travel_diary_id, limit)
+
+        diary_filter = "AND e.fk_travel_diary_id = :diary_id" if travel_diary_id is not None else ""
+        if self._count_matches(match, travel_diary_id, RANKED_MATCH_LIMIT + 1) > RANKED_MATCH_LIMIT:
+            order = f"{SEARCH_TABLE}.rowid DESC"
+        else:
+            order = f"bm25({SEARCH_TABLE}, :title_weight, :text_weight)"
+        statement = text(f"""
+            SELECT e.id AS entry_id, e.fk_travel_diary_id AS travel_diary_id, e.title AS title, e.date AS date,
+                   snippet({SEARCH_TABLE}, -1, :start, :end, :ellipsis, :tokens) AS snippet
+            FROM {SEARCH_TABLE}
+            JOIN entries AS e ON e.id = {SEARCH_TABLE}.rowid
+            WHERE {SEARCH_TABLE} MATCH :match {diary_filter}
+            ORDER BY {order}
+            LIMIT :limit
+        """).columns(entry_id=Integer, travel_diary_id=Integer, title=String, date=DateTime, snippet=String)
+        params = {
+            "match": match, "diary_id": travel_diary_id, "limit": limit,
+            "start": HIGHLIGHT_START, "end": HIGHLIGHT_END,
+            "ellipsis": SNIPPET_ELLIPSIS, "tokens": SNIPPET_TOKENS,
+            "title_weight": TITLE_WEIGHT, "text_weight": TEXT_WEIGHT,
+        }
+        return [SearchResult(*row) for row in self.session.execute(statement, params)]
+
+    def _count_matches(self, match: str, travel_diary_id: int | None, cap: int) -> int:
+        """Counts the entries matching, optionally only those of one diary, stopping at cap."""
+        diary_filter = "AND e.fk_travel_diary_id = :diary_id" if travel_diary_id is not None else ""
+        statement = text(f"""
+            SELECT count(*) FROM (
+                SELECT 1 FROM {SEARCH_TABLE}
+                JOIN entries AS e ON e.id = {SEARCH_TABLE}.rowid
+                WHERE {SEARCH_TABLE} MATCH :match {diary_filter}
+                LIMIT :cap
+            )
+        """)
+        return self.session.execute(statement, {"match": match, "diary_id": travel_diary_id, "cap": cap}).scalar()
+
+    def _search_without_index(self, terms: List[str], travel_diary_id: int | None, limit: int) -> List[SearchResult]:
+        """Substring scan used when this SQLite was built without FTS5: no ranking, newest first."""
+        query = self.session.query(Entry.id, Entry.fk_travel_diary_id, Entry.title, Entry.date, Entry.text)
+        for term in terms:
+            pattern = f"%{term}%"
+            query = query.filter(or_(Entry.title.ilike(pattern), Entry.text.ilike(pattern)))
+        if travel_diary_id is not None:
+            query = query.filter(Entry.fk_travel_diary_id == travel_diary_id)
+        rows = query.order_by(Entry.date.desc()).limit(limit).all()
+        return [SearchResult(row.id, row.fk_travel_diary_id, row.title, row.date, self._plain_snippet(row.text or "", terms))
+                for row in rows]
+
+    @staticmethod
+    def _plain_snippet(entry_text: str, terms: List[str]) -> str:
+        lowered = entry_text.lower()
+        positions = [lowered.find(term.lower()) for term in terms]
+        start = min((position for position in positions if position >= 0), default=0)
+        window = entry_text[max(0, start - 40):start + 80]
+        for term in terms:
+            window = re.sub(re.escape(term), lambda m: f"{HIGHLIGHT_START}{m.group(0)}{HIGHLIGHT_END}",
+                            window, flags=re.IGNORECASE)
+        prefix = SNIPPET_ELLIPSIS if start > 40 else ""
+        suffix = SNIPPET_ELLIPSIS if start + 80 < len(entry_text) else ""
+        return f"{prefix}{window}{suffix}"
@@ -1,15 +1,126 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Lock
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
 from pilgrim.service.entry_service import EntryService
 from pilgrim.service.photo_service import PhotoService
+from pilgrim.service.search_service import SearchService
 from pilgrim.service.travel_diary_service import TravelDiaryService
+from pilgrim.utils import DirectoryManager
+from pilgrim.utils.draft_journal import DraftJournal
+from pilgrim.utils.thumbnail_cache import ThumbnailCache
 
 
 class ServiceManager:
     def __init__(self):
         self.session = None
+        self.config_manager = None
+        self.thumbnail_cache = None
+        self.draft_journal = None
+        self.session_factory = None
+        # Managers made by for_session() hand their jobs to the root's service thread
+        self._root = self
+        self._executor = None
+        self._executor_lock = Lock()
     def set_session(self, session):
         self.session = session
+    def set_session_factory(self, session_factory):
+        """session_factory(**options) returns a new session from the engine's pool, e.g. Database.session."""
+        self.session_factory = session_factory
+    def set_config_manager(self, config_manager):
+        self.config_manager = config_manager
     def get_session(self):
         return self.session
+    def open_session(self, **options):
+        """Returns a new session on the same database, for work done outside the UI thread."""
+        if self.session_factory is not None:
+            return self.session_factory(**options)
+        return Session(bind=self.session.get_bind(), **options)
+    def for_session(self, session):
+        """Returns a ServiceManager over another session, sharing this one's configuration and caches."""
+        services = ServiceManager()
+        services.set_session(session)
+        services.set_session_factory(self.session_factory)
+        services.set_config_manager(self.config_manager)
+        if self.config_manager is not None:
+            services.thumbnail_cache = self.get_thumbnail_cache()
+            services.draft_journal = self.get_draft_journal()
+        services._root = self._root
+        return services
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Yields a ServiceManager over a short-lived session: committed when the block
+        ends, rolled back if it raises, closed either way, so nothing it loaded stays
+        in memory. Objects read in it keep their loaded attributes afterwards.
+        """
+        session = self.open_session(autoflush=False, expire_on_commit=False)
+        try:
+            yield self.for_session(session)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    def open_scope(self):
+        """Returns a ServiceManager over a session of its own, e.g. for one screen; close() it when done."""
+        return self.for_session(self.open_session(autoflush=False))
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+    def _run_job(self, func, args):
+        with self.unit_of_work() as services:
+            return func(services, *args)
+    async def run_in_thread(self, func, *args):
+        """
+        Runs func(services, *args) on the service thread and returns its result, so slow
+        commits and file work never block the event loop. services is a ServiceManager
+        over a session of its own, closed when func returns; the objects func returns
+        keep their loaded attributes (see adopt). Jobs run one at a time, in order.
+        """
+        root = self._root
+        with root._executor_lock:
+            if root._executor is None:
+                root._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pilgrim-services")
+        return await asyncio.get_running_loop().run_in_executor(root._executor, self._run_job, func, args)
+    def adopt(self, instance):
+        """Returns this session's copy of an object a job returned, in the state the job left it."""
+        return self.session.merge(instance, load=False)
+    def adopt_unless_present(self, instance):
+        """
+        Like adopt, but a copy already in this session is returned as it is, so objects
+        a job only read never overwrite changes made here and not yet saved.
+        """
+        state = inspect(instance)
+        local = self.session.identity_map.get(state.key) if state.key is not None else None
+        return local if local is not None else self.adopt(instance)
+    def expire_stale(self, *instances):
+        """
+        Drops this session's copies of rows a job deleted and has the ones it changed
+        read again on next use; copies holding unsaved changes are left alone.
+        """
+        for instance in instances:
+            state = inspect(instance)
+            local = self.session.identity_map.get(state.key) if state.key is not None else None
+            if local is None:
+                continue
+            if state.was_deleted:
+                self.session.expunge(local)
+            elif local not in self.session.dirty:
+                self.session.expire(local)
+    def get_thumbnail_cache(self):
+        if self.thumbnail_cache is None:
+            self.thumbnail_cache = ThumbnailCache(DirectoryManager.get_thumbnails_directory())
+        return self.thumbnail_cache
+    def get_draft_journal(self):
+        if self.draft_journal is None:
+            self.draft_journal = DraftJournal(DirectoryManager.get_drafts_directory())
+        return self.draft_journal
     def get_entry_service(self):
         if self.session is not None:
             return EntryService(self.session)
@@ -18,7 +129,16 @@ class ServiceManager:
         if self.session is not None:
             return TravelDiaryService(self.session)
         return None
+    def get_search_service(self):
+        if self.session is not None:
+            return SearchService(self.session)
+        return None
     def get_photo_service(self):
         if self.session is not None:
-            return PhotoService(self.session)
+            photo_service = PhotoService(self.session)
+            if self.config_manager is not None:
+                photo_service.ingestion_mode = self.config_manager.photo_ingestion_mode
+                photo_service.storage_mode = self.config_manager.photo_storage
+                photo_service.thumbnail_cache = self.get_thumbnail_cache()
+            return photo_service
         return None
\ No newline at end of file
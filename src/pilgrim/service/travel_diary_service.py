@@ -1,15 +1,21 @@
-import os
 import re
 import shutil
 from pathlib import Path
+from typing import List, Optional
 
 from pilgrim.utils import DirectoryManager
+from pilgrim.utils.filename_allocator import FilenameAllocator
+from sqlalchemy import delete, func, select
 from sqlalchemy.exc import IntegrityError
 
+from pilgrim.models.entry import Entry
+from pilgrim.models.photo import Photo
+from pilgrim.models.photo_in_entry import photo_entry_association
+from pilgrim.models.photo_reference import PhotoReference
 from pilgrim.models.travel_diary import TravelDiary
 from unidecode import unidecode
 
-from pilgrim.service.photo_service import PhotoService
+from pilgrim.service.photo_service import PhotoService, RemovalProgress
 from pilgrim.service.entry_service import EntryService
 
 class TravelDiaryService:
@@ -54,26 +60,23 @@ class TravelDiaryService:
         """
         Creates and returns the directory structure for a diary:
         ~/.pilgrim/diaries/{directory_name}/data/
+        Directories are only checked once per process (see DirectoryManager.ensure_directory).
         """
         # Create diary directory
-        diary_dir = self._get_diary_directory(diary)
-        diary_dir.mkdir(exist_ok=True)
-        os.chmod(diary_dir, 0o700)
+        DirectoryManager.ensure_directory(self._get_diary_directory(diary))
 
         # Create data subdirectory
-        data_dir = self._get_diary_data_directory(diary)
-        data_dir.mkdir(exist_ok=True)
-        os.chmod(data_dir, 0o700)
-
-        return data_dir
+        return DirectoryManager.ensure_directory(self._get_diary_data_directory(diary))
 
     def _cleanup_diary_directory(self, diary: TravelDiary):
         """Removes the diary directory and all its contents."""
         diary_dir = self._get_diary_directory(diary)
         if diary_dir.exists():
             shutil.rmtree(diary_dir)
+        DirectoryManager.invalidate(diary_dir)
+        FilenameAllocator.invalidate(diary_dir)
 
-    async def async_create(self, name: str):
+    def create(self, name: str):
         # Generate safe directory name
         directory_name = self._sanitize_directory_name(name)
 
@@ -93,6 +96,9 @@ class TravelDiaryService:
             self.session.rollback()
             raise ValueError(f"Could not create diary: directory name '{directory_name}' already exists")
 
+    async def async_create(self, name: str):
+        return self.create(name)
+
     def read_by_id(self, travel_id: int):
         diary = self.session.query(TravelDiary).get(travel_id)
         if diary:
@@ -107,6 +113,69 @@ class TravelDiaryService:
             self._ensure_diary_directory(diary)
         return diaries
 
+    @staticmethod
+    def _make_stats(entry_count, first_entry_date, last_entry_date, photo_count, photo_bytes) -> dict:
+        return {
+            "entry_count": entry_count or 0,
+            "photo_count": photo_count or 0,
+            "photo_bytes": photo_bytes or 0,
+            "first_entry_date": first_entry_date,
+            "last_entry_date": last_entry_date,
+        }
+
+    def get_stats(self, travel_diary_id: int) -> dict:
+        """
+        Returns entry/photo counts, total photo bytes and the entry date range of a diary,
+        computed with aggregate queries instead of loading the relationships.
+        """
+        entry_count, first_entry_date, last_entry_date = (
+            self.session.query(func.count(Entry.id), func.min(Entry.date), func.max(Entry.date))
+            .filter(Entry.fk_travel_diary_id == travel_diary_id)
+            .one()
+        )
+        photo_count, photo_bytes = (
+            self.session.query(func.count(Photo.id), func.sum(Photo.file_size))
+            .filter(Photo.fk_travel_diary_id == travel_diary_id)
+            .one()
+        )
+        return self._make_stats(entry_count, first_entry_date, last_entry_date, photo_count, photo_bytes)
+
+    def get_stats_for_all(self) -> dict:
+        """Returns get_stats() for every diary, keyed by diary id, using a single grouped query."""
+        entry_stats = (
+            self.session.query(
+                Entry.fk_travel_diary_id.label("diary_id"),
+                func.count(Entry.id).label("entry_count"),
+                func.min(Entry.date).label("first_entry_date"),
+                func.max(Entry.date).label("last_entry_date"),
+            )
+            .group_by(Entry.fk_travel_diary_id)
+            .subquery()
+        )
+        photo_stats = (
+            self.session.query(
+                Photo.fk_travel_diary_id.label("diary_id"),
+                func.count(Photo.id).label("photo_count"),
+                func.sum(Photo.file_size).label("photo_bytes"),
+            )
+            .group_by(Photo.fk_travel_diary_id)
+            .subquery()
+        )
+        rows = (
+            self.session.query(
+                TravelDiary.id,
+                entry_stats.c.entry_count,
+                entry_stats.c.first_entry_date,
+                entry_stats.c.last_entry_date,
+                photo_stats.c.photo_count,
+                photo_stats.c.photo_bytes,
+            )
+            .outerjoin(entry_stats, entry_stats.c.diary_id == TravelDiary.id)
+            .outerjoin(photo_stats, photo_stats.c.diary_id == TravelDiary.id)
+            .all()
+        )
+        return {row[0]: self._make_stats(*row[1:]) for row in rows}
+
     def update(self, travel_diary_id: int, name: str):
         original = self.read_by_id(travel_diary_id)
         if original is not None:
@@ -125,6 +194,8 @@ class TravelDiaryService:
                 new_directory = self._get_diary_directory(original)
                 if old_directory.exists() and old_directory != new_directory:
                     old_directory.rename(new_directory)
+                    DirectoryManager.invalidate(old_directory)
+                    FilenameAllocator.invalidate(old_directory)
 
                 return original
             except IntegrityError:
@@ -136,6 +207,33 @@ class TravelDiaryService:
     async def async_update(self, travel_diary_id: int, name: str):
         return self.update(travel_diary_id, name)
 
+    def _delete_entry_rows(self, travel_diary_id: int):
+        """Deletes a diary's entries with their photo links and reference index rows, one statement each."""
+        entry_ids = select(Entry.id).where(Entry.fk_travel_diary_id == travel_diary_id)
+        self.session.execute(delete(photo_entry_association)
+                             .where(photo_entry_association.c.fk_entry_id.in_(entry_ids)))
+        self.session.execute(delete(PhotoReference).where(PhotoReference.fk_entry_id.in_(entry_ids))
+                             .execution_options(synchronize_session=False))
+        # The search index follows through its triggers
+        self.session.execute(delete(Entry).where(Entry.fk_travel_diary_id == travel_diary_id)
+                             .execution_options(synchronize_session="fetch"))
+
+    def _delete_photo_rows(self, travel_diary_id: int) -> List[str]:
+        """Deletes a diary's photos with their entry links, one statement each; returns their file paths."""
+        photo_paths = [filepath for (filepath,) in
+                       self.session.query(Photo.filepath).filter(Photo.fk_travel_diary_id == travel_diary_id)]
+        photo_ids = select(Photo.id).where(Photo.fk_travel_diary_id == travel_diary_id)
+        self.session.execute(delete(photo_entry_association)
+                             .where(photo_entry_association.c.fk_photo_id.in_(photo_ids)))
+        self.session.execute(delete(Photo).where(Photo.fk_travel_diary_id == travel_diary_id)
+                             .execution_options(synchronize_session="fetch"))
+        return photo_paths
+
+    def _commit_bulk_delete(self):
+        self.session.commit()
+        # The DELETEs bypassed the relationship collections loaded in this session
+        self.session.expire_all()
+
     def delete(self, travel_diary_id: TravelDiary):
         excluded = self.read_by_id(travel_diary_id.id)
         if excluded is not None:
@@ -143,8 +241,12 @@ class TravelDiaryService:
                 # First delete the directory
                 self._cleanup_diary_directory(excluded)
                 # Then delete from database
-                self.session.delete(travel_diary_id)
-                self.session.commit()
+                self._delete_entry_rows(excluded.id)
+                photo_paths = self._delete_photo_rows(excluded.id)
+                self.session.delete(excluded)
+                self._commit_bulk_delete()
+                # Shared blobs that no other diary uses go too
+                PhotoService(self.session).release_blobs(photo_paths)
                 return excluded
             except Exception as e:
                 self.session.rollback()
@@ -154,28 +256,25 @@ class TravelDiaryService:
     def delete_all_entries(self,travel_diary: TravelDiary):
         diary = self.read_by_id(travel_diary.id)
         if diary is not None:
-           diary.entries = []
-           self.session.commit()
-
-
-           return True
+            self._delete_entry_rows(diary.id)
+            self._commit_bulk_delete()
+            return True
 
         return False
 
-    def delete_all_photos(self,travel_diary: TravelDiary):
+    def delete_all_photos(self, travel_diary: TravelDiary, progress: Optional[RemovalProgress] = None,
+                          max_workers: int | None = None):
+        """
+        Deletes every photo of the diary with set-based statements, blanking the references
+        to them in its entries first. The files are removed afterwards on a thread pool,
+        reporting progress(stage, done, total).
+        """
         diary = self.read_by_id(travel_diary.id)
-        photo_service = PhotoService(self.session)
-        entry_service = EntryService(self.session)
         if diary is not None:
-
-           for entry in list(diary.entries):
-               entry_service.delete_all_photo_references(entry,commit=False)
-
-           for photo in list(diary.photos):
-               photo_service.delete(photo,commit=False)
-
-           self.session.commit()
-
-           return True
+            EntryService(self.session).delete_diary_photo_references(diary.id, commit=False)
+            photo_paths = self._delete_photo_rows(diary.id)
+            self._commit_bulk_delete()
+            PhotoService(self.session).remove_files(photo_paths, progress, max_workers)
+            return True
 
         return False
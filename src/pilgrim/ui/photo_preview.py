@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from rich.text import Text
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional
+    Image = None
+
+UPPER_HALF_BLOCK = "▀"
+
+
+def render_half_blocks(image_path: Path, width: int, max_rows: int) -> Text | None:
+    """
+    Renders an image as terminal art: each character cell shows two pixels, the upper
+    one as the foreground of '▀' and the lower one as its background.
+    Meant to be given a small thumbnail, never a full-size photo.
+    """
+    if Image is None:
+        return None
+    with Image.open(image_path) as image:
+        image = image.convert("RGB")
+        columns = max(1, min(width, image.width))
+        rows = max(1, round(image.height * columns / image.width / 2))
+        if rows > max_rows:
+            rows = max_rows
+            columns = max(1, round(image.width * rows * 2 / image.height))
+        image = image.resize((columns, rows * 2))
+        pixels = image.load()
+
+    art = Text(no_wrap=True, overflow="crop")
+    for row in range(rows):
+        for column in range(columns):
+            top = pixels[column, row * 2]
+            bottom = pixels[column, row * 2 + 1]
+            art.append(UPPER_HALF_BLOCK, style=f"rgb({top[0]},{top[1]},{top[2]}) on rgb({bottom[0]},{bottom[1]},{bottom[2]})")
+        if row < rows - 1:
+            art.append("\n")
+    return art
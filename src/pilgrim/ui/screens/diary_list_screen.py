@@ -11,8 +11,12 @@ from pilgrim.ui.screens.diary_settings_screen import SettingsScreen
 from pilgrim.ui.screens.edit_diary_modal import EditDiaryModal
 from pilgrim.ui.screens.new_diary_modal import NewDiaryModal
 from pilgrim.ui.screens.edit_entry_screen import EditEntryScreen
+from pilgrim.ui.screens.search_screen import SearchScreen
+from pilgrim.ui.screens.modals.restore_backup_modal import RestoreBackupModal
 
 from pilgrim.service.backup_service import BackupService
+from pilgrim.service.search_service import SearchResult
+from pilgrim.utils.directory_manager import DirectoryManager
 
 
 class DiaryListScreen(Screen):
@@ -25,6 +29,7 @@ class DiaryListScreen(Screen):
         Binding("e", "edit_selected_diary", "Edit diary"),
         Binding("r", "force_refresh", "Force refresh"),
         Binding("s", "diary_settings", "Open The Selected Diary Settings"),
+        Binding("f3", "search_entries", "Search all diaries"),
     ]
 
     def __init__(self):
@@ -67,11 +72,11 @@ class DiaryListScreen(Screen):
     def refresh_diaries(self):
         """Synchronous version of refresh"""
         try:
-            service_manager = self.app.service_manager
-            travel_diary_service = service_manager.get_travel_diary_service()
-
             # Uses synchronous method
-            diaries = travel_diary_service.read_all()
+            with self.app.service_manager.unit_of_work() as services:
+                travel_diary_service = services.get_travel_diary_service()
+                diaries = travel_diary_service.read_all()
+                diary_stats = travel_diary_service.get_stats_for_all()
 
             # Saves current state
             current_diary_id = None
@@ -91,7 +96,7 @@ class DiaryListScreen(Screen):
 
                 for index, diary in enumerate(diaries):
                     self.diary_id_map[index] = diary.id
-                    self.diary_list.add_option(f"[b]{diary.name}[/b]\n[dim]ID: {diary.id}[/dim]")
+                    self.diary_list.add_option(self._format_diary_option(diary, diary_stats.get(diary.id)))
 
                     # Maintains selection if possible
                     if current_diary_id and diary.id == current_diary_id:
@@ -109,6 +114,16 @@ class DiaryListScreen(Screen):
         except Exception as e:
             self.notify(f"Error loading diaries: {str(e)}")
 
+    @staticmethod
+    def _format_diary_option(diary, stats: dict | None) -> str:
+        """Builds the option label with the per-diary summary"""
+        summary = f"ID: {diary.id}"
+        if stats:
+            summary += f" • {stats['entry_count']} entries • {stats['photo_count']} photos"
+            if stats["last_entry_date"]:
+                summary += f" • last entry {stats['last_entry_date']:%Y-%m-%d}"
+        return f"[b]{diary.name}[/b]\n[dim]{summary}[/dim]"
+
     def _update_highlight(self, index: int):
         """Updates the OptionList highlight"""
         try:
@@ -126,11 +141,11 @@ class DiaryListScreen(Screen):
         self.is_refreshing = True
 
         try:
-            service_manager = self.app.service_manager
-            travel_diary_service = service_manager.get_travel_diary_service()
-
             # Usa método síncrono agora
-            diaries = travel_diary_service.read_all()
+            with self.app.service_manager.unit_of_work() as services:
+                travel_diary_service = services.get_travel_diary_service()
+                diaries = travel_diary_service.read_all()
+                diary_stats = travel_diary_service.get_stats_for_all()
 
             # Saves current state
             current_diary_id = None
@@ -150,7 +165,7 @@ class DiaryListScreen(Screen):
 
                 for index, diary in enumerate(diaries):
                     self.diary_id_map[index] = diary.id
-                    self.diary_list.add_option(f"[b]{diary.name}[/b]\n[dim]ID: {diary.id}[/dim]")
+                    self.diary_list.add_option(self._format_diary_option(diary, diary_stats.get(diary.id)))
 
                     if current_diary_id and diary.id == current_diary_id:
                         new_selected_index = index
@@ -250,16 +265,16 @@ class DiaryListScreen(Screen):
         if result:
             diary_id, name = result
             self.notify(f"Updating diary ID {diary_id} to '{name}'...")
-            # Schedules async update
-            self.call_later(self._async_update_diary, diary_id, name)
+            # Updates in the background
+            self.run_worker(self._async_update_diary(diary_id, name), group="diary-update")
         else:
             self.notify("Edit canceled")
 
     async def _async_update_diary(self, diary_id: int, name: str):
-        """Updates the diary asynchronously"""
+        """Updates the diary on the service thread (renaming its directory may take a while)"""
         try:
-            service = self.app.service_manager.get_travel_diary_service()
-            updated_diary = await service.async_update(diary_id, name)
+            updated_diary = await self.app.service_manager.run_in_thread(
+                lambda services: services.get_travel_diary_service().update(diary_id, name))
 
             if updated_diary:
                 self.notify(f"Diary '{name}' updated!")
@@ -300,11 +315,11 @@ class DiaryListScreen(Screen):
             self.notify("Select a diary to open the settings")
 
 
-    def action_backup(self):
+    def action_backup(self, incremental: bool = False):
         session = self.app.service_manager.get_session()
         if session:
             backup_service = BackupService(session)
-            result_operation, result_data = backup_service.create_backup()
+            result_operation, result_data = backup_service.create_backup(incremental=incremental)
             if result_operation:
                 self.notify(f"Backup result: {result_data}")
             else:
@@ -313,3 +328,27 @@ class DiaryListScreen(Screen):
             self.notify("Error: Session not found",severity="error")
             self.app.exit()
 
+    def action_incremental_backup(self):
+        self.action_backup(incremental=True)
+
+    def action_search_entries(self):
+        """Searches the entries of every diary"""
+        self.app.push_screen(SearchScreen(), self.handle_search_result)
+
+    def handle_search_result(self, result: Optional[SearchResult]):
+        """Opens the diary of the entry picked in the search at that entry"""
+        if result is None:
+            return
+        self.app.push_screen(EditEntryScreen(diary_id=result.travel_diary_id, create_new=False,
+                                             entry_id=result.entry_id))
+
+    def action_restore_backup(self):
+        backups = BackupService.list_backups(DirectoryManager.get_config_directory())
+        if not backups:
+            self.notify("No backup found to restore", severity="warning")
+            return
+        self.app.push_screen(RestoreBackupModal(backups[-1]), self.handle_restore_result)
+
+    def handle_restore_result(self, restored: bool | None):
+        if restored:
+            self.refresh_diaries()
@@ -20,7 +20,10 @@ class SettingsScreen(Screen):
 
     def __init__(self,diary_id:int):
         super().__init__()
-        self.current_diary = self.app.service_manager.get_travel_diary_service().read_by_id(diary_id)
+        with self.app.service_manager.unit_of_work() as services:
+            travel_diary_service = services.get_travel_diary_service()
+            self.current_diary = travel_diary_service.read_by_id(diary_id)
+            self.diary_stats = travel_diary_service.get_stats(diary_id)
 
         self.header = Header()
         self.footer = Footer()
@@ -29,8 +32,8 @@ class SettingsScreen(Screen):
         self.diary_name = Static(self.current_diary.name,id="DiarySettingsScreen-DiaryName")
         self.notify(str(self.app.config_manager))
         self.is_the_diary_set_to_auto_open =  self.app.config_manager.get_auto_open_diary() == self.current_diary.name
-        self.diary_entry_count = Static(str(len(self.current_diary.entries)))
-        self.diary_photo_count = Static(str(len(self.current_diary.photos)))
+        self.diary_entry_count = Static(str(self.diary_stats["entry_count"]))
+        self.diary_photo_count = Static(str(self.diary_stats["photo_count"]))
         self.save_button = Button("Save",id="DiarySettingsScreen-SaveButton" )
         self.cancel_button = Button("Cancel",id="DiarySettingsScreen-cancel_button")
         self.apply_button = Button("Apply",id="DiarySettingsScreen-ApplyButton")
@@ -14,7 +14,8 @@ class EditDiaryModal(ModalScreen[tuple[int,str]]):
     def __init__(self, diary_id: int):
         super().__init__()
         self.diary_id = diary_id
-        self.current_diary_name = self.app.service_manager.get_travel_diary_service().read_by_id(self.diary_id).name
+        with self.app.service_manager.unit_of_work() as services:
+            self.current_diary_name = services.get_travel_diary_service().read_by_id(self.diary_id).name
         self.name_input = Input(value=self.current_diary_name, id="edit_diary_name_input", classes="EditDiaryModal-NameInput")
 
     def compose(self) -> ComposeResult:
@@ -1,14 +1,23 @@
-import re
+import asyncio
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, List
 
 from pilgrim.models.entry import Entry
 from pilgrim.models.photo import Photo
+from pilgrim.service.entry_cursor import EntryCursor
+from pilgrim.service.search_service import SearchResult
+from pilgrim.ui.photo_preview import render_half_blocks
 from pilgrim.ui.screens.modals.add_photo_modal import AddPhotoModal
+from pilgrim.ui.screens.modals.import_folder_modal import ImportFolderModal
 from pilgrim.ui.screens.modals.confirm_delete_modal import ConfirmDeleteModal
 from pilgrim.ui.screens.modals.edit_photo_modal import EditPhotoModal
 from pilgrim.ui.screens.rename_entry_modal import RenameEntryModal
+from pilgrim.ui.screens.search_screen import SearchScreen
+from pilgrim.utils.draft_journal import DraftJournal
+from pilgrim.utils.photo_references import (HASH_PREFIX_LENGTH, INVALID_HASH, MALFORMED, VALID, WRONG_FORMAT,
+                                             format_reference, tokenize)
 from textual.app import ComposeResult
 from textual.binding import Binding
 from textual.containers import Container, Horizontal, Vertical
@@ -16,6 +25,19 @@ from textual.screen import Screen
 from textual.widgets import Header, Footer, Static, TextArea, OptionList
 
 
+# Size of the photo preview in the sidebar, in terminal cells
+PREVIEW_DEFAULT_WIDTH = 32
+PREVIEW_MAX_ROWS = 8
+# Seconds without typing before the text is compared with the saved version
+DIRTY_CHECK_DELAY = 0.3
+# Sub-header refreshes requested within this window are coalesced into one
+SUB_HEADER_DELAY = 0.05
+# Autosave: journaled drafts are written to the database every this many
+# idle moments, or when this many seconds passed since the last time
+AUTOSAVE_FOLD_EVERY = 20
+AUTOSAVE_FOLD_INTERVAL = 60.0
+
+
 class EditEntryScreen(Screen):
     TITLE = "Pilgrim - Edit"
 
@@ -26,12 +48,13 @@ class EditEntryScreen(Screen):
         Binding("f5", "next_entry", "Next Entry"),
         Binding("f4", "prev_entry", "Previous Entry"),
         Binding("ctrl+r", "rename_entry", "Rename Entry"),
+        Binding("f3", "search_entries", "Search"),
         Binding("f8", "toggle_sidebar", "Toggle Photos"),
         Binding("f9", "toggle_focus", "Toggle Focus"),
         Binding("escape", "back_to_list", "Back to List"),
     ]
 
-    def __init__(self, diary_id: int = 1,create_new: bool = True):
+    def __init__(self, diary_id: int = 1,create_new: bool = True, entry_id: Optional[int] = None):
         super().__init__()
 
         if create_new:
@@ -47,10 +70,30 @@ class EditEntryScreen(Screen):
         self.new_entry_content = ""
         self.diary_id = diary_id
         self.diary_name = f"Diary {diary_id}"
-        self.entries: List[Entry] = []
+        # Entry to open first instead of the first one (e.g. picked in a search)
+        self._initial_entry_id = entry_id
+        # A session for this screen alone: what it loads is released when it closes
+        self.services = self.app.service_manager.open_scope()
+        self.entry_cursor: Optional[EntryCursor] = None
         self.has_unsaved_changes = False
         self._updating_display = False
-        self._original_content = ""
+        # Dirty tracking: every change bumps _edit_version; the text itself is only
+        # compared (by fingerprint) with the saved one once typing pauses
+        self._original_fingerprint = self._fingerprint("")
+        self._edit_version = 0
+        self._checked_version = 0
+        self._title_changed = False
+        self._dirty_check_timer = None
+        self._sub_header_timer = None
+        # Autosave, per journal key: the text last journaled, and the text the
+        # database holds (the base a draft is folded onto)
+        self._journaled_text = {}
+        self._draft_base = {}
+        self._unfolded_drafts = {}
+        self._last_fold = time.monotonic()
+        self._recovered_drafts = {}
+        # Set while a save runs on the service thread; navigating waits for it
+        self._saving = False
         self.is_refreshing = False
         self.sidebar_visible = False
         self.sidebar_focused = False
@@ -87,12 +130,14 @@ class EditEntryScreen(Screen):
         # Sidebar widgets
         self.sidebar_title = Static("Photos", classes="EditEntryScreen-sidebar-title")
         self.photo_list = OptionList(id="photo_list", classes="EditEntryScreen-sidebar-photo-list")
+        self.photo_preview = Static("", id="photo_preview", classes="EditEntryScreen-sidebar-photo-preview")
         self.photo_info = Static("", classes="EditEntryScreen-sidebar-photo-info")
         self.help_text = Static("", classes="EditEntryScreen-sidebar-help")
 
         # Sidebar container: photo list and info in a flexible container, help_text fixed at bottom
         self.sidebar_content = Vertical(
             self.photo_list,
+            self.photo_preview,
             self.photo_info,
             id="sidebar_content",
             classes="EditEntryScreen-sidebar-content"
@@ -156,16 +201,21 @@ class EditEntryScreen(Screen):
 
         # First update diary info, then refresh entries
         self.update_diary_info()
+        self._recover_drafts()
         self.refresh_entries()
+        self._discard_orphan_drafts()
 
         # Initialize footer with editor context
         self._update_footer_context()
         # self.app.mount(self._photo_suggestion_widget)  # Temporarily disabled
 
+    def on_unmount(self) -> None:
+        self.services.close()
+
     def update_diary_info(self):
         """Updates diary information"""
         try:
-            service_manager = self.app.service_manager
+            service_manager = self.services
             travel_diary_service = service_manager.get_travel_diary_service()
 
             diary = travel_diary_service.read_by_id(self.diary_id)
@@ -193,18 +243,23 @@ class EditEntryScreen(Screen):
     def refresh_entries(self):
         """Synchronous version of refresh"""
         try:
-            service_manager = self.app.service_manager
+            service_manager = self.services
             entry_service = service_manager.get_entry_service()
 
-            all_entries = entry_service.read_all()
-            self.entries = [entry for entry in all_entries if entry.fk_travel_diary_id == self.diary_id]
-            self.entries.sort(key=lambda x: x.id)
+            self.entry_cursor = EntryCursor(entry_service, self.diary_id)
+            self.entry_cursor.load()
 
-            if self.entries:
-                self.next_entry_id = max(entry.id for entry in self.entries) + 1
+            if self.entry_cursor:
+                self.next_entry_id = self.entry_cursor.max_id() + 1
             else:
                 self.next_entry_id = 1
 
+            if self._initial_entry_id is not None:
+                initial_index = self.entry_cursor.index_of(self._initial_entry_id)
+                if initial_index is not None:
+                    self.current_entry_index = initial_index
+                self._initial_entry_id = None
+
             self._update_entry_display()
             self._update_sub_header()
 
@@ -219,9 +274,16 @@ class EditEntryScreen(Screen):
         self.status_indicator.remove_class("saved", "not-saved", "new", "read-only")
         self.status_indicator.add_class(css_class)
 
+    def _has_entries(self) -> bool:
+        return bool(self.entry_cursor)
+
+    def _current_entry(self) -> Optional[Entry]:
+        """Returns the full entry under the cursor, loading its text on demand."""
+        return self.entry_cursor.get(self.current_entry_index)
+
     def _update_sub_header(self):
         """Updates the sub-header with current entry information."""
-        if not self.entries and not self.is_new_entry:
+        if not self._has_entries() and not self.is_new_entry:
             self.entry_info.update("No entries")
             self._update_status_indicator("Saved", "saved")
             return
@@ -233,8 +295,8 @@ class EditEntryScreen(Screen):
             else:
                 self._update_status_indicator("New", "new")
         else:
-            current_entry = self.entries[self.current_entry_index]
-            entry_text = f"Entry: \\[{self.current_entry_index + 1}/{len(self.entries)}] {current_entry.title}"
+            current_summary = self.entry_cursor.summary(self.current_entry_index)
+            entry_text = f"Entry: \\[{self.current_entry_index + 1}/{len(self.entry_cursor)}] {current_summary.title}"
             self.entry_info.update(entry_text)
             if self.has_unsaved_changes:
                 self._update_status_indicator("Not Saved", "not-saved")
@@ -243,10 +305,13 @@ class EditEntryScreen(Screen):
 
     def _save_current_state(self):
         """Saves the current state before navigating"""
+        if self.has_unsaved_changes:
+            # Edits made since the last idle moment would otherwise miss the journal
+            self._journal_draft(self.text_entry.text)
         if self.is_new_entry:
             self.new_entry_content = self.text_entry.text
-        elif self.entries and self.has_unsaved_changes:
-            current_entry = self.entries[self.current_entry_index]
+        elif self._has_entries() and self.has_unsaved_changes:
+            current_entry = self._current_entry()
             current_entry.text = self.text_entry.text
 
     def _finish_display_update(self):
@@ -258,10 +323,10 @@ class EditEntryScreen(Screen):
 
     def _update_entry_display(self):
         """Updates the display of the current entry"""
-        if not self.entries and not self.is_new_entry:
+        if not self._has_entries() and not self.is_new_entry:
             self.text_entry.text = f"No entries found for diary '{self.diary_name}'\n\nPress Ctrl+N to create a new entry."
             self.text_entry.read_only = True
-            self._original_content = self.text_entry.text
+            self._mark_clean(self.text_entry.text)
             self._update_sub_header()
             return
 
@@ -270,17 +335,44 @@ class EditEntryScreen(Screen):
         if self.is_new_entry:
             self.text_entry.text = self.new_entry_content
             self.text_entry.read_only = False
-            self._original_content = self.new_entry_content
-            self.has_unsaved_changes = False
+            self._mark_clean(self.new_entry_content)
         else:
-            current_entry = self.entries[self.current_entry_index]
-            self.text_entry.text = current_entry.text
+            current_entry = self._current_entry()
+            recovered = self._recovered_drafts.pop(current_entry.id, None)
+            self.text_entry.text = current_entry.text if recovered is None else recovered
             self.text_entry.read_only = False
-            self._original_content = current_entry.text
-            self.has_unsaved_changes = False
+            self._mark_clean(current_entry.text)
+            if recovered is not None:
+                if recovered == (current_entry.text or ""):
+                    self._discard_draft(current_entry.id)
+                else:
+                    self.has_unsaved_changes = True
+                    self.notify("Recovered unsaved changes to this entry")
+            # Warm the neighbours once the entry is on screen so F4/F5 stay instant
+            self.call_after_refresh(self._prefetch_neighbour_entries)
 
         self.call_after_refresh(self._finish_display_update)
 
+    def _prefetch_neighbour_entries(self):
+        """Loads the previous and next entries into the cursor cache, in the background"""
+        if not self._has_entries() or self.is_new_entry:
+            return
+        missing = self.entry_cursor.missing_neighbours(self.current_entry_index)
+        if missing:
+            self.run_worker(self._async_prefetch_entries(missing), group="entry-prefetch", exclusive=True)
+
+    async def _async_prefetch_entries(self, entry_ids: list):
+        """Reads the entries on the service thread and caches this screen's copies of them"""
+        try:
+            entries = await self.services.run_in_thread(
+                lambda services: services.get_entry_service().read_by_ids(entry_ids))
+            cached = set(self.entry_cursor.cached_ids())
+            # Entries edited here and since evicted from the cursor keep their unsaved text
+            self.entry_cursor.store(self.services.adopt_unless_present(entry)
+                                    for entry in entries if entry.id not in cached)
+        except Exception as e:
+            self.notify(f"Error prefetching entries: {str(e)}")
+
     def _update_sidebar_content(self):
         """Updates the sidebar content with photos for the current diary"""
         try:
@@ -288,6 +380,7 @@ class EditEntryScreen(Screen):
 
             # Clear existing options safely
             self.photo_list.clear_options()
+            self.photo_preview.display = False
 
             # Add the 'Ingest Photo' option at the top
             self.photo_list.add_option("➕ Ingest Photo")
@@ -310,6 +403,7 @@ class EditEntryScreen(Screen):
                 "[b]Sidebar Shortcuts[/b]\n"
                 "[b][green]i[/green][/b]: Insert photo into entry\n"
                 "[b][green]n[/green][/b]: Add new photo\n"
+                "[b][green]f[/green][/b]: Import a folder of photos\n"
                 "[b][green]d[/green][/b]: Delete selected photo\n"
                 "[b][green]e[/green][/b]: Edit selected photo\n"
                 "[b][yellow]Tab[/yellow][/b]: Back to editor\n"
@@ -327,12 +421,10 @@ class EditEntryScreen(Screen):
     def _load_photos_for_diary(self, diary_id: int):
         """Loads all photos for the specific diary"""
         try:
-            service_manager = self.app.service_manager
+            service_manager = self.services
             photo_service = service_manager.get_photo_service()
 
-            all_photos = photo_service.read_all()
-            self.cached_photos = [photo for photo in all_photos if photo.fk_travel_diary_id == diary_id]
-            self.cached_photos.sort(key=lambda x: x.id)
+            self.cached_photos = photo_service.read_by_diary(diary_id)
             return self.cached_photos
 
         except Exception as e:
@@ -404,11 +496,11 @@ class EditEntryScreen(Screen):
             return
 
         selected_photo = self.cached_photos[photo_index]
-        photo_hash = selected_photo.photo_hash[:8]
+        photo_hash = selected_photo.photo_hash[:HASH_PREFIX_LENGTH]
 
         # Insert photo reference using hash format without escaping
         # Using raw string to avoid markup conflicts with [[
-        photo_ref = f"[[photo::{photo_hash}]]"
+        photo_ref = format_reference(selected_photo.photo_hash)
 
         # Insert at the cursor position
         self.text_entry.insert(photo_ref)
@@ -461,21 +553,59 @@ class EditEntryScreen(Screen):
             self._update_sidebar_content()
         self.notify(f"Photo '{result['name']}' added successfully!")
 
-    async def _async_create_photo(self, photo_data: dict):
-        """Creates a new photo asynchronously"""
+    def action_import_photo_folder(self):
+        """Imports every photo below a folder"""
+        if not self.sidebar_focused or not self.sidebar_visible:
+            self.notify("Use F8 to open the sidebar first.", severity="warning")
+            return
+        self.app.push_screen(ImportFolderModal(), self.handle_import_folder_result)
+
+    def handle_import_folder_result(self, result: str | None) -> None:
+        if result is None:
+            self.notify("Import cancelled")
+            return
+        self.run_worker(self._async_import_folder(Path(result)), group="photo-import", exclusive=True)
+
+    def _show_import_progress(self, stage: str, done: int, total: int):
+        self.photo_info.update(f"Importing photos: {stage} {done}/{total}")
+
+    async def _async_import_folder(self, folder: Path):
+        """Imports a folder tree in the background, streaming progress to the sidebar"""
         try:
-            service_manager = self.app.service_manager
-            photo_service = service_manager.get_photo_service()
+            photo_service = self.services.get_photo_service()
+            self.photo_info.update(f"Scanning {folder}...")
+            paths = await asyncio.to_thread(photo_service.collect_photo_paths, folder)
+            if not paths:
+                self.notify("No photos found in this folder", severity="warning")
+                self._update_sidebar_content()
+                return
 
+            result = await photo_service.import_many_async(paths, self.diary_id, progress=self._show_import_progress)
+            if result is None:
+                self.notify("Error importing photos: diary not found", severity="error")
+                return
+            new_photos, skipped = result
+            self.notify(f"Imported {len(new_photos)} photo(s), skipped {len(skipped)} duplicate or unreadable")
+        except Exception as e:
+            self.notify(f"Error importing photos: {str(e)}", severity="error")
+        if self.sidebar_visible:
+            self._update_sidebar_content()
+
+    async def _async_create_photo(self, photo_data: dict):
+        """Creates a new photo on the service thread, so hashing and copying never block the UI"""
+        try:
             current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-            new_photo = photo_service.create(
-                filepath=Path(photo_data["filepath"]),
-                name=photo_data["name"],
-                travel_diary_id=self.diary_id,
-                addition_date=current_date,
-                caption=photo_data["caption"]
-            )
+            def create(services):
+                return services.get_photo_service().create(
+                    filepath=Path(photo_data["filepath"]),
+                    name=photo_data["name"],
+                    travel_diary_id=self.diary_id,
+                    addition_date=current_date,
+                    caption=photo_data["caption"]
+                )
+
+            new_photo = await self.services.run_in_thread(create)
 
             if new_photo:
                 self.notify(f"Photo '{new_photo.name}' added successfully!")
@@ -527,21 +657,39 @@ class EditEntryScreen(Screen):
 
             selected_photo = photos[photo_index]
 
-            # Schedule async deletion
-            self.call_later(self._async_delete_photo, selected_photo)
+            # Delete in the background
+            self.run_worker(self._async_delete_photo(selected_photo), group="photo-change")
         else:
             self.notify("Delete cancelled")
 
+    @staticmethod
+    def _delete_photo_job(services, photo_id: int):
+        """Runs on the service thread; returns (deleted photo or None, entries whose text changed)"""
+        photo_service = services.get_photo_service()
+        photo = photo_service.read_by_id(photo_id)
+        if photo is None:
+            return None, []
+        linked_entries = list(photo.entries)
+        # Blank the references first, so no entry is left pointing at a missing photo
+        changed_entries = services.get_entry_service().delete_references_to_photos([photo], commit=False)
+        if photo_service.delete(photo) is None:
+            services.get_session().rollback()
+            return None, []
+        return photo, list({id(entry): entry for entry in changed_entries + linked_entries}.values())
+
     async def _async_delete_photo(self, photo: Photo):
-        """Deletes a photo asynchronously"""
+        """Deletes a photo on the service thread"""
         try:
-            service_manager = self.app.service_manager
-            photo_service = service_manager.get_photo_service()
-
-            result = photo_service.delete(photo)
+            service_manager = self.services
+            deleted, changed_entries = await service_manager.run_in_thread(self._delete_photo_job, photo.id)
 
-            if result:
+            if deleted:
+                service_manager.expire_stale(deleted, *changed_entries)
                 self.notify(f"Photo '{photo.name}' deleted successfully!")
+                current_entry = None if self.is_new_entry or not self._has_entries() else self._current_entry()
+                changed_ids = {entry.id for entry in changed_entries}
+                if current_entry is not None and current_entry.id in changed_ids and not self.has_unsaved_changes:
+                    self._update_entry_display()
                 # Refresh sidebar content
                 if self.sidebar_visible:
                     self._update_sidebar_content()
@@ -593,29 +741,37 @@ class EditEntryScreen(Screen):
 
         selected_photo = photos[photo_index]
 
-        # Schedule async update
-        self.call_later(self._async_update_photo, selected_photo, result)
+        # Update in the background
+        self.run_worker(self._async_update_photo(selected_photo, result), group="photo-change")
 
     async def _async_update_photo(self, original_photo: Photo, photo_data: dict):
-        """Updates a photo asynchronously"""
+        """Updates a photo on the service thread (a new file is copied there too)"""
         try:
-            service_manager = self.app.service_manager
-            photo_service = service_manager.get_photo_service()
-
-            # Create updated photo object
-            updated_photo = Photo(
-                filepath=photo_data["filepath"],
-                name=photo_data["name"],
-                addition_date=original_photo.addition_date,
-                caption=photo_data["caption"],
-                entries=original_photo.entries if original_photo.entries is not None else [],
-                id=original_photo.id,
-                photo_hash=original_photo.photo_hash,
-            )
+            service_manager = self.services
+            photo_id = original_photo.id
+            addition_date = original_photo.addition_date
+            photo_hash = original_photo.photo_hash
+
+            def update(services):
+                photo_service = services.get_photo_service()
+                original = photo_service.read_by_id(photo_id)
+                if original is None:
+                    return None
+                # Create updated photo object
+                updated_photo = Photo(
+                    filepath=photo_data["filepath"],
+                    name=photo_data["name"],
+                    addition_date=addition_date,
+                    caption=photo_data["caption"],
+                    id=photo_id,
+                    photo_hash=photo_hash,
+                )
+                return photo_service.update(original, updated_photo)
 
-            result = photo_service.update(original_photo, updated_photo)
+            result = await service_manager.run_in_thread(update)
 
             if result:
+                updated_photo = service_manager.adopt(result)
                 self.notify(f"Photo '{updated_photo.name}' updated successfully!")
                 # Refresh sidebar content
                 if self.sidebar_visible:
@@ -628,69 +784,60 @@ class EditEntryScreen(Screen):
 
     def _get_linked_photos_from_text(self) -> Optional[List[Photo]]:
         """
-        Validates photo references in the text against the memory cache.
+        Validates photo references in the text against the diary's photos.
         Checks for:
         - Malformed references
         - Incorrect hash length
         - Invalid or ambiguous hashes
         Returns a list of unique photos (no duplicates even if referenced multiple times).
         """
-        text = self.text_entry.text
-        
+        tokens = tokenize(self.text_entry.text)
+
         # First check for malformed references
-        malformed_pattern = r"\[\[photo::([^\]]*)\](?!\])"  # Missing ] at the end
-        malformed_matches = re.findall(malformed_pattern, text)
-        if malformed_matches:
-            for match in malformed_matches:
-                self.notify(f"❌ Malformed reference: '\\[\\[photo::{match}\\]' - Missing closing '\\]'", severity="error", timeout=10)
+        malformed = [token for token in tokens if token.kind == MALFORMED]
+        if malformed:
+            for token in malformed:
+                self.notify(f"❌ Malformed reference: '\\[\\[photo::{token.photo_hash}\\]' - Missing closing '\\]'", severity="error", timeout=10)
             return None
 
         # Look for incorrect format references
-        invalid_format = r"\[\[photo:[^:\]]+\]\]"  # [[photo:something]] without ::
-        invalid_matches = re.findall(invalid_format, text)
-        if invalid_matches:
-            for match in invalid_matches:
-                escaped_match = match.replace("[", "\\[").replace("]", "\\]")
+        wrong_format = [token for token in tokens if token.kind == WRONG_FORMAT]
+        if wrong_format:
+            for token in wrong_format:
+                escaped_match = token.text.replace("[", "\\[").replace("]", "\\]")
                 self.notify(f"❌ Invalid format: '{escaped_match}' - Use '\\[\\[photo::hash\\]\\]'", severity="error", timeout=10)
             return None
 
-        # Now look for all references to validate
-        pattern = r"\[\[photo::([^\]]+)\]\]"
-        # Use set to get unique references only
-        all_refs = set(re.findall(pattern, text))
-        
-        if not all_refs:
-            return []  # No references, valid operation
-
-        self._load_photos_for_diary(self.diary_id)
-        linked_photos: List[Photo] = []
-        processed_hashes = set()  # Keep track of processed hashes to avoid duplicates
-
-        for ref in all_refs:
-            # Skip if we already processed this hash
-            if ref in processed_hashes:
+        for token in tokens:
+            if token.kind != INVALID_HASH:
                 continue
-
             # Validate hash length
-            if len(ref) != 8:
+            if len(token.photo_hash) != HASH_PREFIX_LENGTH:
                 self.notify(
-                    f"❌ Invalid hash: '{ref}' - Must be exactly 8 characters long",
+                    f"❌ Invalid hash: '{token.photo_hash}' - Must be exactly {HASH_PREFIX_LENGTH} characters long",
                     severity="error",
                     timeout=10
                 )
-                return None
-
-            # Validate if contains only valid hexadecimal characters
-            if not re.match(r"^[0-9A-Fa-f]{8}$", ref):
+            else:
                 self.notify(
-                    f"❌ Invalid hash: '{ref}' - Use only hexadecimal characters (0-9, A-F)",
+                    f"❌ Invalid hash: '{token.photo_hash}' - Use only hexadecimal characters (0-9, A-F)",
                     severity="error",
                     timeout=10
                 )
-                return None
+            return None
+
+        # Use set to get unique references only
+        all_refs = {token.photo_hash for token in tokens if token.kind == VALID}
+        if not all_refs:
+            return []  # No references, valid operation
+
+        # Resolve every reference with a single indexed lookup
+        photo_service = self.services.get_photo_service()
+        photos_by_ref = photo_service.find_by_hash_prefix(self.diary_id, all_refs)
+        linked_photos: List[Photo] = []
 
-            # Search for photos matching the hash
-            found_photos = [p for p in self.cached_photos if p.photo_hash.startswith(ref)]
+        for ref in all_refs:
+            found_photos = photos_by_ref.get(ref, [])
 
             if len(found_photos) == 0:
                 self.notify(
@@ -708,7 +855,6 @@ class EditEntryScreen(Screen):
                 return None
             else:
                 linked_photos.append(found_photos[0])
-                processed_hashes.add(ref)  # Mark this hash as processed
 
         # Convert list to set and back to list to ensure uniqueness of photos
         return list(set(linked_photos))
@@ -749,35 +895,209 @@ class EditEntryScreen(Screen):
 
         self.photo_info.update(photo_details)
 
+    def on_option_list_option_highlighted(self, event: OptionList.OptionHighlighted) -> None:
+        """Shows the preview of the highlighted photo"""
+        if event.option_list is not self.photo_list or not self.sidebar_visible:
+            return
+        photo_index = event.option_index - 1
+        if photo_index < 0 or photo_index >= len(self.cached_photos):
+            self.photo_preview.display = False
+            return
+        photo = self.cached_photos[photo_index]
+        self.run_worker(self._async_show_preview(photo.photo_hash, Path(photo.filepath)),
+                        group="photo-preview", exclusive=True)
+
+    def _build_preview(self, photo_hash: str, filepath: Path, width: int):
+        """Runs in a worker thread: finds or generates the thumbnail and renders it"""
+        thumbnail_cache = self.services.get_thumbnail_cache()
+        if not thumbnail_cache.available():
+            return None
+        thumbnail = thumbnail_cache.get(photo_hash) or thumbnail_cache.generate(filepath, photo_hash)
+        if thumbnail is None:
+            return None
+        return render_half_blocks(thumbnail, width, PREVIEW_MAX_ROWS)
+
+    async def _async_show_preview(self, photo_hash: str, filepath: Path):
+        width = self.photo_preview.content_size.width or PREVIEW_DEFAULT_WIDTH
+        try:
+            preview = await asyncio.to_thread(self._build_preview, photo_hash, filepath, width)
+        except Exception:
+            preview = None
+        self.photo_preview.update(preview or "")
+        self.photo_preview.display = preview is not None
+
+    @staticmethod
+    def _fingerprint(text: str | None) -> tuple:
+        text = text or ""
+        return len(text), hash(text)
+
+    def _mark_clean(self, content: str | None):
+        """Records content as the saved text of the entry on screen"""
+        self._original_fingerprint = self._fingerprint(content)
+        self._checked_version = self._edit_version
+        self._title_changed = False
+        self.has_unsaved_changes = False
+        if self._dirty_check_timer is not None:
+            self._dirty_check_timer.stop()
+            self._dirty_check_timer = None
+
+    def _mark_saved(self, content: str | None, edit_version: int):
+        """_mark_clean for a save that started at edit_version; anything typed since is checked again"""
+        self._mark_clean(content)
+        if self._edit_version != edit_version:
+            self._checked_version = edit_version
+            self._check_dirty_when_idle()
+
+    def _save_pending(self) -> bool:
+        """True, after telling the user, while a save is still running"""
+        if self._saving:
+            self.notify("Still saving, try again in a moment", severity="warning")
+        return self._saving
+
+    def _request_sub_header_update(self):
+        """Refreshes the sub-header shortly, once for any number of requests in between"""
+        if self._sub_header_timer is None:
+            self._sub_header_timer = self.set_timer(SUB_HEADER_DELAY, self._flush_sub_header_update)
+
+    def _flush_sub_header_update(self):
+        self._sub_header_timer = None
+        self._update_sub_header()
+
     def on_text_area_changed(self, event) -> None:
-        """Detects text changes and updates status"""
+        """Marks the entry as changed; constant time per keystroke whatever the text length"""
         # Skip if we're currently updating the display
-        if getattr(self, '_updating_display', False):
+        if self._updating_display or self.text_entry.read_only:
             return
-            
-        # Skip if text area is read-only
-        if not hasattr(self, 'text_entry') or self.text_entry.read_only:
-            return
-            
-        # Skip if we don't have original content to compare against
-        if not hasattr(self, '_original_content'):
+
+        self._edit_version += 1
+        if not self.has_unsaved_changes:
+            self.has_unsaved_changes = True
+            self._request_sub_header_update()
+
+        if self._dirty_check_timer is not None:
+            self._dirty_check_timer.stop()
+        self._dirty_check_timer = self.set_timer(DIRTY_CHECK_DELAY, self._check_dirty_when_idle)
+
+    def _check_dirty_when_idle(self):
+        """Once typing pauses, compares the text with the saved one (e.g. after undoing every edit)"""
+        self._dirty_check_timer = None
+        if self._checked_version == self._edit_version:
             return
-            
-        current_content = self.text_entry.text
-        
-        # Check if content has changed
-        if current_content != self._original_content:
-            if not self.has_unsaved_changes:
-                self.has_unsaved_changes = True
-                self._update_sub_header()
+        self._checked_version = self._edit_version
+        dirty = self._title_changed or self._fingerprint(self.text_entry.text) != self._original_fingerprint
+        if dirty != self.has_unsaved_changes:
+            self.has_unsaved_changes = dirty
+            self._request_sub_header_update()
+        if dirty:
+            self._journal_draft(self.text_entry.text)
         else:
-            if self.has_unsaved_changes:
-                self.has_unsaved_changes = False
-                self._update_sub_header()
+            self._drop_draft_of_saved_text()
 
+    def _recover_drafts(self):
+        """Picks up the draft journals a crash left for this diary"""
+        try:
+            drafts = self.services.get_draft_journal().drafts_for_diary(self.diary_id)
+        except Exception as e:
+            self.notify(f"Error reading drafts: {str(e)}", severity="warning")
+            return
+        for draft in drafts:
+            self._draft_base[draft.key] = draft.base
+            self._journaled_text[draft.key] = draft.text
+            if draft.entry_id is None:
+                if draft.text.strip():
+                    self.new_entry_content = draft.text
+                    self.notify("Recovered an unsaved new entry")
+            else:
+                self._recovered_drafts[draft.entry_id] = draft.text
+
+    def _discard_orphan_drafts(self):
+        """Drops recovered drafts of entries that no longer exist"""
+        for entry_id in list(self._recovered_drafts):
+            if not self.entry_cursor or self.entry_cursor.index_of(entry_id) is None:
+                del self._recovered_drafts[entry_id]
+                self._discard_draft(entry_id)
+
+    def _journal_draft(self, text: str):
+        """
+        Hands the change since the last idle moment to the draft journal thread and,
+        every so often, has that thread fold the draft into the database as well.
+        """
+        if self.is_new_entry:
+            entry_id, saved_text = None, ""
+        elif self._has_entries():
+            current_entry = self._current_entry()
+            entry_id, saved_text = current_entry.id, current_entry.text or ""
+        else:
+            return
+        key = DraftJournal.key_for(self.diary_id, entry_id)
+        base = self._draft_base.setdefault(key, saved_text)
+        previous = self._journaled_text.get(key, base)
+        if text == previous:
+            return
+        self._journaled_text[key] = text
+
+        unfolded = self._unfolded_drafts.get(key, 0) + 1
+        fold = entry_id is not None and (unfolded >= AUTOSAVE_FOLD_EVERY or
+                                         time.monotonic() - self._last_fold >= AUTOSAVE_FOLD_INTERVAL)
+        if fold:
+            self._draft_base[key] = text
+            self._unfolded_drafts[key] = 0
+            self._last_fold = time.monotonic()
+        else:
+            self._unfolded_drafts[key] = unfolded
+        journal = self.services.get_draft_journal()
+        journal.submit(self._write_draft, journal, entry_id, previous, text, base if fold else None, fold)
 
+    def _drop_draft_of_saved_text(self):
+        """
+        The text is back to the saved one (e.g. every edit undone): drops its draft and,
+        if a draft was already folded into the database, puts the saved text back there.
+        """
+        if self.is_new_entry or not self._has_entries():
+            return
+        current_entry = self._current_entry()
+        key = DraftJournal.key_for(self.diary_id, current_entry.id)
+        if key not in self._journaled_text:
+            return
+        saved_text = current_entry.text or ""
+        folded_text = self._draft_base.get(key, saved_text)
+        self._journaled_text.pop(key, None)
+        self._draft_base.pop(key, None)
+        self._unfolded_drafts.pop(key, None)
+        journal = self.services.get_draft_journal()
+        journal.submit(self._restore_saved_text, journal, current_entry.id, folded_text, saved_text)
+
+    def _restore_saved_text(self, journal: DraftJournal, entry_id: int, folded_text: str, saved_text: str):
+        """Runs on the journal thread, after any fold still queued"""
+        try:
+            if folded_text != saved_text:
+                with self.services.unit_of_work() as services:
+                    services.get_entry_service().write_draft_text(entry_id, folded_text, saved_text)
+            journal.discard(self.diary_id, entry_id)
+        except Exception as e:
+            self.app.call_from_thread(self.notify, f"Autosave failed: {str(e)}", severity="warning")
 
+    def _write_draft(self, journal: DraftJournal, entry_id: Optional[int], previous: str, text: str,
+                     expected_text: Optional[str], fold: bool):
+        """Runs on the journal thread: never blocks typing on disk or on an SQLite commit"""
+        try:
+            journal.append(self.diary_id, entry_id, previous, text)
+            if fold:
+                with self.services.unit_of_work() as services:
+                    folded = services.get_entry_service().write_draft_text(entry_id, expected_text, text)
+                if folded:
+                    journal.compact(self.diary_id, entry_id, text)
+        except Exception as e:
+            self.app.call_from_thread(self.notify, f"Autosave failed: {str(e)}", severity="warning")
 
+    def _discard_draft(self, entry_id: Optional[int]):
+        """Forgets the draft of an entry once its text is saved"""
+        key = DraftJournal.key_for(self.diary_id, entry_id)
+        self._journaled_text.pop(key, None)
+        self._draft_base.pop(key, None)
+        self._unfolded_drafts.pop(key, None)
+        journal = self.services.get_draft_journal()
+        journal.submit(journal.discard, self.diary_id, entry_id)
 
     def on_focus(self, event) -> None:
         """Captures focus changes to update footer"""
@@ -792,6 +1112,8 @@ class EditEntryScreen(Screen):
 
     def action_back_to_list(self) -> None:
         """Goes back to the diary list"""
+        if self._save_pending():
+            return
         if self.is_new_entry and not self.text_entry.text.strip() and not self.has_unsaved_changes:
             self.app.pop_screen()
             self.notify("Returned to diary list")
@@ -806,9 +1128,11 @@ class EditEntryScreen(Screen):
 
     def action_next_entry(self) -> None:
         """Goes to the next entry"""
+        if self._save_pending():
+            return
         self._save_current_state()
 
-        if not self.entries:
+        if not self._has_entries():
             if not self.is_new_entry:
                 self.is_new_entry = True
                 self._update_entry_display()
@@ -819,11 +1143,11 @@ class EditEntryScreen(Screen):
 
         if self.is_new_entry:
             self.notify("Already at the last position (new entry)")
-        elif self.current_entry_index < len(self.entries) - 1:
+        elif self.current_entry_index < len(self.entry_cursor) - 1:
             self.current_entry_index += 1
             self._update_entry_display()
-            current_entry = self.entries[self.current_entry_index]
-            self.notify(f"Navigating to: {current_entry.title}")
+            current_summary = self.entry_cursor.summary(self.current_entry_index)
+            self.notify(f"Navigating to: {current_summary.title}")
         else:
             self.is_new_entry = True
             self._update_entry_display()
@@ -831,40 +1155,63 @@ class EditEntryScreen(Screen):
 
     def action_prev_entry(self) -> None:
         """Goes to the previous entry"""
+        if self._save_pending():
+            return
         self._save_current_state()
 
-        if not self.entries:
+        if not self._has_entries():
             self.notify("No entries to navigate")
             return
 
         if self.is_new_entry:
-            if self.entries:
+            if self._has_entries():
                 self.is_new_entry = False
-                self.current_entry_index = len(self.entries) - 1
+                self.current_entry_index = len(self.entry_cursor) - 1
                 self._update_entry_display()
-                current_entry = self.entries[self.current_entry_index]
-                self.notify(f"Navigating to: {current_entry.title}")
+                current_summary = self.entry_cursor.summary(self.current_entry_index)
+                self.notify(f"Navigating to: {current_summary.title}")
             else:
                 self.notify("No previous entries")
         elif self.current_entry_index > 0:
             self.current_entry_index -= 1
             self._update_entry_display()
-            current_entry = self.entries[self.current_entry_index]
-            self.notify(f"Navigating to: {current_entry.title}")
+            current_summary = self.entry_cursor.summary(self.current_entry_index)
+            self.notify(f"Navigating to: {current_summary.title}")
         else:
             self.notify("Already at the first entry")
 
+    def action_search_entries(self) -> None:
+        """Opens the search over this diary's entries"""
+        self.app.push_screen(SearchScreen(self.diary_id, self.diary_name), self.handle_search_result)
+
+    def handle_search_result(self, result: Optional[SearchResult]) -> None:
+        """Navigates to the entry picked in the search"""
+        if result is None:
+            return
+        index = self.entry_cursor.index_of(result.entry_id) if self.entry_cursor else None
+        if index is None:
+            self.notify("Entry not found", severity="warning")
+            return
+        if self._save_pending():
+            return
+        self._save_current_state()
+        self.is_new_entry = False
+        self.current_entry_index = index
+        self._update_entry_display()
+        self.notify(f"Navigating to: {result.title}")
+
     def action_rename_entry(self) -> None:
         """Opens a modal to rename the entry."""
-        if not self.entries and not self.is_new_entry:
+        if self._save_pending():
+            return
+        if not self._has_entries() and not self.is_new_entry:
             self.notify("No entry to rename", severity="warning")
             return
 
         if self.is_new_entry:
             current_name = self.new_entry_title
         else:
-            current_entry = self.entries[self.current_entry_index]
-            current_name = current_entry.title
+            current_name = self.entry_cursor.summary(self.current_entry_index).title
 
         self.app.push_screen(
             RenameEntryModal(current_name=current_name),
@@ -886,16 +1233,20 @@ class EditEntryScreen(Screen):
             self.new_entry_title = new_name
             self.notify(f"New entry title changed to '{new_name}'")
         else:
-            current_entry = self.entries[self.current_entry_index]
+            current_entry = self._current_entry()
             old_name = current_entry.title
             current_entry.title = new_name
+            self.entry_cursor.set_title(self.current_entry_index, new_name)
             self.notify(f"Title changed from '{old_name}' to '{new_name}'")
 
         self.has_unsaved_changes = True
+        self._title_changed = True
         self._update_sub_header()
 
     def action_save(self) -> None:
         """Salva a entrada após validar e coletar as fotos referenciadas."""
+        if self._save_pending():
+            return
         photos_to_link = self._get_linked_photos_from_text()
 
         if photos_to_link is None:
@@ -912,46 +1263,51 @@ class EditEntryScreen(Screen):
                self.app.push_screen(RenameEntryModal(current_name=""), lambda result: self._handle_save_after_rename(result,content,
                                                                                                photos_to_link))
             else:
-                self.call_later(self._async_create_entry, content, photos_to_link)
+                self._start_save(self._async_create_entry(content, photos_to_link))
         else:
             # Passe a lista de fotos para o método de atualização
-            self.call_later(self._async_update_entry, content, photos_to_link)
+            self._start_save(self._async_update_entry(content, photos_to_link))
 
     def _handle_save_after_rename(self, result: str | None, content: str, photos_to_link: List[Photo]) -> None:
         if result is None:
             self.notify("Save cancelled")
             return
         self.new_entry_title = result
-        self.call_later(self._async_create_entry, content, photos_to_link)
+        self._start_save(self._async_create_entry(content, photos_to_link))
+
+    def _start_save(self, save):
+        """Runs a save in the background; the screen keeps handling input meanwhile"""
+        self._saving = True
+        self.run_worker(save, group="entry-save")
 
     async def _async_create_entry(self, content: str, photos_to_link: List[Photo]):
-        """Creates a new entry and links the referenced photos."""
+        """Creates a new entry and links the referenced photos, on the service thread."""
         try:
-            service_manager = self.app.service_manager
-            entry_service = service_manager.get_entry_service()
+            service_manager = self.services
+            title = self.new_entry_title
+            photo_ids = [photo.id for photo in photos_to_link]
+            edit_version = self._edit_version
+
+            def create(services):
+                return services.get_entry_service().create(
+                    travel_diary_id=self.diary_id,
+                    title=title,
+                    text=content,
+                    date=datetime.now(),
+                    photos=services.get_photo_service().read_by_ids(photo_ids)
+                )
 
-            new_entry = entry_service.create(
-                travel_diary_id=self.diary_id,
-                title=self.new_entry_title,
-                text=content,
-                date=datetime.now(),
-                photos=photos_to_link
-            )
+            new_entry = await service_manager.run_in_thread(create)
 
             if new_entry:
-                self.entries.append(new_entry)
-                self.entries.sort(key=lambda x: x.id)
-
-                for i, entry in enumerate(self.entries):
-                    if entry.id == new_entry.id:
-                        self.current_entry_index = i
-                        break
+                new_entry = service_manager.adopt(new_entry)
+                self.current_entry_index = self.entry_cursor.add(new_entry)
 
                 self.is_new_entry = False
-                self.has_unsaved_changes = False
-                self._original_content = new_entry.text
+                self._mark_saved(new_entry.text, edit_version)
+                self._discard_draft(None)
                 self.new_entry_title = ""
-                self.next_entry_id = max(entry.id for entry in self.entries) + 1
+                self.next_entry_id = self.entry_cursor.max_id() + 1
 
                 self._update_entry_display()
                 self.notify(f"Entry '{new_entry.title}' saved successfully!")
@@ -960,33 +1316,44 @@ class EditEntryScreen(Screen):
 
         except Exception as e:
             self.notify(f"Error creating entry: {str(e)}")
+        finally:
+            self._saving = False
 
     async def _async_update_entry(self, updated_content: str, photos_to_link: List[Photo]):
-        """Updates an existing entry and its photo links."""
+        """Updates an existing entry and its photo links, on the service thread."""
         try:
-            if not self.entries:
+            if not self._has_entries():
                 self.notify("No entry to update")
                 return
 
-            service_manager = self.app.service_manager
-            entry_service = service_manager.get_entry_service()
-            current_entry = self.entries[self.current_entry_index]
-
-            entry_result = Entry(
-                id=current_entry.id,
-                title=current_entry.title,
-                text=updated_content,
-                photos=photos_to_link,
-                date=current_entry.date,
-                travel_diary_id=self.diary_id,
-                fk_travel_diary_id=self.diary_id
-            )
+            service_manager = self.services
+            current_entry = self._current_entry()
+            entry_id, title, date = current_entry.id, current_entry.title, current_entry.date
+            photo_ids = [photo.id for photo in photos_to_link]
+            edit_version = self._edit_version
+
+            def update(services):
+                entry_service = services.get_entry_service()
+                original = entry_service.read_by_id(entry_id)
+                if original is None:
+                    return None
+                entry_result = Entry(
+                    id=entry_id,
+                    title=title,
+                    text=updated_content,
+                    photos=services.get_photo_service().read_by_ids(photo_ids),
+                    date=date,
+                    travel_diary_id=self.diary_id,
+                    fk_travel_diary_id=self.diary_id
+                )
+                return entry_service.update(original, entry_result)
 
-            result = entry_service.update(current_entry, entry_result)
+            result = await service_manager.run_in_thread(update)
 
             if result:
-                self.has_unsaved_changes = False
-                self._original_content = updated_content
+                service_manager.adopt(result)
+                self._mark_saved(updated_content, edit_version)
+                self._discard_draft(current_entry.id)
                 self._update_sub_header()
                 self.notify(f"Entry '{current_entry.title}' saved successfully!")
             else:
@@ -994,18 +1361,22 @@ class EditEntryScreen(Screen):
 
         except Exception as e:
             self.notify(f"Error updating entry: {str(e)}")
+        finally:
+            self._saving = False
 
     def check_key(self, event):
         """Check for custom key handling before bindings are processed"""
 
         # Sidebar shortcuts
         if self.sidebar_focused and self.sidebar_visible:
-            sidebar_keys = ["i", "n", "d", "e"]
+            sidebar_keys = ["i", "n", "f", "d", "e"]
             if event.key in sidebar_keys:
                 if event.key == "i":
                     self.action_insert_photo()
                 elif event.key == "n":
                     self.action_ingest_new_photo()
+                elif event.key == "f":
+                    self.action_import_photo_folder()
                 elif event.key == "d":
                     self.action_delete_photo()
                 elif event.key == "e":
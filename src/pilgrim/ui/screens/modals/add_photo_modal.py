@@ -3,6 +3,7 @@ from textual.app import ComposeResult
 from textual.screen import Screen
 from textual.widgets import Static, Input, Button
 from textual.containers import Horizontal, Container
+from pilgrim.utils import FileHasher
 from .file_picker_modal import FilePickerModal
 
 class AddPhotoModal(Screen):
@@ -50,12 +51,13 @@ class AddPhotoModal(Screen):
                 self.notify("File path and name are required", severity="error")
                 return
             
-            # Try to create the photo in the database
-            self.call_later(self._async_create_photo, {
+            # Try to create the photo in the database, in the background
+            event.button.disabled = True
+            self.run_worker(self._async_create_photo({
                 "filepath": filepath.strip(),
                 "name": name.strip(),
                 "caption": caption.strip() if caption.strip() else None
-            })
+            }), group="add-photo")
         elif event.button.id == "cancel-button":
             self.dismiss()
 
@@ -65,18 +67,25 @@ class AddPhotoModal(Screen):
 
         try:
             service_manager = self.app.service_manager
-            photo_service = service_manager.get_photo_service()
 
-            if photo_service.check_photo_by_hash(photo_service.hash_file(photo_data["filepath"]),self.diary_id):
+            # Hash off the event loop; create() below reuses the cached result
+            photo_hash = await FileHasher.hash_file_async(photo_data["filepath"])
+            with service_manager.unit_of_work() as services:
+                exists = services.get_photo_service().check_photo_by_hash(photo_hash, self.diary_id)
+            if exists:
                 self.notify("Photo already exists in database", severity="error")
                 return
 
-            new_photo = photo_service.create(
-                filepath=Path(photo_data["filepath"]),
-                name=photo_data["name"],
-                travel_diary_id=self.diary_id,
-                caption=photo_data["caption"]
-            )
+            # Copying a large file must not freeze the screen either
+            def create(services):
+                return services.get_photo_service().create(
+                    filepath=Path(photo_data["filepath"]),
+                    name=photo_data["name"],
+                    travel_diary_id=self.diary_id,
+                    caption=photo_data["caption"]
+                )
+
+            new_photo = await service_manager.run_in_thread(create)
 
             if new_photo:
                 self.created_photo = new_photo
@@ -99,6 +108,9 @@ class AddPhotoModal(Screen):
 
         except Exception as e:
             self.notify(f"Error creating photo: {str(e)}", severity="error")
+        finally:
+            if self.result is None:
+                self.query_one("#add-button", Button).disabled = False
 
     def handle_file_picker_result(self, result: str | None) -> None:
         if result:
@@ -26,8 +26,10 @@ class DeleteAllEntriesModal(DeleteYesConfirmationModal):
         self.app.push_screen(DiaryListScreen())
 
     def _delete_entries(self):
-        diary = self.app.service_manager.get_travel_diary_service().read_by_id(self.diary_id)
-        if self.app.service_manager.get_travel_diary_service().delete_all_entries(diary):
+        with self.app.service_manager.unit_of_work() as services:
+            travel_diary_service = services.get_travel_diary_service()
+            deleted = travel_diary_service.delete_all_entries(travel_diary_service.read_by_id(self.diary_id))
+        if deleted:
             self.notify("All entries deleted successfully")
         else:
             self.notify("Failed to delete all entries")
@@ -1,3 +1,4 @@
+import asyncio
 
 from textual.widgets import Button
 
@@ -16,17 +17,46 @@ class DeleteAllPhotosModal(DeleteYesConfirmationModal):
 
     @on(Button.Pressed, ".DeleteDiaryModal-DeleteButton")
     def on_delete_button_pressed(self, event):
+        # Removing the files of a large diary takes a while; keep the screen responsive
+        self.delete_button.disabled = True
+        self.cancel_button.disabled = True
+        self.user_input.disabled = True
+        self.delete_button.label = "Deleting..."
+        self.run_worker(self._async_delete_all_photos(), group="photos-delete", exclusive=True)
 
+    def _show_progress(self, stage: str, done: int, total: int):
+        self.second_head_text.update(f"Removing photo files: {done}/{total}")
+
+    async def _async_delete_all_photos(self):
         from pilgrim.ui.screens.diary_list_screen import DiaryListScreen
 
+        try:
+            deleted = await self._delete_all_photos()
+        except Exception as e:
+            self.notify(f"Error deleting photos: {str(e)}", severity="error")
+            self.delete_button.label = "Delete"
+            self.delete_button.disabled = False
+            self.cancel_button.disabled = False
+            self.user_input.disabled = False
+            return
+
+        if deleted:
+            self.notify("All photos deleted successfully")
+        else:
+            self.notify("Failed to delete all photos")
         self.result = True
-        self._delete_all_photo()
         self.dismiss()
         self.app.push_screen(DiaryListScreen())
-        
-    def _delete_all_photo(self):
-        diary = self.app.service_manager.get_travel_diary_service().read_by_id(self.diary_id)
-        if self.app.service_manager.get_travel_diary_service().delete_all_photos(diary):
-            self.notify("All photos deleted successfully")
-        else:
-            self.notify("Failed to delete all photos")
\ No newline at end of file
+
+    async def _delete_all_photos(self) -> bool:
+        loop = asyncio.get_running_loop()
+
+        def report(stage: str, done: int, total: int):
+            loop.call_soon_threadsafe(self._show_progress, stage, done, total)
+
+        def delete_all(services, diary_id):
+            service = services.get_travel_diary_service()
+            diary = service.read_by_id(diary_id)
+            return diary is not None and service.delete_all_photos(diary, progress=report)
+
+        return await self.app.service_manager.run_in_thread(delete_all, self.diary_id)
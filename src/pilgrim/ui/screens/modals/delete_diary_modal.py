@@ -49,9 +49,23 @@ class DeleteDiaryModal(Screen):
 
     @on(Button.Pressed,"#DeleteDiaryModal-DeleteButton")
     def on_delete_button_pressed(self, event):
+        # Removing the photos of a large diary takes a while; keep the screen responsive
+        self.delete_button.disabled = True
+        self.cancel_button.disabled = True
+        self.delete_button.label = "Deleting..."
+        self.run_worker(self._async_delete_diary(), group="diary-delete", exclusive=True)
+
+    async def _async_delete_diary(self):
+        try:
+            await self._delete_diary()
+        except Exception as e:
+            self.notify(f"Error deleting diary: {str(e)}", severity="error")
+            self.delete_button.label = "Delete Diary"
+            self.delete_button.disabled = False
+            self.cancel_button.disabled = False
+            return
 
         self.result = True
-        self._delete_diary()
         self.dismiss()
 
         from pilgrim.ui.screens.diary_list_screen import DiaryListScreen
@@ -68,9 +82,15 @@ class DeleteDiaryModal(Screen):
     def action_cancel(self):
         self.dismiss()
 
-    def _delete_diary(self):
-        diary = self.app.service_manager.get_travel_diary_service().read_by_id(self.diary_id)
-        self.app.service_manager.get_travel_diary_service().delete(diary)
+    async def _delete_diary(self):
+        def delete(services, diary_id):
+            service = services.get_travel_diary_service()
+            diary = service.read_by_id(diary_id)
+            if diary is not None:
+                service.delete(diary)
+            return diary
+
+        await self.app.service_manager.run_in_thread(delete, self.diary_id)
         if self.app.config_manager.get_auto_open_diary() == self.diary_name:
             self.app.config_manager.set_auto_open_diary(None)
             self.app.config_manager.save_config()
@@ -0,0 +1,32 @@
+from pathlib import Path
+from textual.app import ComposeResult
+from textual.screen import Screen
+from textual.widgets import Static, Input, Button
+from textual.containers import Horizontal, Container
+
+
+class ImportFolderModal(Screen):
+    """Modal asking for a folder whose photos (subfolders included) are imported"""
+
+    def compose(self) -> ComposeResult:
+        yield Container(
+            Static("📂 Import Photo Folder", classes="ImportFolderModal-Title"),
+            Static("Folder path:", classes="ImportFolderModal-Label"),
+            Input(placeholder="Enter folder path...", id="folder-input", classes="ImportFolderModal-Input"),
+            Horizontal(
+                Button("Import", id="import-button", classes="ImportFolderModal-Button"),
+                Button("Cancel", id="cancel-button", classes="ImportFolderModal-Button"),
+                classes="ImportFolderModal-Buttons"
+            ),
+            classes="ImportFolderModal-Dialog"
+        )
+
+    def on_button_pressed(self, event: Button.Pressed) -> None:
+        if event.button.id == "import-button":
+            folder = Path(self.query_one("#folder-input", Input).value.strip()).expanduser()
+            if not folder.is_dir():
+                self.notify("Please enter an existing folder", severity="error")
+                return
+            self.dismiss(str(folder))
+        elif event.button.id == "cancel-button":
+            self.dismiss(None)
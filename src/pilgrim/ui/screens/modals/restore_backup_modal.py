@@ -0,0 +1,95 @@
+import asyncio
+from pathlib import Path
+
+from textual.containers import Container
+from textual.widgets import Header, Footer, Label, Button, Input
+from textual.screen import Screen
+from textual.binding import Binding
+from textual import on
+
+from pilgrim.service.backup_service import BackupService
+
+
+class RestoreBackupModal(Screen):
+    """Asks for confirmation, then restores a backup on the service thread, showing its progress."""
+    BINDINGS = [
+        Binding("escape", "cancel", "Cancel"),
+    ]
+    def __init__(self, archive_path: Path):
+        super().__init__()
+        self.archive_path = archive_path
+        self.user_input = Input(placeholder="Type 'Yes, I do' to confirm", id="RestoreBackupModal-UserInput")
+        self.restore_button = Button("Restore", id="RestoreBackupModal-RestoreButton", disabled=True)
+        self.cancel_button = Button("Cancel", id="RestoreBackupModal-CancelButton")
+        self.head_text = Label(f"Restore the backup {archive_path.name}?", id="RestoreBackupModal-HeadText")
+        self.second_head_text = Label(
+            "The current database and photos are replaced; the database is kept as a .before_restore copy.",
+            id="RestoreBackupModal-SecondHeadText")
+        self.result = None
+
+    def compose(self):
+        yield Header()
+        yield Footer()
+        yield Container(
+            self.head_text,
+            self.second_head_text,
+            self.user_input,
+            Container(
+                self.restore_button,
+                self.cancel_button,
+                classes="DeleteYesConfirmationModal-DeleteButtonContainer"
+            ),
+            classes="DeleteYesConfirmationModal-DeleteModalContainer"
+        )
+
+    @on(Input.Changed, "#RestoreBackupModal-UserInput")
+    def on_user_input_changed(self, event):
+        self.restore_button.disabled = event.value.strip() != "Yes, I do"
+
+    @on(Button.Pressed, "#RestoreBackupModal-CancelButton")
+    def on_cancel_button_pressed(self, event):
+        self.action_cancel()
+
+    def action_cancel(self):
+        if self.restore_button.label != "Restoring...":
+            self.dismiss(False)
+
+    @on(Button.Pressed, "#RestoreBackupModal-RestoreButton")
+    def on_restore_button_pressed(self, event):
+        # Extracting and verifying a large archive takes a while; keep the screen responsive
+        self.restore_button.disabled = True
+        self.cancel_button.disabled = True
+        self.user_input.disabled = True
+        self.restore_button.label = "Restoring..."
+        self.run_worker(self._async_restore(), group="backup-restore", exclusive=True)
+
+    def _show_progress(self, stage: str, done: int, total: int):
+        self.second_head_text.update(f"Restoring {self.archive_path.name}: {stage} {done}/{total}")
+
+    async def _async_restore(self):
+        loop = asyncio.get_running_loop()
+
+        def report(stage: str, done: int, total: int):
+            loop.call_soon_threadsafe(self._show_progress, stage, done, total)
+
+        def restore(services, archive_path):
+            return BackupService(services.session).restore(archive_path, progress=report)
+
+        service_manager = self.app.service_manager
+        # The restore swaps the database file; no session may hold a connection to the old one
+        service_manager.close()
+        try:
+            result_operation, result_data = await service_manager.run_in_thread(restore, self.archive_path)
+        except Exception as e:
+            result_operation, result_data = False, str(e)
+
+        if result_operation:
+            self.notify(f"Restored {self.archive_path.name}: {result_data['verified']} photo(s) verified")
+            self.result = True
+            self.dismiss(True)
+            return
+        self.notify(f"Error restoring backup: {result_data}", severity="error")
+        self.restore_button.label = "Restore"
+        self.restore_button.disabled = False
+        self.cancel_button.disabled = False
+        self.user_input.disabled = False
@@ -16,6 +16,7 @@ class NewDiaryModal(ModalScreen[str]):
         super().__init__()
         self.auto_open = self.app.config_manager.auto_open_new_diary
         self.name_input = Input(id="NewDiaryModal-NameInput",classes="NewDiaryModal-NameInput") # This ID is fine, it's specific to the input
+        self.creating = False
 
     def compose(self) -> ComposeResult:
 
@@ -45,9 +46,11 @@ class NewDiaryModal(ModalScreen[str]):
 
     def action_create_diary(self) -> None:
         diary_name = self.name_input.value.strip()
+        if self.creating:
+            return
         if diary_name:
-
-            self.call_later(self._async_create_diary, diary_name)
+            self.creating = True
+            self.run_worker(self._async_create_diary(diary_name), group="diary-create")
 
         else:
             self.notify("Diary name cannot be empty.", severity="warning")
@@ -60,8 +63,8 @@ class NewDiaryModal(ModalScreen[str]):
     async def _async_create_diary(self, name: str):
 
         try:
-            service = self.app.service_manager.get_travel_diary_service()
-            created_diary = await service.async_create(name)
+            created_diary = await self.app.service_manager.run_in_thread(
+                lambda services: services.get_travel_diary_service().create(name))
             if created_diary:
                 self.dismiss(name)
 
@@ -73,6 +76,8 @@ class NewDiaryModal(ModalScreen[str]):
                 self.notify("Error Creating the diary")
         except Exception as e:
             self.notify(f"Exception on creating the diary: {str(e)}")
+        finally:
+            self.creating = False
 
 
 
@@ -0,0 +1,96 @@
+import asyncio
+from typing import Optional
+
+from rich.text import Text
+from textual.app import ComposeResult
+from textual.binding import Binding
+from textual.containers import Vertical
+from textual.screen import ModalScreen
+from textual.widgets import Input, OptionList, Static
+
+from pilgrim.service.search_service import HIGHLIGHT_END, HIGHLIGHT_START, SearchResult
+
+# Waits for a pause in typing before querying
+SEARCH_DELAY = 0.15
+SEARCH_LIMIT = 50
+
+
+def highlight_snippet(snippet: str) -> Text:
+    """Turns the search snippet markers into bold highlighted text"""
+    text = Text(no_wrap=True, overflow="ellipsis")
+    highlighted = False
+    for part in snippet.replace("\n", " ").replace(HIGHLIGHT_END, HIGHLIGHT_START).split(HIGHLIGHT_START):
+        text.append(part, style="bold reverse" if highlighted else "")
+        highlighted = not highlighted
+    return text
+
+
+class SearchScreen(ModalScreen[Optional[SearchResult]]):
+    """Searches the entries of one diary, or of all of them, and returns the chosen one"""
+
+    BINDINGS = [
+        Binding("escape", "cancel", "Cancel"),
+        Binding("down", "focus_results", "Results", show=False),
+    ]
+
+    def __init__(self, travel_diary_id: int | None = None, diary_name: str | None = None):
+        super().__init__()
+        self.travel_diary_id = travel_diary_id
+        self.results = []
+        scope = f"in {diary_name}" if diary_name else "in all diaries"
+        self.title_label = Static(f"🔍 Search {scope}", classes="SearchScreen-Title")
+        self.query_input = Input(placeholder="Type words to search...", id="search-input",
+                                 classes="SearchScreen-Input")
+        self.result_list = OptionList(id="search-results", classes="SearchScreen-Results")
+        self.status = Static("", classes="SearchScreen-Status")
+
+    def compose(self) -> ComposeResult:
+        with Vertical(classes="SearchScreen-Dialog"):
+            yield self.title_label
+            yield self.query_input
+            yield self.result_list
+            yield self.status
+
+    def on_mount(self) -> None:
+        self.query_input.focus()
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        self.run_worker(self._async_search(event.value), group="search", exclusive=True)
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        if self.results:
+            self.dismiss(self.results[self.result_list.highlighted or 0])
+
+    def on_option_list_option_selected(self, event: OptionList.OptionSelected) -> None:
+        self.dismiss(self.results[event.option_index])
+
+    async def _async_search(self, query: str):
+        await asyncio.sleep(SEARCH_DELAY)
+        try:
+            with self.app.service_manager.unit_of_work() as services:
+                self.results = services.get_search_service().search(query, self.travel_diary_id, limit=SEARCH_LIMIT)
+        except Exception as e:
+            self.results = []
+            self.status.update(f"Search failed: {str(e)}")
+            return
+        self.result_list.clear_options()
+        for result in self.results:
+            line = Text.assemble((result.title, "bold"), f"  {result.date.strftime('%Y-%m-%d')}\n")
+            line.append_text(highlight_snippet(result.snippet))
+            self.result_list.add_option(line)
+        if not query.strip():
+            self.status.update("")
+        elif self.results:
+            more = "+" if len(self.results) == SEARCH_LIMIT else ""
+            self.status.update(f"{len(self.results)}{more} entries found • ↓ to pick one")
+        else:
+            self.status.update("No entries found")
+
+    def action_focus_results(self) -> None:
+        if self.results:
+            self.result_list.focus()
+            if self.result_list.highlighted is None:
+                self.result_list.highlighted = 0
+
+    def action_cancel(self) -> None:
+        self.dismiss(None)
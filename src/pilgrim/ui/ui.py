@@ -37,11 +37,26 @@ class UIApp(App):
                 "Open About Pilgrim",
                 screen.action_about_cmd
             )
+            yield SystemCommand(
+                "Search Entries",
+                "Search the entries of every diary",
+                screen.action_search_entries
+            )
             yield SystemCommand(
                 "Backup Database",
                 "Backup the Database",
                 screen.action_backup
             )
+            yield SystemCommand(
+                "Incremental Backup",
+                "Backup the Database and only the photos missing from previous backups",
+                screen.action_incremental_backup
+            )
+            yield SystemCommand(
+                "Restore Latest Backup",
+                "Replace the Database and photos with the most recent backup",
+                screen.action_restore_backup
+            )
 
         elif isinstance(screen, AboutScreen):
             yield SystemCommand(
@@ -56,6 +71,11 @@ class UIApp(App):
                 "Return to the diary list",
                 screen.action_back_to_list
             )
+            yield SystemCommand(
+                "Search Entries",
+                "Search the entries of this diary",
+                screen.action_search_entries
+            )
 
         # Always include quit command
         yield SystemCommand(
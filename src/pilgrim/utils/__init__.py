@@ -1,4 +1,5 @@
 from .directory_manager import DirectoryManager
 from .config_manager import ConfigManager
+from .file_hasher import FileHasher
 
-__all__ = ['DirectoryManager', 'ConfigManager']
+__all__ = ['DirectoryManager', 'ConfigManager', 'FileHasher']
@@ -0,0 +1,43 @@
+import os
+import uuid
+from pathlib import Path
+
+from pilgrim.utils.directory_manager import DirectoryManager
+from pilgrim.utils.file_ingestion import DEFAULT_INGESTION_MODE, ingest_file
+
+# diary: every diary keeps its own copy under diaries/<dir>/data/images (default)
+# blobs: photos are stored once under blobs/, keyed by photo_hash, and shared by all diaries
+STORAGE_MODES = ("diary", "blobs")
+DEFAULT_STORAGE_MODE = "diary"
+
+
+class BlobStore:
+    """
+    Content-addressed photo files: blobs/<first two hash characters>/<hash><extension>.
+    The store only handles files; how many photos point at a blob is counted from the
+    photos table by PhotoService.
+    """
+
+    @staticmethod
+    def path_for(photo_hash: str, suffix: str = "") -> Path:
+        return DirectoryManager.get_blobs_root() / photo_hash[:2] / f"{photo_hash}{suffix.lower()}"
+
+    @staticmethod
+    def contains(filepath) -> bool:
+        return Path(filepath).is_relative_to(DirectoryManager.get_blobs_root())
+
+    @staticmethod
+    def put(source_path: Path, photo_hash: str, ingestion_mode: str = DEFAULT_INGESTION_MODE) -> Path:
+        """Stores the file under its hash unless that blob already exists; returns the blob path."""
+        blob_path = BlobStore.path_for(photo_hash, Path(source_path).suffix)
+        if blob_path.exists():
+            return blob_path
+        DirectoryManager.ensure_directory(blob_path.parent)
+        # Written under a temporary name first so a blob path never holds a partial file
+        partial_path = blob_path.with_name(f".{uuid.uuid4().hex}.part")
+        try:
+            ingest_file(source_path, partial_path, ingestion_mode)
+            os.replace(partial_path, blob_path)
+        finally:
+            partial_path.unlink(missing_ok=True)
+        return blob_path
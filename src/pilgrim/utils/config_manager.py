@@ -5,6 +5,9 @@ import tomli
 import tomli_w
 
 from pilgrim.utils import DirectoryManager
+from pilgrim.utils.blob_store import DEFAULT_STORAGE_MODE, STORAGE_MODES
+from pilgrim.utils.file_ingestion import DEFAULT_INGESTION_MODE, INGESTION_MODES
+from pilgrim.utils.sqlite_profile import DEFAULT_OPTIMIZE_INTERVAL, DEFAULT_SQLITE_PRAGMAS, validate_pragmas
 
 
 class SingletonMeta(type):
@@ -25,6 +28,10 @@ class ConfigManager(metaclass=SingletonMeta):
         self.database_type = None
         self.auto_open_diary = None
         self.auto_open_new_diary = None
+        self.photo_ingestion_mode = DEFAULT_INGESTION_MODE
+        self.photo_storage = DEFAULT_STORAGE_MODE
+        self.sqlite_pragmas = dict(DEFAULT_SQLITE_PRAGMAS)
+        self.sqlite_optimize_interval = DEFAULT_OPTIMIZE_INTERVAL
         self.config_dir = DirectoryManager.get_config_directory()
         self.__data = None
 
@@ -42,12 +49,29 @@ class ConfigManager(metaclass=SingletonMeta):
             self.__data = data
             self.database_url = self.__data["database"]["url"]
             self.database_type = self.__data["database"]["type"]
+            # Older config files have no [database.sqlite] table; missing pragmas keep their defaults
+            sqlite = self.__data["database"].get("sqlite", {})
+            self.sqlite_pragmas = validate_pragmas({**DEFAULT_SQLITE_PRAGMAS, **sqlite.get("pragmas", {})})
+            optimize_interval = sqlite.get("optimize_interval", DEFAULT_OPTIMIZE_INTERVAL)
+            if isinstance(optimize_interval, bool) or not isinstance(optimize_interval, int) or optimize_interval < 0:
+                raise ValueError(f"Invalid SQLite optimize interval: {optimize_interval}")
+            self.sqlite_optimize_interval = optimize_interval
 
             if self.__data["settings"]["diary"]["auto_open_diary_on_startup"] == "":
                 self.auto_open_diary = None
             else:
                 self.auto_open_diary = self.__data["settings"]["diary"]["auto_open_diary_on_startup"]
             self.auto_open_new_diary = self.__data["settings"]["diary"]["auto_open_on_creation"]
+            # Older config files have no [settings.photos] table
+            photos = self.__data["settings"].get("photos", {})
+            ingestion_mode = photos.get("ingestion_mode", DEFAULT_INGESTION_MODE)
+            if ingestion_mode not in INGESTION_MODES:
+                raise ValueError(f"Invalid photo ingestion mode: {ingestion_mode}")
+            self.photo_ingestion_mode = ingestion_mode
+            storage = photos.get("storage", DEFAULT_STORAGE_MODE)
+            if storage not in STORAGE_MODES:
+                raise ValueError(f"Invalid photo storage: {storage}")
+            self.photo_storage = storage
         else:
             print("Error: config.toml not found.")
             self.create_config()
@@ -62,12 +86,20 @@ class ConfigManager(metaclass=SingletonMeta):
         default = {
             "database": {
                 "url": f"{config_dir}/database.db",
-                "type": "sqlite"
+                "type": "sqlite",
+                "sqlite": {
+                    "optimize_interval": DEFAULT_OPTIMIZE_INTERVAL,
+                    "pragmas": dict(DEFAULT_SQLITE_PRAGMAS)
+                }
             },
             "settings": {
                 "diary": {
                     "auto_open_diary_on_startup": "",
                     "auto_open_on_creation": False
+                },
+                "photos": {
+                    "ingestion_mode": DEFAULT_INGESTION_MODE,
+                    "storage": DEFAULT_STORAGE_MODE
                 }
             }
         }
@@ -88,8 +120,14 @@ class ConfigManager(metaclass=SingletonMeta):
 
         self.__data["database"]["url"] = self.database_url
         self.__data["database"]["type"] = self.database_type
+        self.__data["database"]["sqlite"] = {
+            "optimize_interval": self.sqlite_optimize_interval,
+            "pragmas": dict(self.sqlite_pragmas),
+        }
         self.__data["settings"]["diary"]["auto_open_diary_on_startup"] = self.auto_open_diary or ""
         self.__data["settings"]["diary"]["auto_open_on_creation"] = self.auto_open_new_diary
+        self.__data["settings"].setdefault("photos", {})["ingestion_mode"] = self.photo_ingestion_mode
+        self.__data["settings"]["photos"]["storage"] = self.photo_storage
         try:
             self.create_config(self.__data)
         except Exception as e:
@@ -109,3 +147,25 @@ class ConfigManager(metaclass=SingletonMeta):
 
     def set_auto_open_new_diary(self, value: bool):
         self.auto_open_new_diary = value
+
+    def set_photo_ingestion_mode(self, value: str):
+        if value not in INGESTION_MODES:
+            raise ValueError(f"Invalid photo ingestion mode: {value}")
+        self.photo_ingestion_mode = value
+
+    def get_photo_ingestion_mode(self):
+        return self.photo_ingestion_mode
+
+    def set_photo_storage(self, value: str):
+        if value not in STORAGE_MODES:
+            raise ValueError(f"Invalid photo storage: {value}")
+        self.photo_storage = value
+
+    def get_photo_storage(self):
+        return self.photo_storage
+
+    def set_sqlite_pragmas(self, value: dict):
+        self.sqlite_pragmas = validate_pragmas({**DEFAULT_SQLITE_PRAGMAS, **value})
+
+    def get_sqlite_pragmas(self):
+        return self.sqlite_pragmas
@@ -1,28 +1,73 @@
 import os
 import shutil
 from pathlib import Path
+from threading import Lock
 
 
 class DirectoryManager:
+    # Directories already created/verified by this process, so repeated path
+    # lookups don't hit the filesystem again.
+    _verified_directories: set = set()
+    _lock: Lock = Lock()
+
+    @staticmethod
+    def ensure_directory(path: Path, parents: bool = False) -> Path:
+        """
+        Creates the directory with owner-only permissions the first time it is
+        requested in this process; later calls are a set lookup.
+        """
+        if path in DirectoryManager._verified_directories:
+            return path
+        with DirectoryManager._lock:
+            if path not in DirectoryManager._verified_directories:
+                path.mkdir(parents=parents, exist_ok=True)
+                os.chmod(path, 0o700)
+                DirectoryManager._verified_directories.add(path)
+        return path
+
+    @staticmethod
+    def invalidate(path: Path = None):
+        """
+        Forgets that a directory (and everything below it) was verified, e.g. after
+        it was removed or renamed. Without a path the whole cache is cleared.
+        """
+        with DirectoryManager._lock:
+            if path is None:
+                DirectoryManager._verified_directories.clear()
+                return
+            path = Path(path)
+            DirectoryManager._verified_directories = {
+                verified for verified in DirectoryManager._verified_directories
+                if verified != path and path not in verified.parents
+            }
+
     @staticmethod
     def get_config_directory() -> Path:
         """
         Get the ~/.pilgrim directory path.
         Creates it if it doesn't exist.
         """
-        home = Path.home()
-        config_dir = home / ".pilgrim"
-        config_dir.mkdir(exist_ok=True)
-        os.chmod(config_dir, 0o700)
-        return config_dir
+        return DirectoryManager.ensure_directory(Path.home() / ".pilgrim")
 
     @staticmethod
     def get_diaries_root() -> Path:
         """Returns the path to the diaries directory."""
-        diaries_dir = DirectoryManager.get_config_directory() / "diaries"
-        diaries_dir.mkdir(exist_ok=True)
-        os.chmod(diaries_dir, 0o700)
-        return diaries_dir
+        return DirectoryManager.ensure_directory(DirectoryManager.get_config_directory() / "diaries")
+
+    @staticmethod
+    def get_blobs_root() -> Path:
+        """Returns the path to the content-addressed photo store shared by all diaries."""
+        return DirectoryManager.ensure_directory(DirectoryManager.get_config_directory() / "blobs")
+
+    @staticmethod
+    def get_thumbnails_directory() -> Path:
+        """Returns the path to the photo thumbnail cache."""
+        return DirectoryManager.ensure_directory(DirectoryManager.get_config_directory() / "thumbnails")
+
+    @staticmethod
+    def get_drafts_directory() -> Path:
+        """Returns the path to the autosave draft journals."""
+        return DirectoryManager.ensure_directory(DirectoryManager.get_config_directory() / "drafts")
 
     @staticmethod
     def get_diary_directory(directory_name: str) -> Path:
@@ -0,0 +1,130 @@
+import json
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import List, NamedTuple, Optional
+
+JOURNAL_SUFFIX = ".jsonl"
+NEW_ENTRY_KEY = "new"
+
+
+class Draft(NamedTuple):
+    key: str
+    travel_diary_id: int
+    entry_id: Optional[int]
+    base: str
+    text: str
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    """Binary search on slice comparisons, so the scanning is done by memcmp rather than a Python loop."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def compute_delta(old: str, new: str) -> dict:
+    """
+    The smallest single replacement turning old into new: keep the first "p"
+    characters, delete "d" characters, insert "i". Typing produces deltas of a few bytes.
+    """
+    prefix = _common_prefix_length(old, new)
+    suffix = _common_prefix_length(old[prefix:][::-1], new[prefix:][::-1])
+    return {"p": prefix, "d": len(old) - prefix - suffix, "i": new[prefix:len(new) - suffix]}
+
+
+def apply_delta(text: str, delta: dict) -> str:
+    position = delta["p"]
+    return text[:position] + delta["i"] + text[position + delta["d"]:]
+
+
+class DraftJournal:
+    """
+    Write-ahead journals of unsaved entry text, one JSON-lines file per entry under
+    root. The first line holds the text the edits started from, every following line
+    one delta. Lines are fsync'ed as they are written, so after a crash replaying a
+    journal gives back the text as of the last idle moment. A torn last line (crash
+    mid-write) is ignored.
+
+    Writes go through submit(), which runs them in order on one background thread.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._lock = Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+    @staticmethod
+    def key_for(travel_diary_id: int, entry_id: Optional[int]) -> str:
+        return f"{travel_diary_id}-{NEW_ENTRY_KEY if entry_id is None else entry_id}"
+
+    def path_for(self, key: str) -> Path:
+        return self.root / f"{key}{JOURNAL_SUFFIX}"
+
+    @staticmethod
+    def _write_line(f, record: dict):
+        f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def append(self, travel_diary_id: int, entry_id: Optional[int], old_text: str, new_text: str):
+        """Journals the change from old_text to new_text, starting the journal from old_text if there is none."""
+        path = self.path_for(self.key_for(travel_diary_id, entry_id))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            if f.tell() == 0:
+                self._write_line(f, {"diary": travel_diary_id, "entry": entry_id, "base": old_text})
+            self._write_line(f, compute_delta(old_text, new_text))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def compact(self, travel_diary_id: int, entry_id: Optional[int], text: str):
+        """Replaces a journal by one starting from text, e.g. once text reached the database."""
+        path = self.path_for(self.key_for(travel_diary_id, entry_id))
+        partial_path = path.with_suffix(".part")
+        with open(partial_path, "w", encoding="utf-8") as f:
+            self._write_line(f, {"diary": travel_diary_id, "entry": entry_id, "base": text})
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial_path, path)
+
+    def discard(self, travel_diary_id: int, entry_id: Optional[int]):
+        self.path_for(self.key_for(travel_diary_id, entry_id)).unlink(missing_ok=True)
+
+    def replay(self, path: Path) -> Optional[Draft]:
+        """Rebuilds the text a journal leads to; None if the journal is unreadable."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                text = header["base"]
+                for line in f:
+                    try:
+                        delta = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    text = apply_delta(text, delta)
+        except (OSError, ValueError, KeyError):
+            return None
+        return Draft(path.stem, header["diary"], header["entry"], header["base"], text)
+
+    def drafts_for_diary(self, travel_diary_id: int) -> List[Draft]:
+        """Replays the journals left for a diary's entries, e.g. by a crash."""
+        if not self.root.exists():
+            return []
+        drafts = []
+        for path in sorted(self.root.glob(f"{travel_diary_id}-*{JOURNAL_SUFFIX}")):
+            draft = self.replay(path)
+            if draft is not None and draft.travel_diary_id == travel_diary_id:
+                drafts.append(draft)
+        return drafts
+
+    def submit(self, func, *args) -> Future:
+        """Runs func on the journal thread, after every write submitted before it."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pilgrim-drafts")
+            return self._executor.submit(func, *args)
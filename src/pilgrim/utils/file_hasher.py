@@ -0,0 +1,90 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable
+
+HASH_ALGORITHM = 'sha3_384'
+READ_CHUNK_SIZE = 1024 * 1024
+CACHE_SIZE = 4096
+
+
+class FileHasher:
+    # (path, size, mtime_ns, inode) -> hexdigest, most recently used last. A file
+    # whose metadata did not change since it was hashed is never read again.
+    _cache: "OrderedDict[tuple, str]" = OrderedDict()
+    _lock: Lock = Lock()
+    _executor: ThreadPoolExecutor | None = None
+
+    @staticmethod
+    def _fingerprint(filepath) -> tuple:
+        stat = os.stat(filepath)
+        return os.path.realpath(filepath), stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+    @staticmethod
+    def _digest(filepath) -> str:
+        """Reads the file in large chunks into a reused buffer; hashlib releases the GIL while updating."""
+        hash_func = hashlib.new(HASH_ALGORITHM)
+        buffer = bytearray(READ_CHUNK_SIZE)
+        view = memoryview(buffer)
+        with open(filepath, 'rb', buffering=0) as f:
+            while read := f.readinto(buffer):
+                hash_func.update(view[:read])
+        return hash_func.hexdigest()
+
+    @staticmethod
+    def _store(key: tuple, digest: str):
+        with FileHasher._lock:
+            FileHasher._cache[key] = digest
+            FileHasher._cache.move_to_end(key)
+            while len(FileHasher._cache) > CACHE_SIZE:
+                FileHasher._cache.popitem(last=False)
+
+    @staticmethod
+    def hash_file(filepath) -> str:
+        """Returns the SHA3-384 of a file, reading it only if it changed since it was last hashed."""
+        key = FileHasher._fingerprint(filepath)
+        with FileHasher._lock:
+            digest = FileHasher._cache.get(key)
+            if digest is not None:
+                FileHasher._cache.move_to_end(key)
+                return digest
+        digest = FileHasher._digest(filepath)
+        FileHasher._store(key, digest)
+        return digest
+
+    @staticmethod
+    def remember(filepath, digest: str):
+        """Records the hash of a file known to hold the same bytes as an already hashed one (e.g. a copy)."""
+        try:
+            FileHasher._store(FileHasher._fingerprint(filepath), digest)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _get_executor() -> ThreadPoolExecutor:
+        with FileHasher._lock:
+            if FileHasher._executor is None:
+                FileHasher._executor = ThreadPoolExecutor(thread_name_prefix="pilgrim-hash")
+            return FileHasher._executor
+
+    @staticmethod
+    def hash_files(filepaths: Iterable) -> Dict[Path, str]:
+        """Hashes several files concurrently and returns {path: hash}."""
+        filepaths = [Path(filepath) for filepath in filepaths]
+        digests = FileHasher._get_executor().map(FileHasher.hash_file, filepaths)
+        return dict(zip(filepaths, digests))
+
+    @staticmethod
+    async def hash_file_async(filepath) -> str:
+        """Hashes a file on the worker pool so the event loop keeps running."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(FileHasher._get_executor(), FileHasher.hash_file, filepath)
+
+    @staticmethod
+    def clear_cache():
+        with FileHasher._lock:
+            FileHasher._cache.clear()
@@ -0,0 +1,78 @@
+import errno
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+from pilgrim.utils.file_hasher import HASH_ALGORITHM, READ_CHUNK_SIZE, FileHasher
+
+# copy:      plain copy (default)
+# reflink:   copy-on-write clone on filesystems that support it (btrfs, XFS), falling back to copy
+# hardlink:  hard link to the original file, falling back to copy across filesystems;
+#            the diary then shares the file with its source, so editing one edits the other
+# hash_copy: copy and hash in a single pass over the source
+INGESTION_MODES = ("copy", "reflink", "hardlink", "hash_copy")
+DEFAULT_INGESTION_MODE = "copy"
+
+# ioctl request number of FICLONE on Linux (_IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+# Errors meaning "this filesystem/platform can't do it", as opposed to real I/O failures
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EPERM, errno.ENOSYS}
+
+
+def _reflink(source_path: Path, dest_path: Path):
+    import fcntl
+
+    with open(source_path, 'rb') as src, open(dest_path, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    shutil.copystat(source_path, dest_path)
+
+
+def _hash_copy(source_path: Path, dest_path: Path) -> str:
+    hash_func = hashlib.new(HASH_ALGORITHM)
+    buffer = bytearray(READ_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(source_path, 'rb', buffering=0) as src, open(dest_path, 'wb') as dst:
+        while read := src.readinto(buffer):
+            hash_func.update(view[:read])
+            dst.write(view[:read])
+    shutil.copystat(source_path, dest_path)
+    return hash_func.hexdigest()
+
+
+def ingest_file(source_path: Path, dest_path: Path, mode: str = DEFAULT_INGESTION_MODE) -> str | None:
+    """
+    Places a photo in the diary using the given ingestion mode.
+    Returns the photo hash when the mode computed it on the way, otherwise None.
+    """
+    if mode not in INGESTION_MODES:
+        raise ValueError(f"Invalid photo ingestion mode: {mode}")
+
+    if mode == "hardlink":
+        try:
+            os.link(source_path, dest_path)
+            # The inode is shared with the original, so its permissions are left alone
+            return None
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+
+    photo_hash = None
+    if mode == "hash_copy":
+        photo_hash = _hash_copy(source_path, dest_path)
+    elif mode == "reflink":
+        try:
+            _reflink(source_path, dest_path)
+        except (ImportError, OSError) as e:
+            if isinstance(e, OSError) and e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            shutil.copy2(source_path, dest_path)
+    else:
+        shutil.copy2(source_path, dest_path)
+
+    os.chmod(dest_path, 0o600)  # Read/write for owner only
+    if photo_hash is not None:
+        FileHasher.remember(source_path, photo_hash)
+        FileHasher.remember(dest_path, photo_hash)
+    return photo_hash
@@ -0,0 +1,74 @@
+import os
+from pathlib import Path
+from threading import Lock
+
+
+class _DirectoryIndex:
+    __slots__ = ("names", "counters")
+
+    def __init__(self, names: set):
+        self.names = names
+        # Next _N suffix to try for each requested name
+        self.counters: dict = {}
+
+
+class FilenameAllocator:
+    """
+    Hands out free file names in a directory using the name_N.ext scheme. Each directory
+    is listed once per process; afterwards an allocation is a set lookup plus a single
+    existence check (which catches files created behind our back).
+    """
+    _indexes: dict = {}
+    _lock: Lock = Lock()
+
+    @staticmethod
+    def _candidate(original_name: str, counter: int) -> str:
+        name_parts = original_name.rsplit('.', 1)
+        if len(name_parts) > 1:
+            return f"{name_parts[0]}_{counter}.{name_parts[1]}"
+        return f"{original_name}_{counter}"
+
+    @staticmethod
+    def _index_for(directory: Path) -> _DirectoryIndex:
+        index = FilenameAllocator._indexes.get(directory)
+        if index is None:
+            try:
+                with os.scandir(directory) as entries:
+                    names = {entry.name for entry in entries}
+            except FileNotFoundError:
+                names = set()
+            index = FilenameAllocator._indexes[directory] = _DirectoryIndex(names)
+        return index
+
+    @staticmethod
+    def allocate(directory: Path, original_name: str) -> Path:
+        """Reserves and returns a path in directory that no file or earlier allocation uses."""
+        directory = Path(directory)
+        with FilenameAllocator._lock:
+            index = FilenameAllocator._index_for(directory)
+            name = original_name
+            counter = index.counters.get(original_name, 1)
+            while True:
+                if name not in index.names:
+                    if not (directory / name).exists():
+                        break
+                    index.names.add(name)
+                name = FilenameAllocator._candidate(original_name, counter)
+                counter += 1
+            if name != original_name:
+                index.counters[original_name] = counter
+            index.names.add(name)
+            return directory / name
+
+    @staticmethod
+    def invalidate(path: Path = None):
+        """Forgets the listing of a directory and everything below it, or of all directories."""
+        with FilenameAllocator._lock:
+            if path is None:
+                FilenameAllocator._indexes.clear()
+                return
+            path = Path(path)
+            FilenameAllocator._indexes = {
+                directory: index for directory, index in FilenameAllocator._indexes.items()
+                if directory != path and path not in directory.parents
+            }
@@ -0,0 +1,79 @@
+import re
+from typing import Iterable, List, NamedTuple
+
+# References are written with the first characters of the photo hash
+HASH_PREFIX_LENGTH = 8
+
+# Token kinds
+VALID = "valid"                # [[photo::0123abcd]]
+INVALID_HASH = "invalid_hash"  # [[photo::xyz]]: closed, but not 8 hexadecimal characters
+MALFORMED = "malformed"        # [[photo::0123abcd] or [[photo::0123abcd: not closed with ]]
+WRONG_FORMAT = "wrong_format"  # [[photo:0123abcd]]: a single ':'
+
+# Every token starts with the literal "[[photo:". The body stops at the first bracket
+# or line break, so a candidate never runs into the next one and a single scan of
+# the text is linear in its length, however many broken references it holds.
+TOKEN_PATTERN = re.compile(r"\[\[photo(?P<separator>::?)(?P<body>[^\[\]\n]*)(?P<close>\]{0,2})")
+HASH_PATTERN = re.compile(r"[0-9A-Fa-f]{%d}" % HASH_PREFIX_LENGTH)
+
+
+class ReferenceToken(NamedTuple):
+    kind: str
+    photo_hash: str
+    start: int
+    end: int
+    text: str
+
+
+class PhotoReferenceSpan(NamedTuple):
+    photo_hash: str
+    start: int
+    end: int
+
+
+def _kind(separator: str, body: str, close: str) -> str:
+    if separator == ":":
+        return WRONG_FORMAT
+    if close != "]]":
+        return MALFORMED
+    if HASH_PATTERN.fullmatch(body):
+        return VALID
+    return INVALID_HASH
+
+
+def tokenize(text: str | None) -> List[ReferenceToken]:
+    """Finds every photo reference in text, broken ones included, in one pass."""
+    if not text:
+        return []
+    return [
+        ReferenceToken(_kind(match["separator"], match["body"], match["close"]),
+                       match["body"], match.start(), match.end(), match.group(0))
+        for match in TOKEN_PATTERN.finditer(text)
+    ]
+
+
+def find_references(text: str | None) -> List[PhotoReferenceSpan]:
+    """Returns every closed [[photo::hash]] in text with its [start, end) offsets, in order."""
+    return [PhotoReferenceSpan(token.photo_hash, token.start, token.end)
+            for token in tokenize(text) if token.kind in (VALID, INVALID_HASH) and token.photo_hash]
+
+
+def format_reference(photo_hash: str) -> str:
+    return f"[[photo::{photo_hash[:HASH_PREFIX_LENGTH]}]]"
+
+
+def blank_spans(text: str, spans: Iterable[tuple]) -> str:
+    """
+    Replaces the given (start, end) ranges of text with spaces. The text keeps its
+    length, so the offsets of every other reference stay valid.
+    """
+    parts = []
+    position = 0
+    for start, end in sorted(spans):
+        if start < position:
+            continue
+        parts.append(text[position:start])
+        parts.append(" " * (end - start))
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
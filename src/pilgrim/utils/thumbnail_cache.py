@@ -0,0 +1,121 @@
+import os
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it photos simply have no preview
+    Image = None
+    ImageOps = None
+
+THUMBNAIL_SIZE = 128
+DEFAULT_MAX_CACHE_BYTES = 32 * 1024 * 1024
+
+
+class ThumbnailCache:
+    """
+    Downscaled PNG previews of photos, keyed by photo_hash (so a photo shared by several
+    diaries has one thumbnail). The directory is kept under max_bytes by evicting the
+    least recently used thumbnails; file modification times carry the LRU order across runs.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_CACHE_BYTES, size: int = THUMBNAIL_SIZE):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.size = size
+        self._lock = Lock()
+        self._entries: "OrderedDict[Path, int] | None" = None
+        self._total_bytes = 0
+        self._executor: ThreadPoolExecutor | None = None
+
+    @staticmethod
+    def available() -> bool:
+        return Image is not None
+
+    def path_for(self, photo_hash: str) -> Path:
+        return self.root / photo_hash[:2] / f"{photo_hash}.png"
+
+    def _index(self) -> "OrderedDict[Path, int]":
+        """Lists the cache directory once, oldest thumbnail first. Call with the lock held."""
+        if self._entries is None:
+            found = []
+            if self.root.exists():
+                for path in self.root.glob("*/*.png"):
+                    stat = path.stat()
+                    found.append((stat.st_mtime_ns, path, stat.st_size))
+            found.sort()
+            self._entries = OrderedDict((path, size) for _, path, size in found)
+            self._total_bytes = sum(self._entries.values())
+        return self._entries
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._index()
+            return self._total_bytes
+
+    def get(self, photo_hash: str) -> Path | None:
+        """Returns the thumbnail of a photo if it is cached, marking it as recently used."""
+        path = self.path_for(photo_hash)
+        with self._lock:
+            entries = self._index()
+            if path not in entries:
+                return None
+            if not path.exists():
+                self._total_bytes -= entries.pop(path)
+                return None
+            entries.move_to_end(path)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def _record(self, path: Path, size: int):
+        with self._lock:
+            entries = self._index()
+            self._total_bytes += size - entries.pop(path, 0)
+            entries[path] = size
+            while self._total_bytes > self.max_bytes and len(entries) > 1:
+                oldest, oldest_size = entries.popitem(last=False)
+                self._total_bytes -= oldest_size
+                oldest.unlink(missing_ok=True)
+
+    def generate(self, source_path: Path, photo_hash: str) -> Path | None:
+        """
+        Creates the thumbnail of a photo (decoding it at reduced scale when the format allows)
+        and returns its path; None if Pillow is missing or the file is not a readable image.
+        """
+        if not self.available():
+            return None
+        cached = self.get(photo_hash)
+        if cached is not None:
+            return cached
+
+        path = self.path_for(photo_hash)
+        partial_path = path.with_name(f".{uuid.uuid4().hex}.part")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with Image.open(source_path) as image:
+                image.draft("RGB", (self.size, self.size))
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((self.size, self.size))
+                image.convert("RGB").save(partial_path, format="PNG", optimize=True)
+            os.replace(partial_path, path)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            partial_path.unlink(missing_ok=True)
+            return None
+        self._record(path, path.stat().st_size)
+        return path
+
+    def schedule(self, source_path: Path, photo_hash: str) -> Future | None:
+        """Generates the thumbnail on a background thread."""
+        if not self.available():
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pilgrim-thumbnail")
+            executor = self._executor
+        return executor.submit(self.generate, Path(source_path), photo_hash)
@@ -1,8 +1,9 @@
+from contextlib import contextmanager
 from pathlib import Path
 from unittest.mock import patch
 
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 
@@ -11,12 +12,32 @@ from pilgrim.database import Base
 from pilgrim.models.travel_diary import TravelDiary
 from pilgrim.models.entry import Entry
 from pilgrim.models.photo import Photo
-from pilgrim.utils import DirectoryManager
+from pilgrim.utils import DirectoryManager, FileHasher
+from pilgrim.utils.filename_allocator import FilenameAllocator
 
 
 # Todos os imports necessários para as fixtures devem estar aqui
 # ...
 
+@pytest.fixture(autouse=True)
+def clear_directory_cache():
+    """Directories verified by one test must not leak into the next."""
+    DirectoryManager.invalidate()
+    yield
+    DirectoryManager.invalidate()
+
+@pytest.fixture(autouse=True)
+def clear_filename_index():
+    FilenameAllocator.invalidate()
+    yield
+    FilenameAllocator.invalidate()
+
+@pytest.fixture(autouse=True)
+def clear_hash_cache():
+    FileHasher.clear_cache()
+    yield
+    FileHasher.clear_cache()
+
 @pytest.fixture(scope="function")
 def db_session():
     """Esta fixture agora está disponível para TODOS os testes."""
@@ -28,6 +49,27 @@ def db_session():
     session.close()
     Base.metadata.drop_all(engine)
 
+@pytest.fixture
+def count_queries():
+    """
+    with count_queries(session) as statements: ... collects the SQL the session sends
+    (an executemany counts once), so a test can assert how many queries an operation runs.
+    """
+    @contextmanager
+    def counting(session):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = session.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+    return counting
+
 @pytest.fixture
 def populated_db_session(db_session):
     """Esta também fica disponível para todos."""
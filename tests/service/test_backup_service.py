@@ -1,7 +1,20 @@
+import hashlib
+import sqlite3
 import zipfile
+from datetime import datetime
 from pathlib import Path
 from unittest.mock import patch, MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from pilgrim.migrations import LATEST_VERSION, schema_version
+from pilgrim.models.entry import Entry
+from pilgrim.models.photo import Photo
+from pilgrim.models.photo_reference import PhotoReference
+from pilgrim.models.travel_diary import TravelDiary
 from pilgrim.service.backup_service import BackupService
+from pilgrim.service.photo_service import PhotoService
+from pilgrim.service.travel_diary_service import TravelDiaryService
 from pilgrim.utils.directory_manager import DirectoryManager
 import pytest
 
@@ -36,4 +49,287 @@ def test_create_backup_fails_if_db_not_found(mock_get_db_path, tmp_path: Path):
     mock_session = MagicMock()
     service = BackupService(mock_session)
     with pytest.raises(FileNotFoundError, match="No Database Found"):
-        service.create_backup()
\ No newline at end of file
+        service.create_backup()
+@patch.object(DirectoryManager, 'get_diaries_root')
+@patch.object(DirectoryManager, 'get_config_directory')
+@patch.object(DirectoryManager, 'get_database_path')
+def test_create_backup_writes_manifest_and_streams_dump(mock_get_db_path, mock_get_config_dir, mock_get_diaries_root,
+                                                       backup_test_env_files_only):
+    env = backup_test_env_files_only
+    mock_get_db_path.return_value = env["db_path"]
+    mock_get_config_dir.return_value = env["config_dir"]
+    mock_get_diaries_root.return_value = env["diaries_root"]
+    success, archive = BackupService(env["session"]).create_backup()
+    assert success is True
+    manifest = BackupService.read_manifest(archive)
+    assert manifest["type"] == "full"
+    assert manifest["photos"]["hash123"] == {
+        "path": "diaries/viagem_de_teste/images/foto1.jpg", "archive": "backup.zip"
+    }
+    with zipfile.ZipFile(archive) as zf:
+        sql_dump = zf.read("database.sql").decode("utf-8")
+    assert sql_dump.startswith("BEGIN TRANSACTION;")
+    assert sql_dump.rstrip().endswith("COMMIT;")
+    assert list(env["config_dir"].glob("tmp*")) == []
+
+@patch.object(DirectoryManager, 'get_diaries_root')
+@patch.object(DirectoryManager, 'get_config_directory')
+@patch.object(DirectoryManager, 'get_database_path')
+def test_incremental_backup_skips_photos_already_backed_up(mock_get_db_path, mock_get_config_dir,
+                                                          mock_get_diaries_root, backup_test_env_files_only):
+    env = backup_test_env_files_only
+    session = env["session"]
+    mock_get_db_path.return_value = env["db_path"]
+    mock_get_config_dir.return_value = env["config_dir"]
+    mock_get_diaries_root.return_value = env["diaries_root"]
+    service = BackupService(session)
+    service.create_backup()
+
+    new_photo_path = env["diaries_root"] / "viagem_de_teste" / "images" / "foto2.jpg"
+    new_photo_path.write_bytes(b"nova foto")
+    session.add(Photo(filepath=str(new_photo_path), name="Foto 2", photo_hash="hash456", fk_travel_diary_id=1))
+    session.commit()
+
+    success, archive = service.create_backup(incremental=True)
+    assert success is True
+    assert archive.name.startswith("backup_incremental_")
+    with zipfile.ZipFile(archive) as zf:
+        names = zf.namelist()
+    assert "diaries/viagem_de_teste/images/foto2.jpg" in names
+    assert "diaries/viagem_de_teste/images/foto1.jpg" not in names
+    manifest = BackupService.read_manifest(archive)
+    assert manifest["type"] == "incremental"
+    assert manifest["photos"]["hash123"]["archive"] == "backup.zip"
+    assert manifest["photos"]["hash456"]["archive"] == archive.name
+    assert BackupService.list_backups(env["config_dir"]) == [env["config_dir"] / "backup.zip", archive]
+
+@pytest.mark.parametrize("name, expected", [
+    ("foto.JPG", zipfile.ZIP_STORED),
+    ("foto.webp", zipfile.ZIP_STORED),
+    ("notas.txt", zipfile.ZIP_DEFLATED),
+    ("sem_extensao", zipfile.ZIP_DEFLATED),
+])
+def test_compression_for_picks_method_by_extension(name, expected):
+    assert BackupService.compression_for(Path(name)) == expected
+
+@patch.object(DirectoryManager, 'get_diaries_root')
+@patch.object(DirectoryManager, 'get_config_directory')
+@patch.object(DirectoryManager, 'get_database_path')
+def test_create_backup_stores_images_and_deflates_text(mock_get_db_path, mock_get_config_dir, mock_get_diaries_root,
+                                                       backup_test_env_files_only):
+    env = backup_test_env_files_only
+    mock_get_db_path.return_value = env["db_path"]
+    mock_get_config_dir.return_value = env["config_dir"]
+    mock_get_diaries_root.return_value = env["diaries_root"]
+    (env["diaries_root"] / "viagem_de_teste" / "notas.txt").write_text("texto " * 100)
+    success, archive = BackupService(env["session"]).create_backup()
+    assert success is True
+    with zipfile.ZipFile(archive) as zf:
+        assert zf.getinfo("diaries/viagem_de_teste/images/foto1.jpg").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo("diaries/viagem_de_teste/notas.txt").compress_type == zipfile.ZIP_DEFLATED
+        assert zf.getinfo("database.sql").compress_type == zipfile.ZIP_DEFLATED
+
+@pytest.fixture
+def backup_env_with_real_hash(backup_test_env_files_only):
+    env = backup_test_env_files_only
+    photo_path = env["diaries_root"] / "viagem_de_teste" / "images" / "foto1.jpg"
+    photo_path.write_bytes(b"conteudo da foto 1")
+    photo = env["session"].query(Photo).first()
+    photo.photo_hash = PhotoService.hash_file(photo_path)
+    env["session"].commit()
+    env["photo_path"] = photo_path
+    with patch.object(DirectoryManager, 'get_database_path', return_value=env["db_path"]), \
+            patch.object(DirectoryManager, 'get_config_directory', return_value=env["config_dir"]), \
+            patch.object(DirectoryManager, 'get_diaries_root', return_value=env["diaries_root"]):
+        yield env
+
+def _database_rows(db_path, query):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(query).fetchall()
+    finally:
+        conn.close()
+
+def test_restore_rebuilds_database_and_photos(backup_env_with_real_hash):
+    env = backup_env_with_real_hash
+    session = env["session"]
+    service = BackupService(session)
+    success, archive = service.create_backup()
+    assert success is True
+
+    env["photo_path"].unlink()
+    session.add(TravelDiary(name="Depois do Backup", directory_name="depois"))
+    session.commit()
+
+    success, report = service.restore(archive, max_workers=2)
+    assert success is True
+    assert report == {"files": 1, "verified": 1}
+    assert env["photo_path"].read_bytes() == b"conteudo da foto 1"
+    assert _database_rows(env["db_path"], "SELECT name FROM travel_diaries") == [("Viagem de Teste",)]
+    assert (env["config_dir"] / "database.db.before_restore").exists()
+    assert list(env["config_dir"].glob("tmp*")) == []
+
+def test_restore_keeps_earlier_databases_and_reports_progress(backup_env_with_real_hash):
+    env = backup_env_with_real_hash
+    service = BackupService(env["session"])
+    success, archive = service.create_backup()
+    assert success is True
+
+    reports = []
+    for _ in range(2):
+        success, _ = service.restore(archive, progress=lambda *report: reports.append(report))
+        assert success is True
+    assert (env["config_dir"] / "database.db.before_restore").exists()
+    assert len(list(env["config_dir"].glob("database.db.before_restore_*"))) == 1
+    assert ("extracting", 1, 1) in reports
+    assert ("verifying", 1, 1) in reports
+
+def test_restore_sets_aside_the_write_ahead_log(backup_env_with_real_hash):
+    env = backup_env_with_real_hash
+    service = BackupService(env["session"])
+    success, archive = service.create_backup()
+    assert success is True
+
+    # Another connection leaves commits in the log of a WAL-mode database
+    writer = sqlite3.connect(env["db_path"])
+    writer.execute("PRAGMA journal_mode = WAL")
+    writer.execute("INSERT INTO travel_diaries (name, directory_name) VALUES ('No Log', 'no_log')")
+    writer.commit()
+    assert (env["config_dir"] / "database.db-wal").exists()
+
+    success, _ = service.restore(archive)
+    writer.close()
+    assert success is True
+    assert _database_rows(env["db_path"], "SELECT name FROM travel_diaries") == [("Viagem de Teste",)]
+    assert (env["config_dir"] / "database.db.before_restore-wal").exists()
+
+def test_restore_rebuilds_search_index(backup_env_with_real_hash):
+    env = backup_env_with_real_hash
+    session = env["session"]
+    session.add(Entry(title="Mosteiro", text="Visita aos Jerónimos", date=datetime(2025, 3, 1), travel_diary_id=1))
+    session.commit()
+    service = BackupService(session)
+    success, archive = service.create_backup()
+    assert success is True
+    with zipfile.ZipFile(archive) as zipf:
+        assert "entries_fts" not in zipf.read("database.sql").decode()
+
+    success, _ = service.restore(archive)
+    assert success is True
+    assert _database_rows(env["db_path"], "SELECT rowid FROM entries_fts WHERE entries_fts MATCH 'jeronimos'") == [(1,)]
+
+def test_restore_follows_incremental_manifest(backup_env_with_real_hash):
+    env = backup_env_with_real_hash
+    session = env["session"]
+    service = BackupService(session)
+    service.create_backup()
+    new_photo_path = env["diaries_root"] / "viagem_de_teste" / "images" / "foto2.jpg"
+    new_photo_path.write_bytes(b"nova foto")
+    session.add(Photo(filepath=str(new_photo_path), name="Foto 2",
+                      photo_hash=PhotoService.hash_file(new_photo_path), fk_travel_diary_id=1))
+    session.commit()
+    success, archive = service.create_backup(incremental=True)
+    assert success is True
+
+    env["photo_path"].unlink()
+    new_photo_path.unlink()
+    success, report = service.restore(archive)
+    assert success is True
+    assert report["verified"] == 2
+    assert env["photo_path"].read_bytes() == b"conteudo da foto 1"
+    assert new_photo_path.read_bytes() == b"nova foto"
+
+def test_restore_rejects_corrupted_photo_and_keeps_database(backup_env_with_real_hash):
+    env = backup_env_with_real_hash
+    session = env["session"]
+    service = BackupService(session)
+    success, archive = service.create_backup()
+    assert success is True
+    session.query(Photo).first().photo_hash = "0" * 96
+    session.commit()
+    success, archive = service.create_backup()
+    assert success is True
+    session.add(TravelDiary(name="Depois do Backup", directory_name="depois"))
+    session.commit()
+
+    success, message = service.restore(archive)
+    assert success is False
+    assert "do not match" in message
+    assert len(_database_rows(env["db_path"], "SELECT name FROM travel_diaries")) == 2
+    assert not (env["config_dir"] / "database.db.before_restore").exists()
+
+def test_restore_relocates_photo_paths(backup_env_with_real_hash, tmp_path):
+    env = backup_env_with_real_hash
+    service = BackupService(env["session"])
+    success, archive = service.create_backup()
+    assert success is True
+    new_root = tmp_path / "outra_maquina" / "diaries"
+    with patch.object(DirectoryManager, 'get_diaries_root', return_value=new_root):
+        success, _ = service.restore(archive)
+    assert success is True
+    restored_photo = new_root / "viagem_de_teste" / "images" / "foto1.jpg"
+    assert restored_photo.exists()
+    assert _database_rows(env["db_path"], "SELECT filepath FROM photos") == [(str(restored_photo),)]
+
+def test_restore_migrates_a_baseline_archive(backup_env_with_real_hash, tmp_path):
+    env = backup_env_with_real_hash
+    photo_hash = PhotoService.hash_file(env["photo_path"])
+    # An archive from before manifests and schema versions: just the dump of the old tables
+    dump = "\n".join([
+        "BEGIN TRANSACTION;",
+        "CREATE TABLE travel_diaries (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, "
+        "directory_name VARCHAR NOT NULL UNIQUE);",
+        "INSERT INTO travel_diaries VALUES(1,'Viagem Antiga','viagem_de_teste');",
+        "CREATE TABLE entries (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, text VARCHAR, "
+        "date DATETIME NOT NULL, fk_travel_diary_id INTEGER NOT NULL REFERENCES travel_diaries(id));",
+        f"INSERT INTO entries VALUES(1,'Praia','Olha o mar [[photo::{photo_hash[:8]}]]','2025-03-01 00:00:00',1);",
+        "CREATE TABLE photos (id INTEGER PRIMARY KEY, filepath VARCHAR, name VARCHAR, addition_date DATETIME, "
+        "caption VARCHAR, hash VARCHAR, fk_travel_diary_id INTEGER NOT NULL REFERENCES travel_diaries(id));",
+        f"INSERT INTO photos VALUES(1,'{env['photo_path']}','Foto 1','2025-03-01 00:00:00',NULL,'{photo_hash}',1);",
+        "CREATE TABLE photo_entry_association (id INTEGER PRIMARY KEY, "
+        "fk_photo_id INTEGER NOT NULL REFERENCES photos(id), fk_entry_id INTEGER NOT NULL REFERENCES entries(id));",
+        "COMMIT;",
+    ])
+    archive = tmp_path / "antigo.zip"
+    with zipfile.ZipFile(archive, "w") as zipf:
+        zipf.writestr("database.sql", dump)
+
+    success, _ = BackupService(env["session"]).restore(archive)
+    assert success is True
+    engine = create_engine(f"sqlite:///{env['db_path']}")
+    session = sessionmaker(bind=engine)()
+    try:
+        assert [photo.file_size for photo in session.query(Photo)] == [len(b"conteudo da foto 1")]
+        assert TravelDiaryService(session).get_stats_for_all()[1]["photo_bytes"] == len(b"conteudo da foto 1")
+        assert session.query(PhotoReference.fk_entry_id).all() == [(1,)]
+        with engine.connect() as conn:
+            assert schema_version(conn) == LATEST_VERSION
+    finally:
+        session.close()
+        engine.dispose()
+
+def test_restore_fails_if_archive_not_found(tmp_path: Path):
+    with pytest.raises(FileNotFoundError, match="No Backup Found"):
+        BackupService(MagicMock()).restore(tmp_path / "missing.zip")
+
+def test_backup_and_restore_include_blob_store(backup_env_with_real_hash):
+    env = backup_env_with_real_hash
+    session = env["session"]
+    blob_content = b"foto compartilhada"
+    blob_hash = hashlib.new('sha3_384', blob_content).hexdigest()
+    blob_path = env["config_dir"] / "blobs" / blob_hash[:2] / f"{blob_hash}.jpg"
+    blob_path.parent.mkdir(parents=True)
+    blob_path.write_bytes(blob_content)
+    session.add(Photo(filepath=str(blob_path), name="Compartilhada", photo_hash=blob_hash, fk_travel_diary_id=1))
+    session.commit()
+    service = BackupService(session)
+    success, archive = service.create_backup()
+    assert success is True
+    with zipfile.ZipFile(archive) as zf:
+        assert f"blobs/{blob_hash[:2]}/{blob_hash}.jpg" in zf.namelist()
+
+    blob_path.unlink()
+    success, report = service.restore(archive)
+    assert success is True
+    assert report["verified"] == 2
+    assert blob_path.read_bytes() == blob_content
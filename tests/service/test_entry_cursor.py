@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import pytest
+
+from pilgrim.models.entry import Entry
+from pilgrim.service.entry_cursor import EntryCursor
+from pilgrim.service.entry_service import EntryService
+
+
+@pytest.fixture
+def session_with_five_entries(populated_db_session):
+    session = populated_db_session
+    session.add_all([
+        Entry(title=f"Entrada {day}", text=f"Texto {day}", date=datetime(2025, 1, day), travel_diary_id=1)
+        for day in range(1, 6)
+    ])
+    session.commit()
+    return session
+
+
+def test_load_keeps_only_summaries(session_with_five_entries):
+    cursor = EntryCursor(EntryService(session_with_five_entries), 1)
+    cursor.load()
+    assert len(cursor) == 5
+    assert cursor.summary(0).title == "Entrada 1"
+    assert cursor.summary(4).date == datetime(2025, 1, 5)
+    assert cursor.cached_ids() == []
+
+
+def test_get_loads_full_entry_on_demand(session_with_five_entries):
+    cursor = EntryCursor(EntryService(session_with_five_entries), 1)
+    cursor.load()
+    entry = cursor.get(2)
+    assert entry.text == "Texto 3"
+    assert cursor.cached_ids() == [entry.id]
+
+
+def test_cache_is_bounded(session_with_five_entries):
+    cursor = EntryCursor(EntryService(session_with_five_entries), 1, cache_size=2)
+    cursor.load()
+    for index in range(5):
+        cursor.get(index)
+    assert cursor.cached_ids() == [cursor.summary(3).id, cursor.summary(4).id]
+
+
+def test_prefetch_loads_neighbours(session_with_five_entries):
+    cursor = EntryCursor(EntryService(session_with_five_entries), 1)
+    cursor.load()
+    cursor.get(2)
+    cursor.prefetch(2)
+    assert set(cursor.cached_ids()) == {cursor.summary(i).id for i in (1, 2, 3)}
+
+
+def test_store_caches_entries_loaded_elsewhere(session_with_five_entries):
+    cursor = EntryCursor(EntryService(session_with_five_entries), 1)
+    cursor.load()
+    cached = cursor.get(2)
+    assert cursor.missing_neighbours(2) == [cursor.summary(1).id, cursor.summary(3).id]
+    other = Entry(title="Outro diário", text="", date=datetime(2025, 1, 1), travel_diary_id=2, id=999)
+    loaded = EntryService(session_with_five_entries).read_by_ids(cursor.missing_neighbours(2))
+    cursor.store(loaded + [other])
+    assert set(cursor.cached_ids()) == {cursor.summary(i).id for i in (1, 2, 3)}
+    assert cursor.missing_neighbours(2) == []
+    assert cursor.get(2) is cached
+
+
+def test_add_inserts_in_navigation_order(session_with_five_entries):
+    session = session_with_five_entries
+    cursor = EntryCursor(EntryService(session), 1)
+    cursor.load()
+    new_entry = Entry(title="Meio", text="", date=datetime(2025, 1, 2, 12), travel_diary_id=1)
+    session.add(new_entry)
+    session.commit()
+    index = cursor.add(new_entry)
+    assert index == 2
+    assert len(cursor) == 6
+    assert cursor.index_of(new_entry.id) == 2
+    assert cursor.max_id() == new_entry.id
+
+
+def test_set_title_updates_summary(session_with_five_entries):
+    cursor = EntryCursor(EntryService(session_with_five_entries), 1)
+    cursor.load()
+    cursor.set_title(0, "Novo Título")
+    assert cursor.summary(0).title == "Novo Título"
@@ -1,10 +1,13 @@
 
 import pytest
 from datetime import datetime
+from sqlalchemy import inspect
 from sqlalchemy.exc import IntegrityError
 
 from pilgrim.models.entry import Entry
 from pilgrim.models.photo import Photo
+from pilgrim.models.photo_reference import PhotoReference
+from pilgrim.models.travel_diary import TravelDiary
 
 from pilgrim.service.entry_service import EntryService
 
@@ -304,3 +307,134 @@ def test_delete_all_photo_references_uses_truncated_hash(session_with_one_diary)
     updated_entry = service.delete_all_photo_references(entry)
     expected_text = "Referência com hash truncado                   ."
     assert "[[photo::12345678]]" not in updated_entry.text
+
+def test_read_by_diary_returns_only_entries_of_that_diary(session_with_multiple_entries):
+    session = session_with_multiple_entries
+    other_diary = TravelDiary(name="Outro Diário", directory_name="outro_diario")
+    session.add(other_diary)
+    session.commit()
+    session.add(Entry(title="Outra", text="Outro texto", date=datetime(2025, 1, 3), travel_diary_id=other_diary.id))
+    session.commit()
+    service = EntryService(session)
+    entries = service.read_by_diary(1)
+    assert [entry.title for entry in entries] == ["Entrada 1", "Entrada 2"]
+    assert service.count_by_diary(1) == 2
+    assert service.count_by_diary(other_diary.id) == 1
+
+def test_read_by_diary_orders_by_date_and_paginates(populated_db_session):
+    session = populated_db_session
+    session.add_all([
+        Entry(title="Terceira", text="", date=datetime(2025, 1, 3), travel_diary_id=1),
+        Entry(title="Primeira", text="", date=datetime(2025, 1, 1), travel_diary_id=1),
+        Entry(title="Segunda", text="", date=datetime(2025, 1, 2), travel_diary_id=1),
+    ])
+    session.commit()
+    service = EntryService(session)
+    assert [e.title for e in service.read_by_diary(1)] == ["Primeira", "Segunda", "Terceira"]
+    assert [e.title for e in service.read_by_diary(1, offset=1, limit=1)] == ["Segunda"]
+    assert service.read_by_diary(1, offset=3) == []
+
+def test_entries_table_has_diary_date_index(db_session):
+    indexes = inspect(db_session.get_bind()).get_indexes("entries")
+    assert any(index["column_names"] == ["fk_travel_diary_id", "date"] for index in indexes)
+
+def _indexed_references(session, entry):
+    return sorted((ref.photo_hash, ref.start, ref.end)
+                  for ref in session.query(PhotoReference).filter_by(fk_entry_id=entry.id))
+
+def test_reference_index_follows_entry_text(entry_with_photo_references):
+    session, entry = entry_with_photo_references
+    start_a = entry.text.index("[[photo::aaaaaaaa]]")
+    start_b = entry.text.index("[[photo::bbbbbbbb]]")
+    assert _indexed_references(session, entry) == [("aaaaaaaa", start_a, start_a + 19),
+                                                   ("bbbbbbbb", start_b, start_b + 19)]
+
+    entry.text = "Só a B: [[photo::bbbbbbbb]]"
+    session.commit()
+    assert _indexed_references(session, entry) == [("bbbbbbbb", 8, 27)]
+
+    EntryService(session).delete(entry)
+    assert session.query(PhotoReference).count() == 0
+
+def test_reference_index_is_written_once_per_flush(session_with_one_diary, count_queries):
+    session, diary = session_with_one_diary
+    entries = [Entry(title=f"Dia {i}", text=f"Foto [[photo::{i:08x}]]", date=datetime(2025, 1, i + 1),
+                     travel_diary_id=diary.id) for i in range(1, 6)]
+    session.add_all(entries)
+    session.commit()
+    assert [_indexed_references(session, entry) for entry in entries] == [[(f"{i:08x}", 5, 24)] for i in range(1, 6)]
+
+    for entry in entries[:3]:
+        entry.text = "Sem foto"
+    session.delete(entries[4])
+    with count_queries(session) as statements:
+        session.commit()
+    reference_statements = [statement for statement in statements if "photo_references" in statement]
+    # One batch removes the deleted entry's rows, one SELECT and one DELETE resync the edited ones
+    assert len(reference_statements) == 3
+    assert [_indexed_references(session, entry) for entry in entries[:4]] == [[], [], [], [("00000004", 5, 24)]]
+    assert session.query(PhotoReference).count() == 1
+
+def test_find_entries_referencing_uses_index(entry_with_photo_references):
+    session, entry = entry_with_photo_references
+    service = EntryService(session)
+    photo_a = session.query(Photo).filter_by(photo_hash="aaaaaaaa").one()
+    other = service.create(entry.fk_travel_diary_id, "Outra", "Sem fotos", datetime(2025, 1, 1), [])
+    assert service.find_entries_referencing(photo_a) == [entry]
+    other.text = "Agora com [[photo::aaaaaaaa]]"
+    session.commit()
+    assert set(service.find_entries_referencing(photo_a)) == {entry, other}
+
+def test_delete_references_to_photos_blanks_only_those(entry_with_photo_references):
+    session, entry = entry_with_photo_references
+    photo_b = session.query(Photo).filter_by(photo_hash="bbbbbbbb").one()
+    original_length = len(entry.text)
+    start_a = entry.text.index("[[photo::aaaaaaaa]]")
+    changed = EntryService(session).delete_references_to_photos([photo_b])
+    assert changed == [entry]
+    assert "[[photo::bbbbbbbb]]" not in entry.text
+    assert "[[photo::aaaaaaaa]]" in entry.text
+    assert len(entry.text) == original_length
+    assert _indexed_references(session, entry) == [("aaaaaaaa", start_a, start_a + 19)]
+
+def test_delete_references_handles_unsaved_text_changes(entry_with_photo_references):
+    session, entry = entry_with_photo_references
+    session.autoflush = False
+    entry.text = "Novo começo. " + entry.text
+    updated = EntryService(session).delete_references_for_specific_photo(entry, "aaaaaaaa")
+    assert updated.text.startswith("Novo começo. Texto com a foto A ")
+    assert "[[photo::aaaaaaaa]]" not in updated.text
+    assert "[[photo::bbbbbbbb]]" in updated.text
+
+def test_reference_index_is_backfilled_for_existing_entries(tmp_path):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from pilgrim.database import Base
+    engine = create_engine(f"sqlite:///{tmp_path / 'antigo.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(TravelDiary(name="Antigo", directory_name="antigo"))
+    session.flush()
+    session.add(Entry(title="Antiga", text="Foto [[photo::cafebabe]]", date=datetime(2024, 1, 1), travel_diary_id=1))
+    session.commit()
+    session.close()
+    PhotoReference.__table__.drop(engine)
+
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    assert [(ref.photo_hash, ref.start, ref.end) for ref in session.query(PhotoReference)] == [("cafebabe", 5, 24)]
+    session.close()
+    engine.dispose()
+
+def test_write_draft_text_only_over_expected_text(entry_with_photo_references):
+    session, entry = entry_with_photo_references
+    service = EntryService(session)
+    original = entry.text
+    assert service.write_draft_text(entry.id, original, "Rascunho [[photo::aaaaaaaa]]") is True
+    session.refresh(entry)
+    assert entry.text == "Rascunho [[photo::aaaaaaaa]]"
+    assert _indexed_references(session, entry) == [("aaaaaaaa", 9, 28)]
+
+    assert service.write_draft_text(entry.id, original, "Rascunho antigo") is False
+    session.refresh(entry)
+    assert entry.text == "Rascunho [[photo::aaaaaaaa]]"
@@ -1,11 +1,14 @@
+import asyncio
 from pathlib import Path
 
 from pilgrim import TravelDiary
-from pilgrim.service.photo_service import PhotoService
+from pilgrim.service.photo_service import PhotoService, PREFIX_QUERY_CHUNK_SIZE
+from pilgrim.service.travel_diary_service import TravelDiaryService
 import hashlib
-from unittest.mock import patch
+import pytest
+from unittest.mock import MagicMock, patch
 from pilgrim.models.photo import Photo
-from pilgrim.utils import DirectoryManager
+from pilgrim.utils import DirectoryManager, FileHasher
 
 
 @patch.object(PhotoService, '_copy_photo_to_diary')
@@ -157,10 +160,30 @@ def test_update_photo_with_new_file_successfully(
     updated_photo = service.update(photo_to_update, photo_with_new_file)
     mock_copy.assert_called_once_with(new_source_path, photo_to_update.travel_diary)
     mock_unlink.assert_called_once()
-    mock_hash.assert_called_once_with(new_copied_path)
+    mock_hash.assert_called_once_with(new_source_path)
     assert updated_photo.filepath == str(new_copied_path)
     assert updated_photo.photo_hash == "novo_hash_calculado"
 
+def test_update_photo_with_new_file_does_not_hash_it_again(session_with_one_diary, tmp_path: Path):
+    session, diary = session_with_one_diary
+    with patch.object(DirectoryManager, 'get_diaries_root', return_value=tmp_path / "diaries"):
+        service = PhotoService(session)
+        first = tmp_path / "antiga.jpg"
+        first.write_bytes(b"foto antiga")
+        photo = service.create(first, "Foto", diary.id)
+        source = tmp_path / "nova.jpg"
+        source.write_bytes(b"foto nova")
+        # Picking the file usually hashed it already, e.g. for a duplicate check
+        source_hash = service.hash_file(source)
+        replacement = Photo(filepath=source, name="Foto", photo_hash=photo.photo_hash,
+                            fk_travel_diary_id=diary.id)
+        with patch.object(FileHasher, '_digest', wraps=FileHasher._digest) as digest:
+            updated = service.update(photo, replacement)
+            assert FileHasher.hash_file(updated.filepath) == source_hash
+        assert digest.call_count == 0
+        assert updated.photo_hash == source_hash
+        assert Path(updated.filepath).read_bytes() == b"foto nova"
+
 def test_update_photo_returns_none_if_photo_does_not_exist(db_session):
     service = PhotoService(db_session)
     non_existent_photo_src = Photo(
@@ -199,7 +222,7 @@ def test_update_photo_with_new_file_successfully(
     updated_photo = service.update(photo_to_update, photo_with_new_file)
     mock_copy.assert_called_once_with(new_source_path, photo_to_update.travel_diary)
     mock_unlink.assert_called_once()
-    mock_hash.assert_called_once_with(new_copied_path)
+    mock_hash.assert_called_once_with(new_source_path)
 
     assert updated_photo.filepath == str(new_copied_path)
     assert updated_photo.photo_hash == "novo_hash_calculado"
@@ -246,3 +269,209 @@ def test_delete_returns_none_for_non_existent_photo(mock_unlink, db_session):
     assert result is None
     mock_unlink.assert_not_called()
 
+
+def test_read_by_diary_returns_only_photos_of_that_diary(session_with_photos):
+    session, photos = session_with_photos
+    other_diary = TravelDiary(name="Outro", directory_name="outro")
+    session.add(other_diary)
+    session.commit()
+    session.add(Photo(filepath="/x/p3.jpg", name="Foto 3", photo_hash="hash3", fk_travel_diary_id=other_diary.id))
+    session.commit()
+    service = PhotoService(session)
+    assert [p.name for p in service.read_by_diary(photos[0].fk_travel_diary_id)] == ["Foto 1", "Foto 2"]
+    assert [p.name for p in service.read_by_diary(other_diary.id)] == ["Foto 3"]
+
+def test_find_by_hash_prefix_resolves_all_prefixes_at_once(session_with_one_diary):
+    session, diary = session_with_one_diary
+    other_diary = TravelDiary(name="Outro", directory_name="outro")
+    session.add(other_diary)
+    session.commit()
+    session.add_all([
+        Photo(filepath="a.jpg", name="A", photo_hash="aaaaaaaa11", fk_travel_diary_id=diary.id),
+        Photo(filepath="b.jpg", name="B", photo_hash="bbbbbbbb11", fk_travel_diary_id=diary.id),
+        Photo(filepath="b2.jpg", name="B2", photo_hash="bbbbbbbb22", fk_travel_diary_id=diary.id),
+        Photo(filepath="c.jpg", name="C", photo_hash="cccccccc11", fk_travel_diary_id=other_diary.id),
+    ])
+    session.commit()
+    service = PhotoService(session)
+    result = service.find_by_hash_prefix(diary.id, ["aaaaaaaa", "bbbbbbbb", "cccccccc", "aaaaaaaa"])
+    assert [p.name for p in result["aaaaaaaa"]] == ["A"]
+    assert [p.name for p in result["bbbbbbbb"]] == ["B", "B2"]
+    assert result["cccccccc"] == []
+
+def test_find_by_hash_prefix_handles_more_prefixes_than_one_chunk(session_with_one_diary):
+    session, diary = session_with_one_diary
+    hashes = [f"{i:08x}ffff" for i in range(PREFIX_QUERY_CHUNK_SIZE + 5)]
+    session.add_all([
+        Photo(filepath=f"{h}.jpg", name=h, photo_hash=h, fk_travel_diary_id=diary.id) for h in hashes
+    ])
+    session.commit()
+    service = PhotoService(session)
+    result = service.find_by_hash_prefix(diary.id, [h[:8] for h in hashes])
+    assert all(len(result[h[:8]]) == 1 for h in hashes)
+
+def _write_photos(folder: Path, contents: dict) -> list:
+    paths = []
+    for relative, content in contents.items():
+        path = folder / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        paths.append(path)
+    return paths
+
+def test_collect_photo_paths_walks_tree(tmp_path: Path):
+    _write_photos(tmp_path, {"b.jpg": b"b", "sub/a.PNG": b"a", "notas.txt": b"x"})
+    assert PhotoService.collect_photo_paths(tmp_path) == [tmp_path / "b.jpg", tmp_path / "sub" / "a.PNG"]
+
+def test_import_many_dedupes_and_commits_once(session_with_one_diary, tmp_path: Path):
+    session, diary = session_with_one_diary
+    card = tmp_path / "cartao"
+    paths = _write_photos(card, {
+        "DCIM/IMG_1.jpg": b"foto 1",
+        "DCIM/IMG_2.jpg": b"foto 2",
+        "DCIM/copia/IMG_1.jpg": b"foto 1",
+        "outra/IMG_2.jpg": b"foto 3",
+        "ja_existe.jpg": b"antiga",
+    })
+    session.add(Photo(filepath="antiga.jpg", name="Antiga", photo_hash=PhotoService.hash_file(paths[4]),
+                      fk_travel_diary_id=diary.id))
+    session.commit()
+    images_dir = tmp_path / "images"
+    progress = []
+    with patch.object(DirectoryManager, 'get_diary_images_directory', return_value=images_dir):
+        with patch.object(session, 'commit', wraps=session.commit) as mock_commit:
+            new_photos, skipped = PhotoService(session).import_many(
+                paths, diary.id, progress=lambda *args: progress.append(args), max_workers=3)
+    assert mock_commit.call_count == 1
+    assert sorted(photo.name for photo in new_photos) == ["IMG_1", "IMG_2", "IMG_2"]
+    assert set(skipped) == {paths[2], paths[4]}
+    assert sorted(p.name for p in images_dir.iterdir()) == ["IMG_1.jpg", "IMG_2.jpg", "IMG_2_1.jpg"]
+    for photo in new_photos:
+        assert PhotoService.hash_file(photo.filepath) == photo.photo_hash
+        assert photo.file_size == Path(photo.filepath).stat().st_size
+    assert ("hashing", 5, 5) in progress
+    assert ("copying", 3, 3) in progress
+    assert session.query(Photo).filter(Photo.fk_travel_diary_id == diary.id).count() == 4
+
+def test_import_many_skips_unreadable_files(session_with_one_diary, tmp_path: Path):
+    session, diary = session_with_one_diary
+    paths = _write_photos(tmp_path / "cartao", {"IMG_1.jpg": b"foto 1"})
+    missing = tmp_path / "cartao" / "sumiu.jpg"
+    with patch.object(DirectoryManager, 'get_diary_images_directory', return_value=tmp_path / "images"):
+        new_photos, skipped = PhotoService(session).import_many(paths + [missing], diary.id)
+    assert [photo.name for photo in new_photos] == ["IMG_1"]
+    assert skipped == [missing]
+
+def test_import_many_returns_none_for_unknown_diary(db_session, tmp_path: Path):
+    assert PhotoService(db_session).import_many([], 999) is None
+
+def test_import_many_async_reports_progress(session_with_one_diary, tmp_path: Path):
+    session, diary = session_with_one_diary
+    paths = _write_photos(tmp_path / "cartao", {"IMG_1.jpg": b"foto 1", "IMG_2.jpg": b"foto 2"})
+    progress = []
+    with patch.object(DirectoryManager, 'get_diary_images_directory', return_value=tmp_path / "images"):
+        new_photos, skipped = asyncio.run(PhotoService(session).import_many_async(
+            paths, diary.id, progress=lambda *args: progress.append(args)))
+    assert len(new_photos) == 2 and skipped == []
+    assert progress[-1] == ("copying", 2, 2)
+
+def test_import_many_hash_copy_reads_each_file_once(session_with_one_diary, tmp_path: Path):
+    session, diary = session_with_one_diary
+    paths = _write_photos(tmp_path / "cartao", {"IMG_1.jpg": b"foto 1", "IMG_2.jpg": b"foto 1", "IMG_3.jpg": b"foto 3"})
+    service = PhotoService(session)
+    service.ingestion_mode = "hash_copy"
+    images_dir = tmp_path / "images"
+    with patch.object(DirectoryManager, 'get_diary_images_directory', return_value=images_dir), \
+            patch.object(FileHasher, '_digest') as mock_digest:
+        new_photos, skipped = service.import_many(paths, diary.id)
+    mock_digest.assert_not_called()
+    assert [photo.name for photo in new_photos] == ["IMG_1", "IMG_3"]
+    assert skipped == [paths[1]]
+    assert sorted(p.name for p in images_dir.iterdir()) == ["IMG_1.jpg", "IMG_3.jpg"]
+
+@pytest.fixture
+def blob_env(session_with_one_diary, tmp_path: Path):
+    session, diary = session_with_one_diary
+    other = TravelDiary(name="Outro Diário", directory_name="outro")
+    session.add(other)
+    session.commit()
+    source = tmp_path / "praia.JPG"
+    source.write_bytes(b"foto compartilhada")
+    (tmp_path / "config").mkdir()
+    with patch.object(DirectoryManager, 'get_config_directory', return_value=tmp_path / "config"), \
+            patch.object(DirectoryManager, 'get_diary_images_directory', return_value=tmp_path / "images"):
+        service = PhotoService(session)
+        service.storage_mode = "blobs"
+        yield service, diary, other, source
+
+def test_blob_storage_keeps_one_file_for_all_diaries(blob_env, tmp_path: Path):
+    service, diary, other, source = blob_env
+    first = service.create(source, "Praia", diary.id)
+    second = service.create(source, "Praia", other.id)
+    assert first.filepath == second.filepath
+    blob_path = Path(first.filepath)
+    assert blob_path == tmp_path / "config" / "blobs" / first.photo_hash[:2] / f"{first.photo_hash}.jpg"
+    assert blob_path.read_bytes() == b"foto compartilhada"
+    assert service.blob_references(blob_path) == 2
+    assert not (tmp_path / "images").exists()
+
+def test_blob_is_removed_with_its_last_photo(blob_env):
+    service, diary, other, source = blob_env
+    first = service.create(source, "Praia", diary.id)
+    second = service.create(source, "Praia", other.id)
+    blob_path = Path(first.filepath)
+    service.delete(first)
+    assert blob_path.exists()
+    service.delete(second)
+    assert not blob_path.exists()
+
+def test_import_many_reuses_blobs_from_other_diaries(blob_env, tmp_path: Path):
+    service, diary, other, source = blob_env
+    existing = service.create(source, "Praia", diary.id)
+    new_photo = tmp_path / "montanha.jpg"
+    new_photo.write_bytes(b"montanha")
+    imported, skipped = service.import_many([source, new_photo], other.id)
+    assert skipped == []
+    assert imported[0].filepath == existing.filepath
+    assert Path(imported[1].filepath).parent.parent == tmp_path / "config" / "blobs"
+    assert service.blob_references(existing.filepath) == 2
+
+def test_deleting_a_diary_releases_its_unshared_blobs(blob_env, tmp_path: Path):
+    service, diary, other, source = blob_env
+    shared = service.create(source, "Praia", diary.id)
+    service.create(source, "Praia", other.id)
+    own_source = tmp_path / "so_meu.jpg"
+    own_source.write_bytes(b"so do outro")
+    own = service.create(own_source, "Só meu", other.id)
+    (tmp_path / "diaries").mkdir()
+    with patch.object(DirectoryManager, 'get_diaries_root', return_value=tmp_path / "diaries"):
+        TravelDiaryService(service.session).delete(other)
+    assert Path(shared.filepath).exists()
+    assert not Path(own.filepath).exists()
+
+def test_remove_files_keeps_blobs_still_in_use(blob_env, tmp_path: Path):
+    service, diary, other, source = blob_env
+    shared = service.create(source, "Praia", diary.id)
+    service.create(source, "Praia", other.id)
+    own_source = tmp_path / "so_meu.jpg"
+    own_source.write_bytes(b"so do primeiro")
+    own = service.create(own_source, "Só meu", diary.id)
+    shared_path, own_path = Path(shared.filepath), Path(own.filepath)
+    service.session.query(Photo).filter_by(fk_travel_diary_id=diary.id).delete()
+    service.session.commit()
+    reports = []
+    with patch.object(DirectoryManager, 'get_diaries_root', return_value=tmp_path / "diaries"):
+        removed = service.remove_files([shared_path, own_path], lambda *report: reports.append(report))
+    assert removed == 1
+    assert reports == [("removing", 1, 1)]
+    assert shared_path.exists()
+    assert not own_path.exists()
+
+@patch.object(PhotoService, '_copy_photo_to_diary', return_value=Path("/fake/diaries_root/imagem.jpg"))
+@patch.object(PhotoService, 'hash_file', return_value="hash_com_miniatura")
+def test_create_schedules_thumbnail(mock_hash, mock_copy, session_with_one_diary):
+    session, diary = session_with_one_diary
+    service = PhotoService(session)
+    service.thumbnail_cache = MagicMock()
+    service.create(Path("/origem/imagem.jpg"), "Imagem", diary.id)
+    service.thumbnail_cache.schedule.assert_called_once_with(Path("/fake/diaries_root/imagem.jpg"), "hash_com_miniatura")
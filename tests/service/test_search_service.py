@@ -0,0 +1,125 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from pilgrim.database import Base
+from pilgrim.models.entry import Entry
+from pilgrim.models.entry_search import drop_search_index, search_index_exists
+from pilgrim.models.travel_diary import TravelDiary
+from pilgrim.service.entry_service import EntryService
+from pilgrim.service.travel_diary_service import TravelDiaryService
+from pilgrim.service.search_service import HIGHLIGHT_END, HIGHLIGHT_START, SearchService
+
+
+@pytest.fixture
+def session_with_two_diaries(db_session):
+    lisboa = TravelDiary(name="Lisboa", directory_name="lisboa")
+    porto = TravelDiary(name="Porto", directory_name="porto")
+    db_session.add_all([lisboa, porto])
+    db_session.flush()
+    db_session.add_all([
+        Entry(title="Chegada", text="Comemos pastéis de nata em Belém.", date=datetime(2025, 3, 1),
+              travel_diary_id=lisboa.id),
+        Entry(title="Pastéis", text="Mais doces hoje.", date=datetime(2025, 3, 2), travel_diary_id=lisboa.id),
+        Entry(title="Ribeira", text="Pastéis no cais, vinho do Porto ao pôr do sol.", date=datetime(2025, 4, 1),
+              travel_diary_id=porto.id),
+    ])
+    db_session.commit()
+    return db_session, lisboa, porto
+
+
+def test_build_query_quotes_terms_and_prefixes_last():
+    assert SearchService.build_query('nata "OR" Bel') == '"nata" "OR" "Bel"*'
+    assert SearchService.build_query("  -*()  ") is None
+
+
+def test_search_ranks_title_matches_first(session_with_two_diaries):
+    session, lisboa, _ = session_with_two_diaries
+    results = SearchService(session).search("pasteis", travel_diary_id=lisboa.id)
+    assert [result.title for result in results] == ["Pastéis", "Chegada"]
+    assert all(result.travel_diary_id == lisboa.id for result in results)
+    assert isinstance(results[0].date, datetime)
+
+
+def test_search_across_diaries_and_by_prefix(session_with_two_diaries):
+    session, _, porto = session_with_two_diaries
+    results = SearchService(session).search("vin")
+    assert [(result.title, result.travel_diary_id) for result in results] == [("Ribeira", porto.id)]
+    assert f"{HIGHLIGHT_START}vinho{HIGHLIGHT_END}" in results[0].snippet
+
+
+def test_search_follows_entry_changes(session_with_two_diaries):
+    session, lisboa, _ = session_with_two_diaries
+    entry_service = EntryService(session)
+    search = SearchService(session)
+    entry = entry_service.create(lisboa.id, "Sintra", "Palácio da Pena", datetime(2025, 3, 3), [])
+    assert [result.entry_id for result in search.search("pena")] == [entry.id]
+
+    entry.text = "Castelo dos Mouros"
+    session.commit()
+    assert search.search("pena") == []
+    assert [result.entry_id for result in search.search("mouros")] == [entry.id]
+
+    entry_service.delete(entry)
+    assert search.search("mouros") == []
+
+
+@patch.object(TravelDiaryService, '_ensure_diary_directory')
+def test_search_follows_bulk_entry_deletes(mock_ensure_dir, session_with_two_diaries):
+    session, lisboa, porto = session_with_two_diaries
+    TravelDiaryService(session).delete_all_entries(lisboa)
+    assert [result.travel_diary_id for result in SearchService(session).search("pasteis")] == [porto.id]
+
+
+def test_create_indexes_existing_entries(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'antigo.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        drop_search_index(conn.exec_driver_sql)
+    session = sessionmaker(bind=engine)()
+    session.add(TravelDiary(name="Antigo", directory_name="antigo"))
+    session.flush()
+    session.add(Entry(title="Açores", text="Lagoa das Sete Cidades", date=datetime(2024, 8, 1), travel_diary_id=1))
+    session.commit()
+    session.close()
+
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    assert search_index_exists(session.connection().exec_driver_sql)
+    assert [result.title for result in SearchService(session).search("lagoa")] == ["Açores"]
+    session.close()
+    engine.dispose()
+
+
+def test_search_without_index_falls_back_to_scan(session_with_two_diaries):
+    session, lisboa, _ = session_with_two_diaries
+    service = SearchService(session)
+    service._has_index = False
+    results = service.search("nata", travel_diary_id=lisboa.id)
+    assert [result.title for result in results] == ["Chegada"]
+    assert f"{HIGHLIGHT_START}nata{HIGHLIGHT_END}" in results[0].snippet
+
+
+def test_search_lists_latest_written_first_when_too_many_match(session_with_two_diaries, monkeypatch):
+    session, _, _ = session_with_two_diaries
+    monkeypatch.setattr("pilgrim.service.search_service.RANKED_MATCH_LIMIT", 1)
+    results = SearchService(session).search("pasteis")
+    assert [result.title for result in results] == ["Ribeira", "Pastéis", "Chegada"]
+
+
+def test_search_ranks_diary_matches_when_only_other_diaries_have_many(session_with_two_diaries, monkeypatch):
+    session, lisboa, porto = session_with_two_diaries
+    session.add_all([Entry(title=f"Dia {day}", text="Pastéis outra vez.", date=datetime(2025, 5, day),
+                           travel_diary_id=porto.id) for day in range(1, 4)])
+    session.add(Entry(title="Jantar", text="Bacalhau, arroz de pato, vinho verde e, no fim, pastéis.",
+                      date=datetime(2025, 3, 3), travel_diary_id=lisboa.id))
+    session.commit()
+    monkeypatch.setattr("pilgrim.service.search_service.RANKED_MATCH_LIMIT", 3)
+    service = SearchService(session)
+    assert service._count_matches(service.build_query("pasteis"), None, 4) == 4
+    results = service.search("pasteis", travel_diary_id=lisboa.id)
+    assert [result.title for result in results][0] == "Pastéis"
+    assert len(results) == 3
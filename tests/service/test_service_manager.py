@@ -1,3 +1,14 @@
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from pilgrim.database import Base
+from pilgrim.models.entry import Entry
+from pilgrim.models.travel_diary import TravelDiary
+from pilgrim.service.entry_cursor import EntryCursor
 from pilgrim.service.servicemanager import ServiceManager
 from unittest.mock import patch, MagicMock
 
@@ -7,6 +18,7 @@ def test_initial_state_is_none():
     assert manager.get_entry_service() is None
     assert manager.get_photo_service() is None
     assert manager.get_travel_diary_service() is None
+    assert manager.get_search_service() is None
 
 @patch('pilgrim.service.servicemanager.TravelDiaryService')
 @patch('pilgrim.service.servicemanager.PhotoService')
@@ -30,4 +42,162 @@ def test_get_services_instantiates_with_correct_session(
     mock_travel_diary_service.assert_called_once_with(mock_session)
     assert entry_service_instance == mock_entry_service.return_value
     assert photo_service_instance == mock_photo_service.return_value
-    assert travel_diary_service_instance == mock_travel_diary_service.return_value
\ No newline at end of file
+    assert travel_diary_service_instance == mock_travel_diary_service.return_value
+def test_photo_service_uses_configured_ingestion_mode():
+    manager = ServiceManager()
+    manager.set_session(MagicMock())
+    assert manager.get_photo_service().ingestion_mode == "copy"
+    config_manager = MagicMock(photo_ingestion_mode="hardlink", photo_storage="blobs")
+    manager.set_config_manager(config_manager)
+    photo_service = manager.get_photo_service()
+    assert photo_service.ingestion_mode == "hardlink"
+    assert photo_service.storage_mode == "blobs"
+
+@patch('pilgrim.service.servicemanager.SearchService')
+def test_get_search_service_uses_session(mock_search_service):
+    manager = ServiceManager()
+    mock_session = MagicMock()
+    manager.set_session(mock_session)
+    assert manager.get_search_service() == mock_search_service.return_value
+    mock_search_service.assert_called_once_with(mock_session)
+
+def test_open_session_binds_to_same_engine():
+    manager = ServiceManager()
+    mock_session = MagicMock()
+    manager.set_session(mock_session)
+    with patch('pilgrim.service.servicemanager.Session') as mock_session_class:
+        assert manager.open_session() == mock_session_class.return_value
+    mock_session_class.assert_called_once_with(bind=mock_session.get_bind.return_value)
+
+@pytest.fixture
+def file_service_manager(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'database.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    manager = ServiceManager()
+    manager.set_session(session)
+    yield manager
+    session.close()
+    engine.dispose()
+
+@pytest.mark.asyncio
+async def test_run_in_thread_uses_its_own_session(file_service_manager):
+    manager = file_service_manager
+    caller = threading.get_ident()
+
+    def create(services, name):
+        assert services.get_session() is not manager.get_session()
+        assert threading.get_ident() != caller
+        diary = TravelDiary(name=name, directory_name="serra")
+        services.get_session().add(diary)
+        services.get_session().commit()
+        return diary
+
+    diary = await manager.run_in_thread(create, "Serra")
+    # Still readable after its session was closed
+    assert diary.name == "Serra"
+    adopted = manager.adopt(diary)
+    assert adopted in manager.get_session()
+    assert manager.get_session().get(TravelDiary, diary.id) is adopted
+
+@pytest.mark.asyncio
+async def test_run_in_thread_rolls_back_and_reraises(file_service_manager):
+    def fail(services):
+        services.get_session().add(TravelDiary(name="Falha", directory_name="falha"))
+        services.get_session().flush()
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await file_service_manager.run_in_thread(fail)
+    assert file_service_manager.get_session().query(TravelDiary).count() == 0
+
+@pytest.mark.asyncio
+async def test_expire_stale_refreshes_and_drops_copies(file_service_manager):
+    manager = file_service_manager
+    session = manager.get_session()
+    renamed = TravelDiary(name="Antigo", directory_name="antigo")
+    deleted = TravelDiary(name="Apagado", directory_name="apagado")
+    session.add_all([renamed, deleted])
+    session.commit()
+    assert renamed.name == "Antigo"
+
+    def change(services, renamed_id, deleted_id):
+        worker_session = services.get_session()
+        changed = worker_session.get(TravelDiary, renamed_id)
+        changed.name = "Novo"
+        removed = worker_session.get(TravelDiary, deleted_id)
+        worker_session.delete(removed)
+        worker_session.commit()
+        return changed, removed
+
+    changed, removed = await manager.run_in_thread(change, renamed.id, deleted.id)
+    manager.expire_stale(changed, removed)
+    assert renamed.name == "Novo"
+    assert deleted not in session
+
+@pytest.mark.asyncio
+async def test_prefetch_after_eviction_keeps_unsaved_text(file_service_manager):
+    manager = file_service_manager
+    session = manager.get_session()
+    diary = TravelDiary(name="Serra", directory_name="serra")
+    session.add(diary)
+    session.flush()
+    session.add_all([Entry(f"Dia {day}", f"texto {day}", datetime(2025, 6, day), diary.id) for day in range(1, 4)])
+    session.commit()
+    cursor = EntryCursor(manager.get_entry_service(), diary.id, cache_size=1)
+    cursor.load()
+    edited = cursor.get(0)
+    edited.text = "edição por salvar"
+    cursor.get(2)
+    assert cursor.missing_neighbours(1) == [edited.id]
+
+    entries = await manager.run_in_thread(
+        lambda services: services.get_entry_service().read_by_ids(cursor.missing_neighbours(1)))
+    cursor.store(manager.adopt_unless_present(entry) for entry in entries)
+    assert cursor.get(0) is edited
+    assert edited.text == "edição por salvar"
+    assert edited in session.dirty
+
+def test_open_session_uses_session_factory():
+    manager = ServiceManager()
+    manager.set_session(MagicMock())
+    factory = MagicMock()
+    manager.set_session_factory(factory)
+    assert manager.open_session(expire_on_commit=False) == factory.return_value
+    factory.assert_called_once_with(expire_on_commit=False)
+
+def test_unit_of_work_commits_and_closes(file_service_manager):
+    manager = file_service_manager
+    with manager.unit_of_work() as services:
+        session = services.get_session()
+        assert session is not manager.get_session()
+        session.add(TravelDiary(name="Litoral", directory_name="litoral"))
+    diary = manager.get_session().query(TravelDiary).one()
+    assert diary.name == "Litoral"
+    # Closed: nothing it loaded is kept
+    assert len(session.identity_map) == 0
+
+def test_unit_of_work_rolls_back_on_error(file_service_manager):
+    manager = file_service_manager
+    with pytest.raises(ValueError):
+        with manager.unit_of_work() as services:
+            services.get_session().add(TravelDiary(name="Falha", directory_name="falha"))
+            services.get_session().flush()
+            raise ValueError("boom")
+    assert manager.get_session().query(TravelDiary).count() == 0
+
+@pytest.mark.asyncio
+async def test_scopes_share_the_service_thread(file_service_manager):
+    manager = file_service_manager
+    scope = manager.open_scope()
+    assert scope.get_session() is not manager.get_session()
+    thread_names = []
+
+    def job(services):
+        thread_names.append(threading.current_thread().name)
+
+    await manager.run_in_thread(job)
+    await scope.run_in_thread(job)
+    scope.close()
+    assert thread_names[0] == thread_names[1]
+    assert scope._root._executor is manager._executor
@@ -1,3 +1,4 @@
+from datetime import datetime
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
@@ -5,6 +6,8 @@ from unittest.mock import patch, MagicMock
 import pytest
 
 from pilgrim.models.photo import Photo
+from pilgrim.models.photo_in_entry import photo_entry_association
+from pilgrim.models.photo_reference import PhotoReference
 from pilgrim.models.travel_diary import TravelDiary
 from pilgrim.models.entry import Entry
 from pilgrim.service.travel_diary_service import TravelDiaryService
@@ -159,10 +162,13 @@ def test_delete_all_entries_successfully(session_with_multiple_entries):
 @patch('pathlib.Path.exists', return_value=True)
 @patch('pilgrim.utils.DirectoryManager.get_diaries_root', return_value=Path("/fake/diaries_root"))
 def test_delete_all_photos_orchestration(
-    mock_ensure_dir, mock_unlink, mock_exists, mock_get_root, entry_with_photo_references
+    mock_get_root, mock_exists, mock_unlink, mock_ensure_dir, entry_with_photo_references
 ):
     session, entry = entry_with_photo_references
     diary_id = entry.fk_travel_diary_id
+    for photo in session.query(Photo).filter_by(fk_travel_diary_id=diary_id):
+        photo.filepath = f"/fake/diaries_root/diario_de_teste/data/images/{photo.filepath}"
+    session.commit()
     service = TravelDiaryService(session)
     assert session.query(Photo).filter_by(fk_travel_diary_id=diary_id).count() == 2
     assert "[[photo::" in entry.text
@@ -174,3 +180,128 @@ def test_delete_all_photos_orchestration(
     session.refresh(entry)
     assert "[[photo::" not in entry.text
     assert mock_unlink.call_count == 2
+
+def test_get_stats_uses_aggregates(entry_with_photo_references):
+    session, entry = entry_with_photo_references
+    diary_id = entry.fk_travel_diary_id
+    for photo, size in zip(session.query(Photo).order_by(Photo.id).all(), (100, 250)):
+        photo.file_size = size
+    session.add(Entry(title="Depois", text="", date=datetime(2030, 1, 1), travel_diary_id=diary_id))
+    session.commit()
+    service = TravelDiaryService(session)
+    stats = service.get_stats(diary_id)
+    assert stats["entry_count"] == 2
+    assert stats["photo_count"] == 2
+    assert stats["photo_bytes"] == 350
+    assert stats["first_entry_date"] == entry.date
+    assert stats["last_entry_date"] == datetime(2030, 1, 1)
+
+def test_get_stats_for_empty_diary(session_with_one_diary):
+    session, diary = session_with_one_diary
+    stats = TravelDiaryService(session).get_stats(diary.id)
+    assert stats == {
+        "entry_count": 0,
+        "photo_count": 0,
+        "photo_bytes": 0,
+        "first_entry_date": None,
+        "last_entry_date": None,
+    }
+
+def test_get_stats_for_all_groups_by_diary(session_with_multiple_entries):
+    session, diary = session_with_multiple_entries
+    empty_diary = TravelDiary(name="Vazio", directory_name="vazio")
+    session.add(empty_diary)
+    session.add(Photo(filepath="p.jpg", name="P", photo_hash="h", fk_travel_diary_id=diary.id, file_size=10))
+    session.commit()
+    all_stats = TravelDiaryService(session).get_stats_for_all()
+    assert set(all_stats) == {diary.id, empty_diary.id}
+    assert all_stats[diary.id]["entry_count"] == 2
+    assert all_stats[diary.id]["photo_bytes"] == 10
+    assert isinstance(all_stats[diary.id]["last_entry_date"], datetime)
+    assert all_stats[empty_diary.id]["entry_count"] == 0
+    assert all_stats[empty_diary.id]["photo_count"] == 0
+
+
+def _fill_diary(session, diary, size):
+    """size photos and size entries, each entry linked to two photos and referencing one."""
+    photos = [Photo(filepath=f"p{i}.jpg", name=f"Foto {i}", photo_hash=f"{i:08x}", fk_travel_diary_id=diary.id)
+              for i in range(size)]
+    session.add_all(photos)
+    session.flush()
+    for i in range(size):
+        session.add(Entry(title=f"Dia {i}", text=f"Hoje [[photo::{i:08x}]]", date=datetime(2025, 1, i + 1),
+                          travel_diary_id=diary.id, photos=[photos[i], photos[(i + 1) % size]]))
+    session.commit()
+    session.expire_all()
+
+
+@pytest.mark.parametrize("operation", ["delete_all_entries", "delete_all_photos", "delete"])
+@patch.object(TravelDiaryService, '_ensure_diary_directory')
+@patch.object(TravelDiaryService, '_cleanup_diary_directory')
+@patch('pilgrim.utils.DirectoryManager.get_diaries_root', return_value=Path("/fake/diaries_root"))
+def test_bulk_deletes_run_a_fixed_number_of_queries(mock_get_root, mock_cleanup, mock_ensure_dir, operation,
+                                                    db_session, count_queries):
+    counts = []
+    for size in (2, 10):
+        diary = TravelDiary(name=f"Diário {size}", directory_name=f"diario_{size}")
+        db_session.add(diary)
+        db_session.commit()
+        _fill_diary(db_session, diary, size)
+        service = TravelDiaryService(db_session)
+        with count_queries(db_session) as statements:
+            getattr(service, operation)(diary)
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+
+@patch.object(TravelDiaryService, '_ensure_diary_directory')
+def test_delete_all_photos_is_set_based(mock_ensure_dir, session_with_one_diary, tmp_path: Path):
+    session, diary = session_with_one_diary
+    other = TravelDiary(name="Outro", directory_name="outro")
+    session.add(other)
+    session.flush()
+    images = tmp_path / "diaries" / diary.directory_name / "data" / "images"
+    images.mkdir(parents=True)
+    photos = []
+    for i in range(4):
+        (images / f"p{i}.jpg").write_bytes(b"foto")
+        photos.append(Photo(filepath=str(images / f"p{i}.jpg"), name=f"P{i}", photo_hash=f"{i:08x}" * 8,
+                            fk_travel_diary_id=diary.id))
+    kept = Photo(filepath=str(tmp_path / "outro.jpg"), name="Outra", photo_hash="ffffffff", fk_travel_diary_id=other.id)
+    session.add_all(photos + [kept])
+    session.flush()
+    entry = Entry(title="Dia", text="A [[photo::00000000]] B [[photo::00000003]] C [[photo::abcdef12]]",
+                  date=datetime(2025, 5, 1), travel_diary_id=diary.id, photos=photos[:2])
+    other_entry = Entry(title="Outro dia", text="[[photo::ffffffff]]", date=datetime(2025, 5, 1),
+                        travel_diary_id=other.id, photos=[kept])
+    session.add_all([entry, other_entry])
+    session.commit()
+    original_length = len(entry.text)
+
+    reports = []
+    with patch('pilgrim.utils.DirectoryManager.get_diaries_root', return_value=tmp_path / "diaries"):
+        assert TravelDiaryService(session).delete_all_photos(diary, progress=lambda *report: reports.append(report))
+
+    assert list(images.iterdir()) == []
+    assert reports[-1] == ("removing", 4, 4)
+    assert session.query(Photo).all() == [kept]
+    assert entry.photos == []
+    assert other_entry.photos == [kept]
+    # Only the references to the deleted photos are blanked; a dangling one is left alone
+    assert "[[photo::0000000" not in entry.text
+    assert "[[photo::abcdef12]]" in entry.text
+    assert len(entry.text) == original_length
+    assert sorted(ref.photo_hash for ref in session.query(PhotoReference)) == ["abcdef12", "ffffffff"]
+
+
+@patch.object(TravelDiaryService, '_ensure_diary_directory')
+def test_delete_all_entries_is_set_based(mock_ensure_dir, entry_with_photo_references):
+    session, entry = entry_with_photo_references
+    diary = session.get(TravelDiary, entry.fk_travel_diary_id)
+    photos = list(entry.photos)
+    assert TravelDiaryService(session).delete_all_entries(diary)
+    assert session.query(Entry).count() == 0
+    assert session.query(PhotoReference).count() == 0
+    assert session.query(photo_entry_association).count() == 0
+    assert all(photo.entries == [] for photo in photos)
+    assert session.query(Photo).count() == 2
@@ -1,10 +1,10 @@
 import pytest
 from unittest.mock import Mock  # A ferramenta para criar nosso "dublê"
 from pathlib import Path
-from sqlalchemy import inspect, Column, Integer, String
+from sqlalchemy import inspect, text, Column, Integer, String
 from sqlalchemy.orm import Session
 
-from pilgrim.database import Database,Base
+from pilgrim.database import Database, Base, POOL_SIZE
 
 class MockUser(Base):
     __tablename__ = 'mock_users'
@@ -38,3 +38,50 @@ def test_session_returned_corectly(db_instance):
 
 
 
+
+def test_create_adds_columns_missing_from_existing_tables(db_instance):
+    db, _ = db_instance
+    with db.engine.begin() as conn:
+        conn.execute(text("CREATE TABLE photos (id INTEGER PRIMARY KEY, filepath VARCHAR, name VARCHAR, "
+                          "addition_date DATETIME, caption VARCHAR, hash VARCHAR, fk_travel_diary_id INTEGER NOT NULL)"))
+    db.create()
+    columns = {column["name"] for column in inspect(db.engine).get_columns("photos")}
+    assert "file_size" in columns
+
+def test_engine_pools_connections(db_instance):
+    db, _ = db_instance
+    assert db.engine.pool.size() == POOL_SIZE
+    session = db.session(expire_on_commit=False)
+    assert session.expire_on_commit is False
+    session.close()
+
+def test_connections_use_the_sqlite_profile(db_instance):
+    db, _ = db_instance
+    with db.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2  # MEMORY
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+def test_sqlite_profile_comes_from_config(tmp_path: Path):
+    config_manager = Mock()
+    config_manager.database_url = str(tmp_path / "perfil.db")
+    config_manager.sqlite_pragmas = {"journal_mode": "DELETE", "cache_size": -2000}
+    config_manager.sqlite_optimize_interval = 0
+    db = Database(config_manager)
+    with db.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+        assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == -2000
+    assert db.optimize_interval == 0
+
+def test_optimize_runs_at_most_once_per_interval(db_instance):
+    db, _ = db_instance
+    db.create()
+    connection = Mock()
+    db._optimize_now_and_then(connection, None)
+    connection.execute.assert_not_called()
+    db._last_optimize -= db.optimize_interval
+    db._optimize_now_and_then(connection, None)
+    db._optimize_now_and_then(connection, None)
+    connection.execute.assert_called_once_with("PRAGMA optimize")
+    db.optimize()
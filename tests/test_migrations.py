@@ -0,0 +1,123 @@
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy import event, inspect, text
+
+from pilgrim.database import Database, Base
+from pilgrim.migrations import LATEST_VERSION, migrate, schema_version
+from pilgrim.models.entry import Entry
+from pilgrim.models.photo import Photo
+from pilgrim.models.travel_diary import TravelDiary
+
+# The tables as the first releases created them: no indexes besides the primary keys
+OLD_SCHEMA = (
+    "CREATE TABLE travel_diaries (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, directory_name VARCHAR NOT NULL UNIQUE)",
+    "CREATE TABLE entries (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, text VARCHAR, date DATETIME NOT NULL, "
+    "fk_travel_diary_id INTEGER NOT NULL REFERENCES travel_diaries(id))",
+    "CREATE TABLE photos (id INTEGER PRIMARY KEY, filepath VARCHAR, name VARCHAR, addition_date DATETIME, "
+    "caption VARCHAR, hash VARCHAR, fk_travel_diary_id INTEGER NOT NULL REFERENCES travel_diaries(id))",
+    "CREATE TABLE photo_entry_association (id INTEGER PRIMARY KEY, fk_photo_id INTEGER NOT NULL REFERENCES photos(id), "
+    "fk_entry_id INTEGER NOT NULL REFERENCES entries(id))",
+)
+
+
+@pytest.fixture
+def old_database(tmp_path: Path):
+    config_manager = Mock()
+    config_manager.database_url = str(tmp_path / "antigo.db")
+    db = Database(config_manager)
+    with db.engine.begin() as conn:
+        for statement in OLD_SCHEMA:
+            conn.execute(text(statement))
+    return db
+
+
+def _index_names(db, table):
+    return {index["name"] for index in inspect(db.engine).get_indexes(table)}
+
+
+def test_create_migrates_an_old_database(old_database):
+    db = old_database
+    db.create()
+    assert {"idx_photo_entry_entry", "idx_photo_entry_photo"} <= _index_names(db, "photo_entry_association")
+    assert "idx_entry_diary_date" in _index_names(db, "entries")
+    assert {"idx_photo_diary", "idx_photo_hash_diary"} <= _index_names(db, "photos")
+    assert "file_size" in {column["name"] for column in inspect(db.engine).get_columns("photos")}
+    with db.engine.connect() as conn:
+        assert schema_version(conn) == LATEST_VERSION
+
+
+def test_create_backfills_legacy_photo_sizes(old_database, tmp_path: Path):
+    db = old_database
+    foto = tmp_path / "praia.jpg"
+    foto.write_bytes(b"x" * 120)
+    with db.engine.begin() as conn:
+        conn.execute(text("INSERT INTO travel_diaries (id, name, directory_name) VALUES (1, 'Lisboa', 'lisboa')"))
+        conn.execute(text("INSERT INTO photos (id, filepath, name, hash, fk_travel_diary_id) VALUES "
+                          "(1, :praia, 'Praia', 'h1', 1), (2, :perdida, 'Perdida', 'h2', 1)"),
+                     {"praia": str(foto), "perdida": str(tmp_path / "perdida.jpg")})
+    db.create()
+    with db.engine.connect() as conn:
+        sizes = dict(conn.execute(text("SELECT id, file_size FROM photos")).all())
+    assert sizes == {1: 120, 2: None}
+
+
+def test_migrations_run_once(old_database):
+    db = old_database
+    Base.metadata.create_all(db.engine)
+    assert migrate(db.engine, Base.metadata) == list(range(1, LATEST_VERSION + 1))
+    assert migrate(db.engine, Base.metadata) == []
+
+
+def test_fresh_database_is_migrated_without_changes(tmp_path: Path):
+    config_manager = Mock()
+    config_manager.database_url = str(tmp_path / "novo.db")
+    db = Database(config_manager)
+    db.create()
+    with db.engine.connect() as conn:
+        assert schema_version(conn) == LATEST_VERSION
+
+
+def _plans_of_lazy_loads(db, load):
+    """Runs load(session) and returns the query plan of every SELECT it issued."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    session = db.session()
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        load(session)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+    with db.engine.connect() as conn:
+        plans = [" ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+                 for statement, parameters in statements]
+    session.close()
+    return plans
+
+
+def test_photo_links_are_loaded_through_indexes(old_database):
+    db = old_database
+    db.create()
+    session = db.session()
+    diary = TravelDiary(name="Índices", directory_name="indices")
+    session.add(diary)
+    session.flush()
+    photo = Photo("p.jpg", "P", "aaaaaaaa", fk_travel_diary_id=diary.id)
+    entry = Entry("Dia", "texto", datetime(2025, 5, 1), diary.id, photos=[photo])
+    session.add_all([photo, entry])
+    session.commit()
+    entry_id, photo_id = entry.id, photo.id
+    session.close()
+
+    entry_plans = _plans_of_lazy_loads(db, lambda s: s.get(Entry, entry_id).photos)
+    photo_plans = _plans_of_lazy_loads(db, lambda s: s.get(Photo, photo_id).entries)
+    assert "idx_photo_entry_entry" in entry_plans[-1]
+    assert "idx_photo_entry_photo" in photo_plans[-1]
+    for plan in entry_plans + photo_plans:
+        assert "SCAN photo_entry_association" not in plan
@@ -0,0 +1,66 @@
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+
+from pilgrim.database import Database
+from pilgrim.models.entry import Entry
+from pilgrim.models.travel_diary import TravelDiary
+from pilgrim.service.servicemanager import ServiceManager
+from pilgrim.ui.screens.edit_entry_screen import EditEntryScreen
+from pilgrim.ui.ui import UIApp
+
+
+@pytest.fixture
+def diary_database(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    config_manager = Mock()
+    config_manager.database_url = str(tmp_path / "database.db")
+    database = Database(config_manager)
+    database.create()
+    session = database.session()
+    diary = TravelDiary(name="Lisboa", directory_name="lisboa")
+    session.add(diary)
+    session.flush()
+    entry = Entry("Chegada", "Comemos pastéis de nata.", datetime(2025, 3, 1), diary.id)
+    session.add(entry)
+    session.commit()
+    services = ServiceManager()
+    services.set_session(session)
+    services.set_session_factory(database.session)
+    yield services, diary.id, entry.id
+    session.close()
+    database.engine.dispose()
+
+
+async def _idle(pilot, screen):
+    """Lets the dirty check run and waits for the journal thread to catch up."""
+    await pilot.pause(0.05)
+    screen.services.get_draft_journal().submit(lambda: None).result()
+
+
+@pytest.mark.asyncio
+async def test_undoing_a_folded_draft_puts_the_saved_text_back(diary_database, monkeypatch):
+    services, diary_id, entry_id = diary_database
+    monkeypatch.setattr("pilgrim.ui.screens.edit_entry_screen.DIRTY_CHECK_DELAY", 0.01)
+    monkeypatch.setattr("pilgrim.ui.screens.edit_entry_screen.AUTOSAVE_FOLD_EVERY", 1)
+    app = UIApp(services, Mock())
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        screen = EditEntryScreen(diary_id=diary_id, create_new=False, entry_id=entry_id)
+        await app.push_screen(screen)
+        await pilot.pause()
+        screen.text_entry.insert("Ontem ", (0, 0))
+        await _idle(pilot, screen)
+
+        def database_text():
+            with services.unit_of_work() as scope:
+                return scope.get_entry_service().read_by_id(entry_id).text
+
+        assert database_text() == "Ontem Comemos pastéis de nata."
+
+        screen.text_entry.delete((0, 0), (0, 6))
+        await _idle(pilot, screen)
+        assert not screen.has_unsaved_changes
+        assert database_text() == "Comemos pastéis de nata."
+        assert screen.services.get_draft_journal().drafts_for_diary(diary_id) == []
@@ -63,4 +63,78 @@ def test_read_config_raises_error_on_malformed_toml(mock_get_config_dir, tmp_pat
     config_file.write_text(invalid_toml_content)
     manager = ConfigManager()
     with pytest.raises(ValueError, match="Invalid TOML configuration"):
-        manager.read_config()
\ No newline at end of file
+        manager.read_config()
+@patch('pilgrim.utils.config_manager.DirectoryManager.get_config_directory')
+def test_ingestion_mode_defaults_to_copy_for_old_configs(mock_get_config_dir, tmp_path: Path, clean_singleton):
+    mock_get_config_dir.return_value = str(tmp_path)
+    (tmp_path / "config.toml").write_text("""
+    [database]
+    url = "/db.sqlite"
+    type = "sqlite"
+    [settings.diary]
+    auto_open_diary_on_startup = ""
+    auto_open_on_creation = false
+    """)
+    manager = ConfigManager()
+    manager.read_config()
+    assert manager.get_photo_ingestion_mode() == "copy"
+
+@patch('pilgrim.utils.config_manager.DirectoryManager.get_config_directory')
+def test_ingestion_mode_is_saved(mock_get_config_dir, tmp_path: Path, clean_singleton):
+    mock_get_config_dir.return_value = str(tmp_path)
+    manager = ConfigManager()
+    manager.read_config()
+    manager.set_photo_ingestion_mode("reflink")
+    manager.save_config()
+    with open(tmp_path / "config.toml", "rb") as f:
+        assert tomli.load(f)["settings"]["photos"]["ingestion_mode"] == "reflink"
+    with pytest.raises(ValueError, match="Invalid photo ingestion mode"):
+        manager.set_photo_ingestion_mode("teleport")
+
+@patch('pilgrim.utils.config_manager.DirectoryManager.get_config_directory')
+def test_photo_storage_defaults_to_diary_and_is_saved(mock_get_config_dir, tmp_path: Path, clean_singleton):
+    mock_get_config_dir.return_value = str(tmp_path)
+    manager = ConfigManager()
+    manager.read_config()
+    assert manager.get_photo_storage() == "diary"
+    manager.set_photo_storage("blobs")
+    manager.save_config()
+    with open(tmp_path / "config.toml", "rb") as f:
+        assert tomli.load(f)["settings"]["photos"]["storage"] == "blobs"
+    with pytest.raises(ValueError, match="Invalid photo storage"):
+        manager.set_photo_storage("nuvem")
+
+@patch('pilgrim.utils.config_manager.DirectoryManager.get_config_directory')
+def test_sqlite_profile_defaults_and_overrides(mock_get_config_dir, tmp_path: Path, clean_singleton):
+    mock_get_config_dir.return_value = str(tmp_path)
+    (tmp_path / "config.toml").write_text("""
+    [database]
+    url = "/db.sqlite"
+    type = "sqlite"
+    [database.sqlite]
+    optimize_interval = 600
+    [database.sqlite.pragmas]
+    synchronous = "FULL"
+    [settings.diary]
+    auto_open_diary_on_startup = ""
+    auto_open_on_creation = false
+    """)
+    manager = ConfigManager()
+    manager.read_config()
+    pragmas = manager.get_sqlite_pragmas()
+    assert pragmas["synchronous"] == "FULL"
+    assert pragmas["journal_mode"] == "WAL"
+    assert manager.sqlite_optimize_interval == 600
+    manager.save_config()
+    with open(tmp_path / "config.toml", "rb") as f:
+        assert tomli.load(f)["database"]["sqlite"]["pragmas"]["synchronous"] == "FULL"
+
+@patch('pilgrim.utils.config_manager.DirectoryManager.get_config_directory')
+def test_sqlite_profile_rejects_unknown_pragmas(mock_get_config_dir, tmp_path: Path, clean_singleton):
+    mock_get_config_dir.return_value = str(tmp_path)
+    manager = ConfigManager()
+    manager.read_config()
+    with pytest.raises(ValueError, match="Invalid SQLite pragma"):
+        manager.set_sqlite_pragmas({"writable_schema": 1})
+    with pytest.raises(ValueError, match="Invalid value"):
+        manager.set_sqlite_pragmas({"journal_mode": "WAL; DROP TABLE entries"})
@@ -69,3 +69,23 @@ def test_get_database_path_handles_migration_error(mock_home, mock_copy, tmp_pat
     with pytest.raises(RuntimeError, match="Failed to migrate database"):
         DirectoryManager.get_database_path()
     mock_copy.assert_called_once()
+
+@patch('os.chmod')
+@patch('pathlib.Path.home')
+def test_directories_are_verified_once_per_process(mock_home, mock_chmod, tmp_path: Path):
+    mock_home.return_value = tmp_path
+    for _ in range(3):
+        DirectoryManager.get_diary_images_directory("minha-viagem")
+        DirectoryManager.get_diaries_root()
+    assert mock_chmod.call_count == 2  # ~/.pilgrim and ~/.pilgrim/diaries, once each
+
+def test_ensure_directory_recreates_after_invalidate(tmp_path: Path):
+    target = tmp_path / "a" / "b"
+    DirectoryManager.ensure_directory(target, parents=True)
+    assert target.is_dir()
+    shutil.rmtree(tmp_path / "a")
+    DirectoryManager.ensure_directory(target, parents=True)
+    assert not target.exists()  # still cached
+    DirectoryManager.invalidate(tmp_path / "a")
+    DirectoryManager.ensure_directory(target, parents=True)
+    assert target.is_dir()
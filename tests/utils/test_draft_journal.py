@@ -0,0 +1,55 @@
+from pathlib import Path
+
+from pilgrim.utils.draft_journal import DraftJournal, apply_delta, compute_delta
+
+
+def test_delta_roundtrip():
+    cases = [("", "olá"), ("olá mundo", "olá novo mundo"), ("abcdef", "abef"), ("mesmo", "mesmo"),
+             ("aaaa", "aaaaa"), ("fim", "")]
+    for old, new in cases:
+        assert apply_delta(old, compute_delta(old, new)) == new
+
+
+def test_delta_is_compact():
+    old = "x" * 100_000
+    new = old[:50_000] + "y" + old[50_000:]
+    assert compute_delta(old, new) == {"p": 50_000, "d": 0, "i": "y"}
+
+
+def test_append_and_replay(tmp_path: Path):
+    journal = DraftJournal(tmp_path)
+    journal.append(1, 7, "Dia um", "Dia um em Lisboa")
+    journal.append(1, 7, "Dia um em Lisboa", "Dia um em Lisboa, com sol")
+    [draft] = journal.drafts_for_diary(1)
+    assert draft == ("1-7", 1, 7, "Dia um", "Dia um em Lisboa, com sol")
+    assert journal.drafts_for_diary(2) == []
+
+
+def test_replay_ignores_torn_last_line(tmp_path: Path):
+    journal = DraftJournal(tmp_path)
+    journal.append(1, None, "", "rascunho")
+    with open(journal.path_for("1-new"), "a", encoding="utf-8") as f:
+        f.write('{"p":8,"d":0,"i":" perd')
+    [draft] = journal.drafts_for_diary(1)
+    assert draft.entry_id is None
+    assert draft.text == "rascunho"
+
+
+def test_compact_and_discard(tmp_path: Path):
+    journal = DraftJournal(tmp_path)
+    journal.append(1, 7, "a", "ab")
+    journal.compact(1, 7, "ab")
+    assert journal.path_for("1-7").read_text(encoding="utf-8").count("\n") == 1
+    assert journal.drafts_for_diary(1)[0].text == "ab"
+    journal.discard(1, 7)
+    assert journal.drafts_for_diary(1) == []
+
+
+def test_submit_runs_in_order(tmp_path: Path):
+    journal = DraftJournal(tmp_path)
+    text = ""
+    for word in ["um", " dois", " três"]:
+        journal.submit(journal.append, 3, 1, text, text + word)
+        text += word
+    journal.submit(journal.discard, 3, 2).result(timeout=5)
+    assert journal.drafts_for_diary(3)[0].text == "um dois três"
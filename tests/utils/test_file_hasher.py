@@ -0,0 +1,64 @@
+import asyncio
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+from pilgrim.utils.file_hasher import FileHasher, READ_CHUNK_SIZE
+
+
+def _sha3(content: bytes) -> str:
+    return hashlib.new('sha3_384', content).hexdigest()
+
+
+def test_hash_file_spanning_several_chunks(tmp_path: Path):
+    content = os.urandom(READ_CHUNK_SIZE * 2 + 123)
+    photo = tmp_path / "foto.jpg"
+    photo.write_bytes(content)
+    assert FileHasher.hash_file(photo) == _sha3(content)
+
+
+def test_unchanged_file_is_read_once(tmp_path: Path):
+    photo = tmp_path / "foto.jpg"
+    photo.write_bytes(b"conteudo")
+    with patch.object(FileHasher, '_digest', wraps=FileHasher._digest) as mock_digest:
+        first = FileHasher.hash_file(photo)
+        second = FileHasher.hash_file(str(photo))
+    assert first == second == _sha3(b"conteudo")
+    mock_digest.assert_called_once()
+
+
+def test_modified_file_is_hashed_again(tmp_path: Path):
+    photo = tmp_path / "foto.jpg"
+    photo.write_bytes(b"conteudo")
+    FileHasher.hash_file(photo)
+    photo.write_bytes(b"outro conteudo maior")
+    assert FileHasher.hash_file(photo) == _sha3(b"outro conteudo maior")
+
+
+def test_remember_marks_copy_as_hashed(tmp_path: Path):
+    source = tmp_path / "origem.jpg"
+    source.write_bytes(b"conteudo")
+    copy = tmp_path / "copia.jpg"
+    shutil.copy2(source, copy)
+    digest = FileHasher.hash_file(source)
+    FileHasher.remember(copy, digest)
+    with patch.object(FileHasher, '_digest') as mock_digest:
+        assert FileHasher.hash_file(copy) == digest
+    mock_digest.assert_not_called()
+
+
+def test_remember_ignores_missing_file(tmp_path: Path):
+    FileHasher.remember(tmp_path / "nao_existe.jpg", "hash")
+
+
+def test_hash_files_and_async(tmp_path: Path):
+    paths = []
+    for index in range(5):
+        path = tmp_path / f"foto_{index}.jpg"
+        path.write_bytes(f"foto {index}".encode())
+        paths.append(path)
+    digests = FileHasher.hash_files(paths)
+    assert digests == {path: _sha3(path.read_bytes()) for path in paths}
+    assert asyncio.run(FileHasher.hash_file_async(paths[0])) == digests[paths[0]]
@@ -0,0 +1,70 @@
+import errno
+import hashlib
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from pilgrim.utils.file_hasher import FileHasher
+from pilgrim.utils.file_ingestion import ingest_file
+
+
+@pytest.fixture
+def source_photo(tmp_path: Path) -> Path:
+    source = tmp_path / "origem.jpg"
+    source.write_bytes(b"bytes da foto")
+    os.chmod(source, 0o644)
+    return source
+
+
+def test_copy_mode_copies_with_owner_only_permissions(source_photo, tmp_path: Path):
+    dest = tmp_path / "copia.jpg"
+    assert ingest_file(source_photo, dest, "copy") is None
+    assert dest.read_bytes() == b"bytes da foto"
+    assert dest.stat().st_mode & 0o777 == 0o600
+
+
+def test_hash_copy_returns_hash_and_remembers_both_files(source_photo, tmp_path: Path):
+    dest = tmp_path / "copia.jpg"
+    photo_hash = ingest_file(source_photo, dest, "hash_copy")
+    assert photo_hash == hashlib.new('sha3_384', b"bytes da foto").hexdigest()
+    assert dest.read_bytes() == b"bytes da foto"
+    with patch.object(FileHasher, '_digest') as mock_digest:
+        assert FileHasher.hash_file(source_photo) == photo_hash
+        assert FileHasher.hash_file(dest) == photo_hash
+    mock_digest.assert_not_called()
+
+
+def test_hardlink_shares_inode_and_keeps_permissions(source_photo, tmp_path: Path):
+    dest = tmp_path / "link.jpg"
+    ingest_file(source_photo, dest, "hardlink")
+    assert dest.stat().st_ino == source_photo.stat().st_ino
+    assert source_photo.stat().st_mode & 0o777 == 0o644
+
+
+def test_hardlink_falls_back_to_copy_across_filesystems(source_photo, tmp_path: Path):
+    dest = tmp_path / "copia.jpg"
+    with patch('os.link', side_effect=OSError(errno.EXDEV, "cross-device link")):
+        ingest_file(source_photo, dest, "hardlink")
+    assert dest.stat().st_ino != source_photo.stat().st_ino
+    assert dest.read_bytes() == b"bytes da foto"
+
+
+def test_reflink_falls_back_to_copy_when_unsupported(source_photo, tmp_path: Path):
+    dest = tmp_path / "clone.jpg"
+    with patch('pilgrim.utils.file_ingestion._reflink', side_effect=OSError(errno.EOPNOTSUPP, "not supported")):
+        ingest_file(source_photo, dest, "reflink")
+    assert dest.read_bytes() == b"bytes da foto"
+    assert dest.stat().st_mode & 0o777 == 0o600
+
+
+def test_reflink_either_clones_or_copies(source_photo, tmp_path: Path):
+    dest = tmp_path / "clone.jpg"
+    ingest_file(source_photo, dest, "reflink")
+    assert dest.read_bytes() == b"bytes da foto"
+
+
+def test_invalid_mode_raises(source_photo, tmp_path: Path):
+    with pytest.raises(ValueError, match="Invalid photo ingestion mode"):
+        ingest_file(source_photo, tmp_path / "x.jpg", "teleport")
@@ -0,0 +1,47 @@
+from pathlib import Path
+from unittest.mock import patch
+
+from pilgrim.utils.filename_allocator import FilenameAllocator
+
+
+def test_allocate_keeps_free_name(tmp_path: Path):
+    assert FilenameAllocator.allocate(tmp_path, "foto.jpg") == tmp_path / "foto.jpg"
+
+
+def test_allocate_numbers_taken_names(tmp_path: Path):
+    (tmp_path / "foto.jpg").touch()
+    (tmp_path / "foto_1.jpg").touch()
+    assert FilenameAllocator.allocate(tmp_path, "foto.jpg") == tmp_path / "foto_2.jpg"
+    assert FilenameAllocator.allocate(tmp_path, "foto.jpg") == tmp_path / "foto_3.jpg"
+    assert FilenameAllocator.allocate(tmp_path, "LEIAME") == tmp_path / "LEIAME"
+    assert FilenameAllocator.allocate(tmp_path, "LEIAME") == tmp_path / "LEIAME_1"
+
+
+def test_directory_is_listed_once(tmp_path: Path):
+    with patch('os.scandir', wraps=__import__('os').scandir) as mock_scandir:
+        for _ in range(500):
+            FilenameAllocator.allocate(tmp_path, "IMG_0001.jpg")
+    assert mock_scandir.call_count == 1
+    assert FilenameAllocator.allocate(tmp_path, "IMG_0001.jpg") == tmp_path / "IMG_0001_500.jpg"
+
+
+def test_allocation_is_constant_in_existence_checks(tmp_path: Path):
+    for _ in range(200):
+        FilenameAllocator.allocate(tmp_path, "IMG_0001.jpg")
+    with patch.object(Path, 'exists', return_value=False) as mock_exists:
+        FilenameAllocator.allocate(tmp_path, "IMG_0001.jpg")
+    assert mock_exists.call_count == 1
+
+
+def test_file_created_after_listing_is_not_reused(tmp_path: Path):
+    FilenameAllocator.allocate(tmp_path, "outra.jpg")
+    (tmp_path / "foto.jpg").touch()
+    assert FilenameAllocator.allocate(tmp_path, "foto.jpg") == tmp_path / "foto_1.jpg"
+
+
+def test_invalidate_relists_directory(tmp_path: Path):
+    images = tmp_path / "diario" / "data" / "images"
+    images.mkdir(parents=True)
+    FilenameAllocator.allocate(images, "foto.jpg")
+    FilenameAllocator.invalidate(tmp_path / "diario")
+    assert FilenameAllocator.allocate(images, "foto.jpg") == images / "foto.jpg"
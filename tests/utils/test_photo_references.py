@@ -0,0 +1,57 @@
+from pilgrim.utils.photo_references import (INVALID_HASH, MALFORMED, VALID, WRONG_FORMAT, blank_spans,
+                                            find_references, format_reference, tokenize)
+
+
+def test_tokenize_classifies_every_reference_in_one_pass():
+    text = ("A [[photo::0123abcd]] B [[photo::0123abc]] C [[photo::xyzxyzxy]] "
+            "D [[photo:0123abcd]] E [[photo::0123abcd] F [[photo::0123abcd\nG")
+    tokens = tokenize(text)
+    assert [(token.kind, token.photo_hash) for token in tokens] == [
+        (VALID, "0123abcd"),
+        (INVALID_HASH, "0123abc"),
+        (INVALID_HASH, "xyzxyzxy"),
+        (WRONG_FORMAT, "0123abcd"),
+        (MALFORMED, "0123abcd"),
+        (MALFORMED, "0123abcd"),
+    ]
+    first = tokens[0]
+    assert text[first.start:first.end] == first.text == "[[photo::0123abcd]]"
+
+
+def test_unclosed_reference_does_not_swallow_the_next_one():
+    tokens = tokenize("[[photo::0123 texto [[photo::89abcdef]]")
+    assert [token.kind for token in tokens] == [MALFORMED, VALID]
+
+
+def test_text_without_references():
+    assert tokenize("") == []
+    assert tokenize(None) == []
+    assert tokenize("[[photographs]] e [[outra::coisa]]") == []
+
+
+def test_find_references_returns_closed_references():
+    text = "[[photo::0123abcd]] [[photo::abc]] [[photo::fff]"
+    assert [(span.photo_hash, span.start, span.end) for span in find_references(text)] == [
+        ("0123abcd", 0, 19), ("abc", 20, 34)]
+
+
+def test_format_reference_uses_hash_prefix():
+    assert format_reference("0123abcd" + "f" * 88) == "[[photo::0123abcd]]"
+
+
+def test_blank_spans_keeps_length():
+    text = "a [[photo::0123abcd]] b"
+    assert blank_spans(text, [(2, 21)]) == "a " + " " * 19 + " b"
+
+
+def test_tokenize_stops_broken_references_at_the_next_one():
+    # No token may scan past the next "[[photo:", which keeps tokenizing linear on
+    # text full of unclosed references
+    text = "[[photo::" * 120_000 + "[[photo::0123abcd"
+    tokens = tokenize(text)
+    assert len(tokens) == 120_001
+    assert all(token.kind == MALFORMED for token in tokens)
+    starts = [token.start for token in tokens]
+    assert starts == [index * len("[[photo::") for index in range(120_001)]
+    assert all(token.end <= next_start for token, next_start in zip(tokens, starts[1:]))
+    assert tokens[-1].end == len(text)
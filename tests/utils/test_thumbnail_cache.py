@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from pilgrim.ui.photo_preview import render_half_blocks
+from pilgrim.utils.thumbnail_cache import ThumbnailCache
+
+
+def _make_photo(path: Path, size=(800, 600), color=(200, 30, 30)) -> Path:
+    Image.new("RGB", size, color).save(path, format="JPEG")
+    return path
+
+
+def test_generate_writes_downscaled_png(tmp_path: Path):
+    cache = ThumbnailCache(tmp_path / "thumbs", size=64)
+    thumbnail = cache.generate(_make_photo(tmp_path / "foto.jpg"), "ab" + "0" * 94)
+    assert thumbnail == tmp_path / "thumbs" / "ab" / ("ab" + "0" * 94 + ".png")
+    with Image.open(thumbnail) as image:
+        assert image.format == "PNG"
+        assert max(image.size) == 64
+    assert cache.get("ab" + "0" * 94) == thumbnail
+
+
+def test_generate_ignores_files_that_are_not_images(tmp_path: Path):
+    not_an_image = tmp_path / "notas.jpg"
+    not_an_image.write_bytes(b"isto nao e uma imagem")
+    cache = ThumbnailCache(tmp_path / "thumbs")
+    assert cache.generate(not_an_image, "cd" + "0" * 94) is None
+    assert cache.get("cd" + "0" * 94) is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path):
+    photo = _make_photo(tmp_path / "foto.jpg")
+    probe = ThumbnailCache(tmp_path / "probe")
+    one_thumbnail = probe.generate(photo, "00" * 48).stat().st_size
+
+    cache = ThumbnailCache(tmp_path / "thumbs", max_bytes=one_thumbnail * 2)
+    first = cache.generate(photo, "11" * 48)
+    second = cache.generate(photo, "22" * 48)
+    cache.get("11" * 48)  # first becomes the most recently used
+    cache.generate(photo, "33" * 48)
+    assert first.exists()
+    assert not second.exists()
+    assert cache.total_bytes() <= one_thumbnail * 2
+
+
+def test_index_survives_restart(tmp_path: Path):
+    photo = _make_photo(tmp_path / "foto.jpg")
+    ThumbnailCache(tmp_path / "thumbs").generate(photo, "44" * 48)
+    reopened = ThumbnailCache(tmp_path / "thumbs")
+    assert reopened.get("44" * 48) is not None
+    assert reopened.total_bytes() > 0
+
+
+def test_schedule_generates_in_background(tmp_path: Path):
+    cache = ThumbnailCache(tmp_path / "thumbs")
+    future = cache.schedule(_make_photo(tmp_path / "foto.jpg"), "55" * 48)
+    assert future.result(timeout=10).exists()
+
+
+def test_render_half_blocks_fits_the_box(tmp_path: Path):
+    thumbnail = ThumbnailCache(tmp_path / "thumbs").generate(_make_photo(tmp_path / "foto.jpg"), "66" * 48)
+    art = render_half_blocks(thumbnail, width=20, max_rows=8)
+    lines = art.plain.split("\n")
+    assert len(lines) <= 8
+    assert all(len(line) <= 20 for line in lines)
+    assert set(art.plain) <= {"▀", "\n"}